@@ -0,0 +1,130 @@
+"""
+Compares the ways to get a transmission spanning several LDMs across a
+lossy channel, by a Monte-Carlo simulation of the air time:
+    resend      the object is sent again until one attempt gets through
+                completely, like RadioCommunicator without fragments
+    selective   only the lost fragments are sent again, this needs a round
+                trip to learn which were lost (not implemented, reference)
+    fec r       the fragments are sent with parity (fec_redundancy=r), an
+                attempt with too many losses is sent again as a whole
+Every LDM costs the setup time plus its length divided by the data rate,
+every further attempt adds a round trip. The fragments received in the
+fec runs are decoded with the real ErasureCode. The throughput of the
+code itself is measured first.
+
+    python examples/fec_benchmark.py [--size 20000] [--trials 2000]
+"""
+import os
+import sys
+import math
+import time
+import random
+import argparse
+import statistics
+
+from nexedge.fec import erasure_code, split
+
+
+def throughput(k: int, m: int, size: int = 1 << 20) -> tuple:
+    code = erasure_code(k, m)
+    data = split(os.urandom(size), k)
+    start = time.perf_counter()
+    parity = code.encode(data)
+    encode = time.perf_counter() - start
+
+    # lose the first m data fragments
+    fragments = dict(enumerate(data + parity))
+    for i in range(min(m, k)):
+        del fragments[i]
+    start = time.perf_counter()
+    assert code.decode(fragments) == data
+    decode = time.perf_counter() - start
+    return size / encode / 1e6, size / decode / 1e6
+
+
+def airtime(frames: int, size: int, args) -> float:
+    return frames * (args.setup + size / args.rate)
+
+
+def resend(k, loss, rng, args):
+    elapsed = 0.
+    while True:
+        elapsed += airtime(k, args.fragment, args)
+        if all(rng.random() >= loss for _ in range(k)):
+            return elapsed
+        elapsed += args.round_trip
+
+
+def selective(k, loss, rng, args):
+    elapsed = 0.
+    missing = k
+    while True:
+        elapsed += airtime(missing, args.fragment, args)
+        missing = sum(rng.random() < loss for _ in range(missing))
+        if not missing:
+            return elapsed
+        elapsed += args.round_trip
+
+
+def fec(k, m, loss, rng, args):
+    code = erasure_code(k, m)
+    data = split(bytes(rng.getrandbits(8) for _ in range(16 * k)), k)
+    fragments = data + code.encode(data)
+    elapsed = 0.
+    while True:
+        elapsed += airtime(k + m, args.fragment, args)
+        received = {i: fragment for i, fragment in enumerate(fragments)
+                    if rng.random() >= loss}
+        if len(received) >= k:
+            assert code.decode(received) == data
+            return elapsed
+        elapsed += args.round_trip
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20000,
+                        help="bytes of the encoded transmission")
+    parser.add_argument("--fragment", type=int, default=4000,
+                        help="bytes per LDM")
+    parser.add_argument("--rate", type=float, default=100.,
+                        help="bytes per second on air")
+    parser.add_argument("--setup", type=float, default=1.,
+                        help="seconds to set up a LDM")
+    parser.add_argument("--round-trip", type=float, default=5.,
+                        help="seconds until a loss is noticed")
+    parser.add_argument("--trials", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print("code throughput MB/s")
+    print(f"{'k':>4}{'m':>4}{'encode':>10}{'decode':>10}")
+    for k, m in [(8, 1), (8, 2), (8, 4), (16, 4), (16, 8), (32, 8)]:
+        encode, decode = throughput(k, m)
+        print(f"{k:>4}{m:>4}{encode:>10.0f}{decode:>10.0f}")
+
+    k = math.ceil(args.size / args.fragment)
+    strategies = [("resend", lambda loss, rng: resend(k, loss, rng, args)),
+                  ("selective",
+                   lambda loss, rng: selective(k, loss, rng, args))]
+    for redundancy in (.25, .5, 1.):
+        m = math.ceil(k * redundancy)
+        strategies.append(
+            (f"fec {redundancy:g}",
+             lambda loss, rng, m=m: fec(k, m, loss, rng, args)))
+
+    print(f"\n{k} fragments of {args.fragment} bytes, mean / p99 seconds "
+          f"until delivery")
+    print(f"{'loss':>6}" + "".join(f"{name:>18}" for name, _ in strategies))
+    for loss in (0., .05, .1, .2, .3):
+        row = f"{loss:>6.0%}"
+        for _name, strategy in strategies:
+            rng = random.Random(args.seed)
+            times = sorted(strategy(loss, rng) for _ in range(args.trials))
+            p99 = times[min(int(len(times) * .99), len(times) - 1)]
+            row += f"{statistics.mean(times):>10.0f} /{p99:>5.0f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Measures what a process pays for importing nexedge: the codec layer alone
+(as used by workers which only decode payloads) against the full serial
+stack. Every measurement runs in a fresh interpreter.
+
+    python examples/import_time.py [--runs 20]
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROBE = """
+import sys, time, json, resource, tracemalloc
+before = set(sys.modules)
+tracemalloc.start()
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+allocated = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+print(json.dumps({{
+    "time": elapsed,
+    "modules": len(set(sys.modules) - before),
+    "allocated": allocated,
+    "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "serial": "serial" in sys.modules,
+    "serial_asyncio": "serial_asyncio" in sys.modules,
+}}))
+"""
+
+CASES = [
+    ("codec", "from nexedge.codec import Codec"),
+    ("package", "import nexedge"),
+    ("communicator", "from nexedge import RadioCommunicator"),
+]
+
+
+def probe(statement: str) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, "-c", PROBE.format(statement=statement)])
+    return json.loads(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'import':<14}{'time ms':>10}{'modules':>9}{'alloc KiB':>11}"
+          f"{'maxrss KiB':>12}  serial")
+    for name, statement in CASES:
+        results = [probe(statement) for _ in range(args.runs)]
+        last = results[-1]
+        print(f"{name:<14}"
+              f"{statistics.median(r['time'] for r in results) * 1000:>10.1f}"
+              f"{last['modules']:>9}"
+              f"{last['allocated'] / 1024:>11.0f}"
+              f"{statistics.median(r['maxrss'] for r in results):>12.0f}"
+              f"  {last['serial'] or last['serial_asyncio']}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,59 @@
-from .communicator import RadioCommunicator
-from .radio import Radio
-from .channel import ChannelStatus
-from .packer import JSONPacker
+import sys
+import types
+import importlib
+
+# the codec layer only needs the standard library and is imported right away
+from .codec import Codec
+from .packer import JSONPacker, SchemaPacker
 from .encoder import B64Encoder
-from .compressor import ZCompressor
-from .utils import read_queue, read_channel, listen_listener_receiver, listen_target_receiver, send_random, send_via_com, trigger_channel_status
+from .compressor import ZCompressor, StreamCompressor, StreamDecompressor
+from .dedupe import DuplicateFilter
+from .reorder import ReorderBuffer, Loss
+from .link import LinkEstimator
+from .fec import ErasureCode, FragmentBuffer
+from .status import StatusRegistry
+from . import hooks
 from .exceptions import *
+from . import exceptions as _exceptions
+
+# the serial stack (pyserial, serial_asyncio) is imported on first access
+_LAZY = {
+    "RadioCommunicator": ".communicator",
+    "Radio": ".radio",
+    "ChannelStatus": ".channel",
+    "read_queue": ".utils",
+    "read_channel": ".utils",
+    "listen_listener_receiver": ".utils",
+    "listen_target_receiver": ".utils",
+    "send_random": ".utils",
+    "send_via_com": ".utils",
+    "trigger_channel_status": ".utils",
+}
+
+__all__ = ["Codec", "JSONPacker", "SchemaPacker", "B64Encoder", "ZCompressor",
+           "StreamCompressor", "StreamDecompressor", "DuplicateFilter",
+           "ReorderBuffer", "Loss", "LinkEstimator", "ErasureCode",
+           "FragmentBuffer", "StatusRegistry", "hooks"] + list(_LAZY) +\
+    [name for name in vars(_exceptions) if not name.startswith("_")]
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Loads the attributes listed in _LAZY from their module on first access.
+    Works like a module level __getattr__ (PEP 562) on python 3.6 as well.
+    """
+
+    def __getattr__(self, name):
+        module = _LAZY.get(name)
+        if module is None:
+            raise AttributeError(
+                f"module {self.__name__!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, self.__name__), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(_LAZY))
+
+
+sys.modules[__name__].__class__ = _LazyModule
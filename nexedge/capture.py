@@ -0,0 +1,289 @@
+import os
+import sys
+import time
+import mmap
+import struct
+import asyncio
+import logging
+import argparse
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+INBOUND = 0
+OUTBOUND = 1
+# marks the unused end of the buffer before the writer wrapped around
+WRAP = 2
+
+
+class TrafficCapture:
+    """
+    Records the raw serial traffic of a radio into a memory mapped ring
+    buffer file.
+
+    The file starts with a header
+        magic, capacity, head, tail, count
+    followed by `capacity` bytes of records
+        timestamp (float64), direction (uint8), length (uint32), data
+    head is the offset of the oldest record, tail the offset where the next
+    record is written. If the buffer is full, the oldest records are
+    overwritten. Recording a frame is a memory copy, the operating system
+    takes care of writing the pages to disk.
+    """
+    MAGIC = b"NXCAP1\x00\x00"
+    HEADER = struct.Struct("<8sQQQQ")
+    RECORD = struct.Struct("<dBI")
+
+    def __init__(self, path: str, capacity: int = 16 * 2 ** 20):
+        """
+        Create a new capture file, an existing file is overwritten.
+        :param path: str
+        :param capacity: int size of the ring buffer in bytes
+        """
+        assert capacity > self.RECORD.size, "capacity is too small"
+        self.path = path
+        self.capacity = capacity
+
+        size = self.HEADER.size + capacity
+        with open(path, "wb") as f:
+            f.truncate(size)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+        self._head = 0
+        self._tail = 0
+        self._count = 0
+        self._write_header()
+        logger.info(f"capturing serial traffic to {path}")
+
+    def close(self):
+        """
+        Flush and close the capture file.
+        :return:
+        """
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def record_inbound(self, data: bytes):
+        self.record(INBOUND, data)
+
+    def record_outbound(self, data: bytes):
+        self.record(OUTBOUND, data)
+
+    def record(self, direction: int, data: bytes, timestamp: float = None):
+        """
+        Append a record to the ring buffer.
+        :param direction: int INBOUND or OUTBOUND
+        :param data: bytes
+        :param timestamp: float defaults to now
+        :return:
+        """
+        if self._map is None:
+            return
+
+        size = self.RECORD.size + len(data)
+        if size > self.capacity:
+            logger.warning(f"dropping record of {len(data)} bytes, "
+                           f"it does not fit into the capture")
+            return
+
+        position = self._tail
+        if position + size > self.capacity:
+            # drop everything up to the end of the buffer and start over
+            while self._count and self._head >= position:
+                self._evict()
+            if position + self.RECORD.size <= self.capacity:
+                self.RECORD.pack_into(self._map, self.HEADER.size + position,
+                                      0., WRAP, 0)
+            position = 0
+
+        # make room for the new record
+        while self._count and position <= self._head < position + size:
+            self._evict()
+
+        offset = self.HEADER.size + position
+        self.RECORD.pack_into(self._map, offset,
+                              time.time() if timestamp is None else timestamp,
+                              direction, len(data))
+        offset += self.RECORD.size
+        self._map[offset:offset + len(data)] = data
+
+        if not self._count:
+            self._head = position
+        self._tail = position + size
+        self._count += 1
+        self._write_header()
+
+    def _evict(self):
+        """
+        Drop the oldest record.
+        :return:
+        """
+        _timestamp, direction, length = self.RECORD.unpack_from(
+            self._map, self.HEADER.size + self._head)
+        if direction == WRAP:
+            self._head = 0
+            return
+
+        self._head += self.RECORD.size + length
+        self._count -= 1
+        # there is no room for a wrap mark at the very end of the buffer
+        if self._head + self.RECORD.size > self.capacity:
+            self._head = 0
+
+    def _write_header(self):
+        self.HEADER.pack_into(self._map, 0, self.MAGIC, self.capacity,
+                              self._head, self._tail, self._count)
+
+
+def read_capture(path: str):
+    """
+    Iterate over the records of a capture file from the oldest to the newest.
+    :param path: str
+    :return: generator of (timestamp, direction, data)
+    """
+    header = TrafficCapture.HEADER
+    record = TrafficCapture.RECORD
+
+    with open(path, "rb") as f:
+        buffer = f.read()
+
+    magic, capacity, head, _tail, count = header.unpack_from(buffer, 0)
+    if magic != TrafficCapture.MAGIC:
+        raise ValueError(f"{path} is not a capture file")
+
+    position = head
+    while count:
+        if position + record.size > capacity:
+            position = 0
+        timestamp, direction, length = record.unpack_from(
+            buffer, header.size + position)
+        if direction == WRAP:
+            position = 0
+            continue
+
+        start = header.size + position + record.size
+        yield timestamp, direction, buffer[start:start + length]
+        position += record.size + length
+        count -= 1
+
+
+async def replay(path: str, radio, realtime: bool = True,
+                 speed: float = 1.):
+    """
+    Feed the inbound traffic of a capture into a radio as if it came from
+    the serial port.
+    The data is fed into the reader of the radio, a new reader is set up if
+    the radio is not connected. The receiver of the radio has to be running
+    to process the frames.
+    :param path: str capture file
+    :param radio: Radio
+    :param realtime: bool keep the original timing, otherwise replay as fast
+    as possible
+    :param speed: float speed up factor for the original timing
+    :return: int number of replayed bytes
+    """
+    reader = radio._reader
+    if reader is None:
+        reader = asyncio.StreamReader()
+        radio._reader = reader
+
+    replayed = 0
+    first = None
+    started = time.monotonic()
+    for timestamp, direction, data in read_capture(path):
+        if direction != INBOUND:
+            continue
+
+        if realtime:
+            if first is None:
+                first = timestamp
+            delay = (timestamp - first) / speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        reader.feed_data(data)
+        replayed += len(data)
+        # give the receiver the chance to catch up
+        await asyncio.sleep(0)
+
+    return replayed
+
+
+async def _benchmark(path: str, realtime: bool, speed: float):
+    # import here to keep the capture module free of the serial stack
+    from .communicator import RadioCommunicator
+
+    frames = sum(data.count(b"\x03")
+                 for _timestamp, direction, data in read_capture(path)
+                 if direction == INBOUND)
+
+    com = RadioCommunicator(serial_kwargs={"url": "loop://",
+                                           "baudrate": 9600})
+    radio = com._radio
+    await radio.start_connection_handler()
+    com.start_data_handler()
+
+    started = time.monotonic()
+    replayed = await replay(path, radio, realtime=realtime, speed=speed)
+    while radio.stats["frames"] < frames:
+        await asyncio.sleep(.01)
+    while not radio.data_queue.empty():
+        await asyncio.sleep(.01)
+    elapsed = time.monotonic() - started
+
+    print(f"replayed {frames} frames ({replayed} bytes) in {elapsed:.3f}s, "
+          f"{frames / elapsed:.0f} frames/s")
+    print(f"communicator stats {com.stats}")
+    com.destroy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m nexedge.capture",
+        description="Inspect and replay serial traffic captures.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    dump = commands.add_parser("dump", help="print the records of a capture")
+    dump.add_argument("path")
+
+    bench = commands.add_parser(
+        "replay",
+        help="replay the inbound traffic into a RadioCommunicator")
+    bench.add_argument("path")
+    bench.add_argument("--fast", action="store_true",
+                       help="replay as fast as possible")
+    bench.add_argument("--speed", type=float, default=1.,
+                       help="speed up factor for the original timing")
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+
+    if args.command == "dump":
+        names = {INBOUND: "<<", OUTBOUND: ">>"}
+        for timestamp, direction, data in read_capture(args.path):
+            print(f"{timestamp:.6f} {names[direction]} {data!r}")
+    else:
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(
+            _benchmark(args.path, realtime=not args.fast, speed=args.speed))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
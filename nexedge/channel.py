@@ -1,6 +1,10 @@
 import time
 import asyncio
 import logging
+from collections import deque
+
+# local imports
+from . import hooks
 
 # logging setup
 logger = logging.getLogger(__name__)
@@ -16,8 +20,19 @@ class ChannelStatus:
     _time_unfree = time.time()
     # when did we receive a package for the last time
     _time_last_updated = 0
+    # when did the radio report its led for the last time
+    _time_last_status = 0
+
+    # minimum number of observed idle gaps before the hold time is adapted
+    MIN_GAP_SAMPLES = 5
+    # the hold time never drops below this value in seconds
+    MIN_HOLD = .5
 
-    def __init__(self, free_threshold: int = 4, force_threshold: int = 10):
+    def __init__(self,
+                 free_threshold: int = 4,
+                 force_threshold: int = 10,
+                 history: int = 256,
+                 min_hold: float = MIN_HOLD):
         """
         Initialize Object.
         Free Threshold sets the time in seconds in which the channel has to be
@@ -26,10 +41,19 @@ class ChannelStatus:
         threshold forces sets the channel free.
         This works in our scheme since by design only one unit is sending and
         there is no concurrency.
+        The last `history` transitions of the led are kept to derive the
+        channel occupancy and to predict when the channel gets free.
         :param free_threshold: int
+        :param force_threshold: int
+        :param history: int
+        :param min_hold: float lower limit of the adapted hold time in seconds
         """
         self.free_threshold = free_threshold
         self.force_threshold = force_threshold
+        self.min_hold = min_hold
+
+        # ring buffer of (timestamp, status) transitions
+        self._history = deque(maxlen=history)
 
     def update(self):
         """
@@ -46,8 +70,10 @@ class ChannelStatus:
         """
         # first case, we get enough updates on the channel
         # this means the channel is free and is was free for the last 4 seconds
+        # or less if the history shows that the channel is not reused that
+        # fast
         status = self._channel_free and \
-                 (time.time() - self.free_threshold > self._time_unfree)
+                 (time.time() - self.hold_time() > self._time_unfree)
 
         # sometimes the channel just does not get any status updates, in this
         # case just assume free and force the message
@@ -63,12 +89,15 @@ class ChannelStatus:
             if self.free():
                 logger.debug("wait_for_free terminates gracefully")
                 return
-            await asyncio.sleep(.1)
+            # sleep until the predicted free window, but check at least once
+            # a second in case the prediction is wrong
+            start, _length = self.next_free_window()
+            await asyncio.sleep(min(max(start - time.time(), .1), 1.))
 
     def set_free(self):
         logger.debug("setting channel free")
         self._channel_free = True
-        self._radio_status = "off"
+        self._record("off")
 
     def set_unfree(self, status):
         """
@@ -81,7 +110,7 @@ class ChannelStatus:
         logger.debug("setting channel unfree")
         self._channel_free = False
         self._time_unfree = time.time()
-        self._radio_status = status
+        self._record(status)
 
     def set_red(self):
         self.set_unfree("sending")
@@ -91,3 +120,154 @@ class ChannelStatus:
 
     def set_orange(self):
         self.set_unfree("idle")
+
+    @property
+    def last_status(self) -> float:
+        """
+        Timestamp of the last status report of the radio.
+        :return: float
+        """
+        return self._time_last_status
+
+    @property
+    def last_busy(self) -> float:
+        """
+        Timestamp when the channel was reported busy for the last time.
+        :return: float
+        """
+        return self._time_unfree
+
+    def _record(self, status):
+        """
+        Set the radio status and remember the transition.
+        :param status: str
+        :return:
+        """
+        now = time.time()
+        if status != self._radio_status:
+            self._history.append((now, status))
+            if hooks.active:
+                hooks.emit(hooks.CHANNEL_CHANGED, self, status=status,
+                           previous=self._radio_status)
+        self._radio_status = status
+        self._time_last_status = now
+
+    def _periods(self, window: float = None):
+        """
+        Split the history into busy and idle periods.
+        The current, unfinished period is not included.
+        :param window: float only periods ending in the last window seconds
+        :return: (list, list) busy and idle periods as (start, end) pairs
+        """
+        busy = []
+        idle = []
+        since = None if window is None else time.time() - window
+
+        start = None
+        start_free = None
+        for timestamp, status in self._history:
+            is_free = status == "off"
+            if start is not None and is_free != start_free:
+                if since is None or timestamp >= since:
+                    (idle if start_free else busy).append((start, timestamp))
+                start = None
+            if start is None:
+                start = timestamp
+                start_free = is_free
+        return busy, idle
+
+    def duty_cycle(self, window: float = 60) -> float:
+        """
+        Fraction of the last window seconds the channel was busy.
+        :param window: float seconds
+        :return: float
+        """
+        now = time.time()
+        since = now - window
+        busy_time = 0.
+
+        # walk the transitions backwards
+        end = now
+        for timestamp, status in reversed(self._history):
+            if status != "off":
+                busy_time += end - max(timestamp, since)
+            if timestamp <= since:
+                break
+            end = timestamp
+
+        # the status before the first transition is unknown and not counted
+        return busy_time / window
+
+    def hold_time(self) -> float:
+        """
+        Time in seconds the channel has to stay free before it is considered
+        free.
+        This is free_threshold unless the history shows enough idle gaps to
+        tell how fast the channel is usually reused after a transmission, the
+        hold time is then one and a half the longest gap shorter than
+        free_threshold. Without such gaps it stays at free_threshold.
+        :return: float
+        """
+        _busy, idle = self._periods()
+        if len(idle) < self.MIN_GAP_SAMPLES:
+            return self.free_threshold
+
+        short = [end - start for start, end in idle
+                 if end - start < self.free_threshold]
+        if not short:
+            # nobody answered quickly so far, which does not mean nobody will
+            return self.free_threshold
+        return min(self.free_threshold, max(self.min_hold, 1.5 * max(short)))
+
+    def next_free_window(self):
+        """
+        Predict the start of the next free window and its probable length.
+        If the channel is busy, the end of the current busy period is
+        estimated from the mean length of past busy periods.
+        The length is the mean length of past idle periods or None if
+        nothing is known yet.
+        :return: (float, float) timestamp and length in seconds
+        """
+        now = time.time()
+        busy, idle = self._periods()
+        length = None
+        if idle:
+            length = sum(end - start for start, end in idle) / len(idle)
+
+        if self._channel_free:
+            return max(now, self._time_unfree + self.hold_time()), length
+
+        # start of the current busy period
+        busy_since = self._time_unfree
+        for timestamp, status in reversed(self._history):
+            if status == "off":
+                break
+            busy_since = timestamp
+
+        if busy:
+            mean_busy = sum(end - start for start, end in busy) / len(busy)
+        else:
+            mean_busy = self.free_threshold
+
+        return max(now, busy_since + mean_busy) + self.hold_time(), length
+
+    def stats(self, window: float = 60) -> dict:
+        """
+        Occupancy statistics over the last window seconds.
+        :param window: float seconds
+        :return: dict
+        """
+        busy, _idle = self._periods(window)
+        durations = [end - start for start, end in busy]
+        start, length = self.next_free_window()
+        return {
+            "status":               self._radio_status,
+            "duty_cycle":           self.duty_cycle(window),
+            "busy_periods":         len(durations),
+            "busy_period_mean":     (sum(durations) / len(durations)
+                                     if durations else None),
+            "busy_period_max":      max(durations) if durations else None,
+            "hold_time":            self.hold_time(),
+            "next_free_in":         start - time.time(),
+            "next_free_length":     length,
+        }
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+
+# local imports
+from .protocol import read_frame, write_frame, pack_body, unpack_body,\
+    SEND, SEND_GROUP, BROADCAST, SUBSCRIBE_TARGET, SUBSCRIBE_LISTENER, STATS,\
+    RESULT, ERROR, MESSAGE
+from . import exceptions
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+class RadioClient:
+    """
+    Client of the radio daemon (see nexedge.daemon).
+    Mirrors the RadioCommunicator API, but the radio is shared with other
+    processes.
+
+    Example:
+        client = RadioClient("/tmp/nexedge.sock")
+        await client.connect()
+        await client.send(target_id=b"00002", data={"name": "dog"})
+        remote_id, data = await client.get_target_queue(b"00002").get()
+    """
+
+    def __init__(self, path: str = "/tmp/nexedge.sock"):
+        """
+        :param path: str path of the unix domain socket of the daemon
+        """
+        self.path = path
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+
+        self._request_id = 0
+        # request id -> future of the answer
+        self._pending = {}
+        # request id -> queue of a subscription
+        self._subscriptions = {}
+        self._target_queues = {}
+        self._listener_queues = {}
+
+    async def connect(self):
+        """
+        Connect to the daemon.
+        :return:
+        """
+        self._reader, self._writer = await asyncio.open_unix_connection(
+            self.path)
+        self._reader_task = asyncio.get_event_loop().create_task(
+            self._read_loop())
+        logger.info(f"connected to radio daemon {self.path}")
+
+    def close(self):
+        """
+        Close the connection, pending requests fail with DeviceNotFound.
+        :return:
+        """
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._fail_pending()
+
+    def _fail_pending(self):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(
+                    exceptions.DeviceNotFound("connection to daemon lost"))
+        self._pending.clear()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                opcode, request_id, body = await read_frame(self._reader)
+                if opcode == MESSAGE:
+                    queue = self._subscriptions.get(request_id)
+                    if queue is not None:
+                        remote_id, data = unpack_body(body)
+                        queue.put_nowait([remote_id, data])
+                    continue
+
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                _address, result = unpack_body(body)
+                if opcode == RESULT:
+                    future.set_result(result)
+                elif opcode == ERROR:
+                    name, message = result
+                    error = getattr(exceptions, name,
+                                    exceptions.RadioException)
+                    if not (isinstance(error, type) and
+                            issubclass(error, exceptions.RadioException)):
+                        error = exceptions.RadioException
+                    future.set_exception(error(message))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.error("connection to radio daemon lost")
+        finally:
+            self._fail_pending()
+
+    def _request(self, opcode: int, address: bytes = b"", args=None):
+        """
+        Send a request and return the future of its answer.
+        Requests are pipelined, there is no need to wait for an answer before
+        sending the next request.
+        """
+        if self._writer is None:
+            raise exceptions.DeviceNotFound("not connected to the daemon")
+
+        self._request_id = (self._request_id + 1) % 2 ** 32
+        request_id = self._request_id
+        future = asyncio.get_event_loop().create_future()
+        self._pending[request_id] = future
+        write_frame(self._writer, opcode, request_id, pack_body(address, args))
+        return request_id, future
+
+    async def _call(self, opcode: int, address: bytes = b"", args=None):
+        _request_id, future = self._request(opcode, address, args)
+        await self._writer.drain()
+        return await future
+
+    async def send(self, target_id: bytes = None, data=None, meta: dict={}):
+        """
+        See RadioCommunicator.send
+        """
+        assert type(target_id) is bytes and data is not None,\
+            "target or data not set correctly"
+        return await self._call(SEND, target_id, {"data": data, "meta": meta})
+
+    async def send_group(self, group_id: bytes = None, data=None,
+                         meta: dict={}):
+        """
+        See RadioCommunicator.send_group
+        """
+        assert type(group_id) is bytes and data is not None,\
+            "group or data not set correctly"
+        return await self._call(SEND_GROUP, group_id,
+                                {"data": data, "meta": meta})
+
+    async def broadcast(self, data=None, meta: dict={}):
+        """
+        See RadioCommunicator.broadcast
+        """
+        assert data is not None, "data has to be given"
+        return await self._call(BROADCAST, b"", {"data": data, "meta": meta})
+
+    async def stats(self) -> dict:
+        """
+        Statistics of the communicator in the daemon,
+        see RadioCommunicator.stats
+        """
+        return await self._call(STATS)
+
+    def get_target_queue(self, target: bytes = None) -> asyncio.Queue:
+        """
+        See RadioCommunicator.get_target_queue.
+        The subscription is sent to the daemon in the background.
+        """
+        assert type(target) is bytes, "target has to be bytes"
+        if target not in self._target_queues:
+            self._target_queues[target] = self._subscribe(SUBSCRIBE_TARGET,
+                                                          target)
+        return self._target_queues[target]
+
+    def get_listener_queue(self, trigger) -> asyncio.Queue:
+        """
+        See RadioCommunicator.get_listener_queue.
+        The subscription is sent to the daemon in the background, it fails
+        if the daemon has no listener for the trigger.
+        """
+        if trigger not in self._listener_queues:
+            self._listener_queues[trigger] = self._subscribe(
+                SUBSCRIBE_LISTENER, b"", trigger)
+        return self._listener_queues[trigger]
+
+    def _subscribe(self, opcode: int, address: bytes = b"", args=None):
+        queue = asyncio.Queue()
+        request_id, future = self._request(opcode, address, args)
+        self._subscriptions[request_id] = queue
+        future.add_done_callback(self._subscribed)
+        return queue
+
+    @staticmethod
+    def _subscribed(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"subscription failed with {future.exception()!r}")
@@ -0,0 +1,103 @@
+import logging
+
+# local imports, nothing in here may depend on the serial stack
+from .packer import Packer, JSONPacker, SchemaPacker
+from .compressor import Compressor, ZCompressor, StreamCompressor,\
+    StreamDecompressor
+from .encoder import Encoder, B64Encoder
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+class Codec:
+    """
+    Turns objects into the bytes of a transmission body and back:
+    packing (see SchemaPacker), compressing with zlib and encoding in base64.
+
+    This module only needs the standard library, worker processes which
+    only decode payloads can import it without pulling in pyserial or
+    asyncio:
+        from nexedge.codec import Codec
+        data = Codec().unpickle(encoded)
+    Message types registered with RadioCommunicator.register_schema have to
+    be registered with the packer of the codec as well.
+    """
+
+    def __init__(self,
+                 packer: Packer = None,
+                 compressor: Compressor = None,
+                 encoder: Encoder = None):
+        """
+        :param packer: Packer defaults to a new SchemaPacker
+        :param compressor: Compressor defaults to ZCompressor
+        :param encoder: Encoder defaults to B64Encoder
+        """
+        self.packer = SchemaPacker() if packer is None else packer
+        self.compressor = ZCompressor() if compressor is None else compressor
+        self.encoder = B64Encoder() if encoder is None else encoder
+
+    def pickle(self, data) -> bytes:
+        """
+        Take an object and return the bytes which can be interpreted by Radio()
+        :param data: dict
+        :return: bytes
+        """
+        packed = self.packer.pack(data=data)
+        compressed = self.compressor.compress(data=packed)
+        return self.encoder.encode(data=compressed)
+
+    def pickle_within(self, data, limit: int) -> bytes:
+        """
+        Like pickle, but stops compressing as soon as the encoded result is
+        bound to exceed `limit` bytes, see Compressor.compress_within.
+        :param data: dict
+        :param limit: int maximum size of the encoded result
+        :return: bytes
+        :raises PayloadTooLarge: telling roughly by how much the result
+        exceeds the limit
+        """
+        packed = self.packer.pack(data=data)
+        compressed = self.compressor.compress_within(
+            packed, limit, size=self.encoder.encoded_size)
+        return self.encoder.encode(data=compressed)
+
+    def unpickle(self, encoded: bytes):
+        """
+        Reverses the process of self.pickle()
+        :param encoded: bytes
+        :return: dict
+        """
+        decoded = self.encoder.decode(enc=encoded)
+        uncompressed = self.compressor.decompress(comp=decoded)
+        return self.packer.unpack(message=uncompressed)
+
+    def pickle_many(self, items, executor=None) -> list:
+        """
+        Pickle a sequence of objects in one go, see pickle.
+        :param items: sequence of dict
+        :param executor: concurrent.futures.ThreadPoolExecutor to spread the
+        work over, zlib releases the GIL while compressing
+        :return: list of bytes
+        """
+        if executor is not None:
+            return list(executor.map(self.pickle, items))
+
+        packed = self.packer.pack_many(items)
+        compressed = self.compressor.compress_many(packed)
+        return self.encoder.encode_many(compressed)
+
+    def unpickle_many(self, items, executor=None) -> list:
+        """
+        Reverses the process of self.pickle_many()
+        :param items: sequence of bytes
+        :param executor: concurrent.futures.ThreadPoolExecutor to spread the
+        work over
+        :return: list of dict
+        """
+        if executor is not None:
+            return list(executor.map(self.unpickle, items))
+
+        decoded = self.encoder.decode_many(items)
+        uncompressed = self.compressor.decompress_many(decoded)
+        return self.packer.unpack_many(uncompressed)
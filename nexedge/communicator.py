@@ -1,6 +1,8 @@
+import math
 import logging
 import random
 import asyncio
+import time
 
 # setup logging
 logger = logging.getLogger(__name__)
@@ -8,9 +10,18 @@ logger = logging.getLogger(__name__)
 # local imports
 from .radio import Radio
 from .channel import ChannelStatus
-from .packer import JSONPacker
-from .encoder import B64Encoder
-from .compressor import ZCompressor
+from .codec import Codec, SchemaPacker, B64Encoder, ZCompressor,\
+    StreamCompressor, StreamDecompressor
+from .dedupe import DuplicateFilter
+from .reorder import ReorderBuffer, Loss
+from .link import LinkEstimator
+from .fec import FragmentBuffer, erasure_code, split
+from .capture import TrafficCapture
+from .envelope import Header, Message, Inbound
+from .stats import RunningStats
+from .status import StatusRegistry
+from .trace import Tracer
+from . import hooks
 from .exceptions import *
 
 
@@ -20,40 +31,216 @@ class RadioCommunicator:
     Provides data transmission queues for every called target
     """
 
-    _packer = JSONPacker()
+    _packer = SchemaPacker()
     _compressor = ZCompressor()
     _encoder = B64Encoder()
+    _codec = Codec(packer=_packer, compressor=_compressor, encoder=_encoder)
+    _status_registry = StatusRegistry()
 
-    COM_LOCK = None
+    # the transmission counter wraps at this value
+    COUNTER_MODULO = 2 ** 16
+
+    # maximum number of received transmissions handled at once
+    DRAIN_BATCH = 64
+
+    # minimum time between two requests to restart a compressed stream
+    RESYNC_INTERVAL = 30.
+
+    # kinds of control transmissions
+    CONTROL_RESYNC = "r"
+
+    # a transmission is split into at most this many data fragments
+    MAX_FRAGMENTS = 32
 
     def __init__(self,
                  serial_kwargs: dict,
                  listeners=(),
-                 timeout: int = 60):
+                 timeout: int = 60,
+                 dedupe_window: int = 64,
+                 channel_probe: bool = False,
+                 channel_polling: bool = True,
+                 capture: str = None,
+                 executor=None,
+                 stream_compression: bool = False,
+                 max_streams: int = 16,
+                 trace: bool = False,
+                 reorder_window: int = 0,
+                 reorder_hold: float = 2.,
+                 link_pacing: bool = True,
+                 link_pace_slot: float = 2.,
+                 link_max_pace: float = 30.,
+                 fec_redundancy: float = None,
+                 max_requests: int = 64,
+                 radio_class: type = Radio):
+        """
+        :param serial_kwargs: dict passed to the serial connection
+        :param listeners: triggers which get a listener queue
+        :param timeout: int confirmation and channel timeout in seconds
+        :param dedupe_window: int number of transmission counters remembered
+        per sender to drop duplicates, 0 disables duplicate suppression
+        :param channel_probe: bool start and end a call to provoke a channel
+        status update if the channel is busy, see Radio
+        :param channel_polling: bool request the channel status from the
+        radio at an adaptive rate, see Radio.channel_poller. Without it the
+        channel status relies on the reports the radio sends on its own.
+        :param capture: str path of a file to record the raw serial traffic
+        to, see TrafficCapture
+        :param executor: concurrent.futures.Executor used to decode bursts of
+        received transmissions off the event loop, None decodes in the loop
+        :param stream_compression: bool compress the transmissions to each
+        target as one continuous stream, see StreamCompressor. All units have
+        to run a version understanding compressed streams.
+        :param max_streams: int number of compression contexts kept for
+        sending and for receiving each
+        :param trace: bool add trace fields to the transmissions and evaluate
+        those of received transmissions, see Tracer
+        :param reorder_window: int number the transmissions of each link and
+        deliver received ones in that order, holding at most this many
+        transmissions per link, see ReorderBuffer. 0 disables the numbering
+        and reordering. All units of a link have to enable it.
+        :param reorder_hold: float seconds a transmission is held back at most
+        waiting for a missing one
+        :param link_pacing: bool space the transmissions to a target which
+        failed repeatedly, see LinkEstimator.pacing
+        :param link_pace_slot: float seconds the transmissions to a target are
+        spaced after its first failure, doubled with every further failure
+        :param link_max_pace: float upper limit of that spacing in seconds
+        :param fec_redundancy: float split transmissions larger than the
+        recommended payload size of the link into fragments and add this
+        share of parity fragments, e.g. .25 adds one parity fragment for
+        every four fragments, see nexedge.fec. None sends transmissions in
+        one piece, larger ones raise PayloadTooLarge. Received fragments are
+        always understood.
+        :param max_requests: int number of own requests waiting for their
+        reply and of received requests being answered at the same time, see
+        request and register_handler
+        :param radio_class: type Radio or a subclass, e.g. a simulated radio
+        """
         logger.info(f"initialized radio communicator {self}")
 
-        if RadioCommunicator.COM_LOCK is None:
-            RadioCommunicator.COM_LOCK = asyncio.Lock()
+        # one transmission at a time through the radio
+        self.COM_LOCK = asyncio.Lock()
 
         # initialize queues and counter
         self._listener_queues = {}
         self._target_queues = {}
         self._counter = 0
 
+        # a random session id lets receivers detect a restart of this unit
+        self._session = random.randrange(self.COUNTER_MODULO)
+
+        self._executor = executor
+
+        # compressed streams, received streams are always understood
+        if stream_compression:
+            self._stream_compressor = StreamCompressor(
+                max_links=max_streams, modulo=self.COUNTER_MODULO)
+        else:
+            self._stream_compressor = None
+        self._stream_decompressor = StreamDecompressor(
+            max_links=max_streams, modulo=self.COUNTER_MODULO)
+        # end to end latency tracing
+        self._tracer = Tracer() if trace else None
+
+        # remote id -> time of the last request to restart its stream
+        self._resync_requested = {}
+        # control transmissions in flight
+        self._control_tasks = set()
+
+        # duplicate suppression
+        if dedupe_window:
+            self._dedupe = DuplicateFilter(window=dedupe_window,
+                                           modulo=self.COUNTER_MODULO)
+        else:
+            self._dedupe = None
+
+        # in order delivery
+        if reorder_window:
+            self._reorder = ReorderBuffer(max_size=reorder_window,
+                                          max_hold=reorder_hold,
+                                          modulo=self.COUNTER_MODULO)
+        else:
+            self._reorder = None
+        # link (target or group id) -> sequence of the next transmission
+        self._link_sequences = {}
+        # pending call of _expire_reorder
+        self._reorder_timer = None
+
+        # quality of the links to the other units
+        self._links = LinkEstimator(pace_slot=link_pace_slot,
+                                    max_pace=link_max_pace)
+        self._link_pacing = link_pacing
+
+        # forward error correction
+        assert fec_redundancy is None or fec_redundancy >= 0,\
+            "fec_redundancy must not be negative"
+        self._fec_redundancy = fec_redundancy
+        self._fragments = FragmentBuffer()
+
+        # request and reply
+        assert max_requests > 0, "max_requests has to be positive"
+        self._max_requests = max_requests
+        self._request_id = random.randrange(self.COUNTER_MODULO)
+        # (target id, request id) -> future of the reply
+        self._pending = {}
+        # trigger or None -> handler answering the requests
+        self._handlers = {}
+        # received requests being answered
+        self._handler_tasks = set()
+
+        # statistics
+        self._stats = {
+            "sent": 0,
+            "received": 0,
+            "duplicates": 0,
+            "unknown_triggers": 0,
+            "undecodable": 0,
+            "stream_resets": 0,
+            "stream_resyncs": 0,
+            "statuses_sent": 0,
+            "statuses_failed": 0,
+            "statuses_received": 0,
+            "unknown_statuses": 0,
+            "reordered": 0,
+            "lost": 0,
+            "late": 0,
+            "fragments_sent": 0,
+            "fragments_received": 0,
+            "requests_sent": 0,
+            "requests_received": 0,
+            "request_timeouts": 0,
+            "unhandled_requests": 0,
+            "late_replies": 0,
+        }
+        # send latency per transmission path
+        self._latency = {
+            "sdm": RunningStats(),
+            "ldm": RunningStats(),
+        }
+
         # initialize data_handler as None
         self._data_handler = None
 
+        # status subscriptions, list of (queue, states or None for all)
+        self._status_subscriptions = []
+
         # add the listener queues
         for trigger in listeners:
             logger.info(f"adding listener queue for trigger {trigger}")
             self._listener_queues[trigger] = asyncio.Queue()
 
         logger.info("opening connection to radio")
-        self._radio = Radio(serial_kwargs=serial_kwargs,
-                            change_baudrate=False,
-                            retry_sending=False,
-                            confirmation_timeout=timeout,
-                            channel_timeout=timeout)
+        self._radio = radio_class(serial_kwargs=serial_kwargs,
+                                  change_baudrate=False,
+                                  retry_sending=False,
+                                  confirmation_timeout=timeout,
+                                  channel_timeout=timeout,
+                                  channel_probe=channel_probe,
+                                  capture=(TrafficCapture(capture)
+                                           if capture is not None else None),
+                                  reconnect=True)
+        if self._tracer is not None:
+            self._radio.before_write = self._tracer.stamp_on_air
 
         # open the serial connection
         self._radio.start_connection_handler()
@@ -61,10 +248,18 @@ class RadioCommunicator:
         # start the receiver loop
         self._radio.start_receiver_handler()
 
+        # keep the channel status up to date
+        if channel_polling:
+            self._radio.start_channel_poller()
+
         # start the state checker
         self._radio_state_handler =\
             asyncio.get_event_loop().create_task(self.radio_state_handler())
 
+        # distribute received statuses
+        self._status_handler =\
+            asyncio.get_event_loop().create_task(self.status_handler())
+
         # flag
         self.is_destroyed = asyncio.Future()
 
@@ -73,13 +268,20 @@ class RadioCommunicator:
         Cancel all ongoing loops.
         :return:
         """
-        for task in [self._data_handler]:
+        for task in ([self._data_handler, self._status_handler] +
+                     list(self._control_tasks) + list(self._handler_tasks)):
             if task is not None:
                 logger.info(f"cancelling task {task}")
                 task.cancel()
+        if self._reorder_timer is not None:
+            self._reorder_timer.cancel()
+            self._reorder_timer = None
+        for future in self._pending.values():
+            future.cancel()
 
         # set flag
-        self.is_destroyed.set_result(True)
+        if not self.is_destroyed.done():
+            self.is_destroyed.set_result(True)
 
         # if radio is already cancelled, this does nothing
         self._radio.destroy()
@@ -94,17 +296,91 @@ class RadioCommunicator:
         self.destroy()
         return
 
+    @property
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the transmission statistics.
+        Send latencies are given in seconds per transmission path, the
+        channel occupancy is taken from ChannelStatus.stats and the channel
+        access from Radio.stats. With tracing the latencies of the received
+        transmissions are given per sender, see LinkTrace.
+        :return: dict
+        """
+        stats = dict(self._stats)
+        if self._reorder is not None:
+            stats["reordered"] = self._reorder.held
+            stats["lost"] = self._reorder.lost
+            stats["late"] = self._reorder.late
+        stats["latency"] = {path: latency.as_dict()
+                            for path, latency in self._latency.items()}
+        stats["channel"] = self._radio.channel.stats()
+        stats["radio"] = self._radio.stats
+        if self._tracer is not None:
+            stats["trace"] = self._tracer.stats()
+        stats["links"] = self._links.stats()
+        stats["fragments"] = {
+            "rebuilt":      self._fragments.rebuilt,
+            "recovered":    self._fragments.recovered,
+            "expired":      self._fragments.expired,
+        }
+        return stats
+
+    def link_quality(self, target_id: bytes) -> float:
+        """
+        Quality of the link to a unit between 0 (nothing gets through) and
+        1 (perfect), see LinkEstimator.
+        :param target_id: bytes
+        :return: float
+        """
+        return self._links.score(target_id)
+
+    def recommended_payload_size(self, target_id: bytes = None) -> int:
+        """
+        Size of the encoded payload a transmission to the target should not
+        exceed. Smaller than Radio.MAXSIZE on a poor link, where long
+        transmissions are more likely to fail.
+        :param target_id: bytes or None for group transmissions and
+        broadcasts
+        :return: int
+        """
+        if target_id is None:
+            return self._radio.MAXSIZE
+        return self._links.payload_size(target_id, self._radio.MAXSIZE,
+                                        self._radio.SDM_MAXSIZE)
+
+    @classmethod
+    def register_schema(cls, type_id: int, fields):
+        """
+        Register a message type for positional packing,
+        see SchemaPacker.register.
+        Payloads with exactly these fields are transmitted without repeating
+        the key names. All units have to register the same types.
+        :param type_id: int
+        :param fields: sequence of (name, type) pairs
+        :return:
+        """
+        cls._packer.register(type_id=type_id, fields=fields)
+
+    @classmethod
+    def register_status(cls, code: int, state):
+        """
+        Register a state which can be sent as status code,
+        see StatusRegistry.register.
+        All units have to register the same codes.
+        :param code: int
+        :param state: hashable e.g. str or enum member
+        :return:
+        """
+        cls._status_registry.register(code=code, state=state)
+
     def pickle(self, data):
         """
         Take an object and return the bytes which can be interpreted by Radio()
+        See Codec.pickle.
         :param data: dict
         :return: bytes
         """
-        packed = self._packer.pack(data=data)
-        compressed = self._compressor.compress(data=packed)
-        encoded = self._encoder.encode(data=compressed)
-
-        return encoded
+        return self._codec.pickle(data)
 
     def unpickle(self, encoded: bytes):
         """
@@ -112,29 +388,47 @@ class RadioCommunicator:
         :param encoded: bytes
         :return: dict
         """
-        decoded = self._encoder.decode(enc=encoded)
-        uncompressed = self._compressor.decompress(comp=decoded)
-        unpacked = self._packer.unpack(message=uncompressed)
+        return self._codec.unpickle(encoded)
+
+    def pickle_many(self, items, executor=None) -> list:
+        """
+        Pickle a sequence of objects in one go, see Codec.pickle_many.
+        :param items: sequence of dict
+        :param executor: concurrent.futures.ThreadPoolExecutor
+        :return: list of bytes
+        """
+        return self._codec.pickle_many(items, executor=executor)
 
-        return unpacked
+    def unpickle_many(self, items, executor=None) -> list:
+        """
+        Reverses the process of self.pickle_many()
+        :param items: sequence of bytes
+        :param executor: concurrent.futures.ThreadPoolExecutor
+        :return: list of dict
+        """
+        return self._codec.unpickle_many(items, executor=executor)
 
-    def allowed_size_with_margin(self, data=None):
+    def allowed_size_with_margin(self, data=None, target_id: bytes = None):
         """
         Check the size of the pickled data package.
         :param data:
+        :param target_id: bytes check against the recommended payload size
+        of the link to this target instead of Radio.MAXSIZE
         :return:
         """
         assert data is not None, "data has to be given"
         # pickle data
         # pack data into dummy dict
         data_dict = {"dummy": data}
-        encoded = self.pickle(data_dict)
 
-        # now check size with padding for meta data
-        if len(encoded) > (self._radio.MAXSIZE * .8):
+        # check size with padding for meta data, oversized data is not
+        # compressed to the end
+        try:
+            self._codec.pickle_within(
+                data_dict, int(self.recommended_payload_size(target_id) * .8))
+        except PayloadTooLarge:
             return False
-        else:
-            return True
+        return True
 
     async def send(self, target_id: bytes = None, data=None, meta: dict={}):
         """
@@ -147,47 +441,588 @@ class RadioCommunicator:
         assert type(target_id) is bytes and data is not None,\
             "target or data not set correctly"
 
+        logger.info(f"sending some data to {target_id}")
+        return await self._send(target_id, data, meta)
+
+    async def _send(self, target_id: bytes, data, meta: dict,
+                    flags: int = 0, fields: dict = None):
+        """
+        Send the object data to the target receiver, see send.
+        :param target_id: bytes
+        :param data:
+        :param meta: dict
+        :param flags: int header flags, see Header
+        :param fields: dict additional header fields
+        :return: bool
+        """
+        if self._link_pacing:
+            # give a failing link time to recover, the other targets go first
+            delay = self._links.pacing(target_id,
+                                       self._radio.channel.duty_cycle())
+            if delay > 0:
+                logger.info(f"pacing the link to {target_id}, waiting "
+                            f"{delay:.1f}s")
+                await asyncio.sleep(delay)
+        counter, encoded = self._encode_transmission(data=data, meta=meta,
+                                                     link=target_id,
+                                                     flags=flags,
+                                                     fields=fields)
+        try:
+            result = await self._transmit_fragments(counter,
+                                                    self._radio.send_SDM,
+                                                    self._radio.send_LDM,
+                                                    target_id=target_id,
+                                                    payload=encoded)
+        except RadioException:
+            self._reset_stream(target_id)
+            raise
+        if not result:
+            self._reset_stream(target_id)
+        return result
+
+    async def send_group(self, group_id: bytes = None, data=None,
+                         meta: dict={}):
+        """
+        Send the object data to all units of a group with one transmission.
+        The receivers find the group id in data["group"].
+        :param group_id: bytes
+        :param data:
+        :param meta: dict additional meta information for transmission
+        :return: bool
+        """
+        assert type(group_id) is bytes and data is not None,\
+            "group or data not set correctly"
+
+        logger.info(f"sending some data to group {group_id}")
+        counter, encoded = self._encode_transmission(data=data, meta=meta,
+                                                     group=group_id)
+        return await self._transmit_fragments(counter,
+                                              self._radio.send_group_SDM,
+                                              self._radio.send_group_LDM,
+                                              group_id=group_id,
+                                              payload=encoded)
+
+    async def broadcast(self, data=None, meta: dict={}):
+        """
+        Send the object data to all units with one transmission.
+        The receivers find Radio.BROADCAST_ID in data["group"].
+        :param data:
+        :param meta: dict additional meta information for transmission
+        :return: bool
+        """
+        assert data is not None, "data has to be given"
+
+        logger.info("broadcasting some data")
+        counter, encoded = self._encode_transmission(
+            data=data, meta=meta, group=self._radio.BROADCAST_ID)
+        return await self._transmit_fragments(counter,
+                                              self._radio.send_broadcast_SDM,
+                                              self._radio.send_broadcast_LDM,
+                                              payload=encoded)
+
+    async def request(self, target_id: bytes = None, data=None,
+                      meta: dict={}, timeout: float = 60.):
+        """
+        Send the object data to the target receiver and wait for its reply.
+        The target answers with the handler registered for the trigger of
+        the request, see register_handler. The reply resolves this call
+        directly, it never shows up in a target or listener queue.
+        :param target_id: bytes
+        :param data:
+        :param meta: dict additional meta information for transmission, the
+        trigger selects the handler of the target
+        :param timeout: float seconds to wait for the reply once the radio
+        confirmed the request
+        :return: payload of the reply
+        """
+        assert type(target_id) is bytes and data is not None,\
+            "target or data not set correctly"
+        if len(self._pending) >= self._max_requests:
+            raise RequestFailed(f"{len(self._pending)} requests are waiting "
+                                f"for their reply already")
+
+        self._request_id = (self._request_id + 1) % self.COUNTER_MODULO
+        key = (target_id, self._request_id)
+        future = asyncio.get_event_loop().create_future()
+        # replies may arrive before the radio confirmed the request
+        self._pending[key] = future
+
+        logger.info(f"sending request {self._request_id} to {target_id}")
+        self._stats["requests_sent"] += 1
+        try:
+            if not await self._send(target_id, data, meta,
+                                    fields={"i": f"{self._request_id:x}"}):
+                raise RequestFailed(f"request {key[1]} to {target_id} was "
+                                    f"not confirmed")
+            reply = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._stats["request_timeouts"] += 1
+            raise RequestTimeout(f"no reply to request {key[1]} from "
+                                 f"{target_id} within {timeout}s") from None
+        finally:
+            self._pending.pop(key, None)
+
+        error = reply["meta"].get("error")
+        if error is not None:
+            raise RequestFailed(f"{target_id} could not answer request "
+                                f"{key[1]}: {error}")
+        return reply["payload"]
+
+    def register_handler(self, handler, trigger: str = None):
+        """
+        Answer the requests with the given trigger. The handler is called
+        with the sender id, the payload and the meta information of the
+        request and returns the payload of the reply, it may be a coroutine
+        function. Exceptions raised by the handler are sent back and raised
+        as RequestFailed by the requester.
+        :param handler: callable
+        :param trigger: str or None for requests without trigger
+        :return: the handler
+        """
+        assert callable(handler), "handler has to be callable"
+        self._handlers[trigger] = handler
+        return handler
+
+    def unregister_handler(self, trigger: str = None):
+        """
+        Stop answering the requests with the given trigger.
+        :param trigger: str or None for requests without trigger
+        :return:
+        """
+        self._handlers.pop(trigger, None)
+
+    async def send_status(self, target_id: bytes = None, state=None):
+        """
+        Send a registered state as status message to the target receiver.
+        :param target_id: bytes
+        :param state: registered state, see register_status
+        :return: bool
+        """
+        assert type(target_id) is bytes, "target has to be bytes"
+
+        logger.info(f"sending status {state} to {target_id}")
+        return await self._transmit_status(self._radio.send_status,
+                                           target_id=target_id,
+                                           status=self._encode_status(state))
+
+    async def send_group_status(self, group_id: bytes = None, state=None):
+        """
+        Send a registered state as status message to all units of a group.
+        :param group_id: bytes
+        :param state: registered state, see register_status
+        :return: bool
+        """
+        assert type(group_id) is bytes, "group has to be bytes"
+
+        logger.info(f"sending status {state} to group {group_id}")
+        return await self._transmit_status(self._radio.send_group_status,
+                                           group_id=group_id,
+                                           status=self._encode_status(state))
+
+    async def broadcast_status(self, state=None):
+        """
+        Send a registered state as status message to all units.
+        :param state: registered state, see register_status
+        :return: bool
+        """
+        logger.info(f"broadcasting status {state}")
+        return await self._transmit_status(self._radio.send_broadcast_status,
+                                           status=self._encode_status(state))
+
+    def _encode_status(self, state) -> bytes:
+        # check if backend is still running
+        if self.is_destroyed.done():
+            logger.exception("aborting send because backend was stopped")
+            raise DeviceNotFound
+
+        try:
+            return self._status_registry.encode(state)
+        except ValueError as e:
+            raise SenderException(str(e))
+
+    async def _transmit_status(self, radio_send, **kwargs):
+        """
+        Hand a status to one of the radio status send methods.
+        :param radio_send: coroutine function of Radio sending a status
+        :param kwargs: passed to the send function
+        :return: bool
+        """
+        async with self.COM_LOCK:
+            try:
+                result = await radio_send(**kwargs)
+            except ConfirmationTimeout:
+                result = False
+
+        if result:
+            self._stats["statuses_sent"] += 1
+        else:
+            self._stats["statuses_failed"] += 1
+        logger.info(f"status {kwargs['status']} "
+                    f"{'succeed' if result else 'failed'}")
+        return result
+
+    def _encode_transmission(self, data, meta: dict, group: bytes = None,
+                             link: bytes = None, flags: int = 0,
+                             fields: dict = None):
+        """
+        Tag the data with the transmission counter and meta information and
+        pickle it.
+        :param data:
+        :param meta: dict
+        :param group: bytes group id for group transmissions
+        :param link: bytes target id, the body is compressed as part of the
+        stream to this target if stream compression is enabled and the trace
+        echoes the last transmission of the target
+        :param flags: int header flags, see Header
+        :param fields: dict additional header fields
+        :return: (int, bytes) counter and encoded transmission
+        """
         # check if backend is still running
         if self.is_destroyed.done():
             logger.exception("aborting send because backend was stopped")
             raise DeviceNotFound
 
         # increase transmission counter
-        self._counter += 1
-        logger.info(
-            f"sending some data to {target_id} with counter {self._counter}"
-        )
-
-        # add some meta data to our payload
-        data = {
-            "counter":  self._counter,
-            "meta":     meta,
-            "payload":  data,
-        }
+        self._counter = (self._counter + 1) % self.COUNTER_MODULO
+
+        # routing information goes into the uncompressed header
+        fields = {} if fields is None else dict(fields)
+        trigger = meta.get("trigger")
+        if type(trigger) is str:
+            fields["t"] = trigger
+        elif trigger is not None:
+            # the header only carries string triggers
+            flags |= Header.FLAG_META_TRIGGER
+        if group is not None:
+            fields["g"] = group.decode()
+        if self._tracer is not None:
+            fields.update(self._tracer.fields(link))
+        if self._reorder is not None and "i" not in fields:
+            # transmissions to other units do not leave gaps, requests and
+            # replies are not queued and need no order
+            scope = link if link is not None else group
+            sequence = self._link_sequences.get(scope, 0)
+            self._link_sequences[scope] = (sequence + 1) % self.COUNTER_MODULO
+            fields["n"] = f"{sequence:x}"
+        header = Header(flags=flags,
+                        counter=self._counter,
+                        session=self._session,
+                        fields=fields)
+
+        # the remaining meta data and the payload form the body
+        if "t" in fields:
+            meta = {key: value for key, value in meta.items()
+                    if key != "trigger"}
+        if not meta and type(data) is dict:
+            header.flags |= Header.FLAG_BARE
+            body = data
+        else:
+            body = {
+                "meta":     meta,
+                "payload":  data,
+            }
+
+        try:
+            encoded = self._pickle_transmission(header, body, link)
+        except Exception:
+            if "n" in fields:
+                # the transmission never goes on air, the receiver must not
+                # wait for its number
+                self._link_sequences[scope] = sequence
+            raise
+        return self._counter, encoded
 
+    def _pickle_transmission(self, header: Header, body, link: bytes = None):
+        """
+        Encode header and body of a transmission, see _encode_transmission.
+        :param header: Header
+        :param body: object forming the body
+        :param link: bytes target id of a compressed stream
+        :return: bytes encoded transmission
+        """
         # data pickling
-        encoded = self.pickle(data=data)
+        if link is not None and self._stream_compressor is not None:
+            sequence, reset, compressed = self._stream_compressor.compress(
+                link, self._packer.pack(data=body))
+            header.flags |= Header.FLAG_STREAM
+            if reset:
+                header.flags |= Header.FLAG_RESET
+            header.fields["s"] = f"{sequence:x}"
+            try:
+                encoded = header.encode()
+            except SenderException:
+                # the receiver will never see this part of the stream
+                self._reset_stream(link)
+                raise
+            encoded += self._encoder.encode(data=compressed)
+        else:
+            encoded = header.encode()
+            try:
+                encoded += self._codec.pickle_within(
+                    body, self._max_transmission - len(encoded))
+            except PayloadTooLarge as e:
+                raise PayloadTooLarge(
+                    f"payload of transmission {self._counter} {e}",
+                    excess=e.excess) from None
 
         # now check size
-        if len(encoded) > self._radio.MAXSIZE:
+        if len(encoded) > self._max_transmission:
+            # the receiver will never see this part of the stream
+            self._reset_stream(link)
             raise PayloadTooLarge(
-                f"payload length {len(encoded)}>{self._radio.MAXSIZE}"
+                f"payload length {len(encoded)}>{self._max_transmission}"
             )
 
+        return encoded
+
+    def _reset_stream(self, target_id: bytes):
+        """
+        Start a new compressed stream with the next transmission to a target,
+        e.g. because the target possibly missed the last one.
+        :param target_id: bytes
+        :return:
+        """
+        if self._stream_compressor is None or target_id is None:
+            return
+        logger.info(f"resetting the compressed stream to {target_id}")
+        self._stream_compressor.reset(target_id)
+        self._stats["stream_resets"] += 1
+
+    def _request_resync(self, remote_id: bytes):
+        """
+        Ask a sender to start a new compressed stream.
+        Requests are repeated at most every RESYNC_INTERVAL seconds.
+        :param remote_id: bytes
+        :return:
+        """
+        now = time.monotonic()
+        last = self._resync_requested.get(remote_id)
+        if last is not None and now - last < self.RESYNC_INTERVAL:
+            return
+        self._resync_requested[remote_id] = now
+        self._stats["stream_resyncs"] += 1
+
+        task = asyncio.get_event_loop().create_task(
+            self._send_control(remote_id, self.CONTROL_RESYNC))
+        self._control_tasks.add(task)
+        task.add_done_callback(self._control_tasks.discard)
+
+    async def _send_control(self, target_id: bytes, control: str):
+        """
+        Send a control transmission, it consists of a header only.
+        :param target_id: bytes
+        :param control: str kind of the control transmission
+        :return: bool
+        """
+        header = Header(flags=Header.FLAG_CONTROL,
+                        session=self._session,
+                        fields={"c": control})
+        try:
+            return await self._transmit(0,
+                                        self._radio.send_SDM,
+                                        self._radio.send_LDM,
+                                        target_id=target_id,
+                                        payload=header.encode())
+        except RadioException as e:
+            logger.warning(f"control transmission to {target_id} failed "
+                           f"{repr(e)}")
+            return False
+
+    def _handle_control(self, remote_id: bytes, header: Header):
+        """
+        React to a control transmission of another communicator.
+        :param remote_id: bytes
+        :param header: Header
+        :return:
+        """
+        if header.control == self.CONTROL_RESYNC:
+            logger.info(f"{remote_id} asked for a new compressed stream")
+            self._reset_stream(remote_id)
+        else:
+            logger.warning(f"unknown control transmission {header.control} "
+                           f"from {remote_id}")
+
+    def _inflate(self, remote_id: bytes, header: Header, body: bytes):
+        """
+        Decompress the body of a transmission which is part of a compressed
+        stream. This has to happen in the order of reception.
+        :param remote_id: bytes
+        :param header: Header
+        :param body: bytes
+        :return: bytes packed body or None if it can not be decompressed
+        """
+        try:
+            packed = self._stream_decompressor.decompress(
+                remote_id,
+                self._encoder.decode(enc=body),
+                header.sequence,
+                reset=bool(header.flags & Header.FLAG_RESET),
+                session=header.session,
+                counter=header.counter)
+        except StreamOutOfSync as e:
+            logger.warning(f"dropping transmission {header.counter} from "
+                           f"{remote_id}: {e}")
+            # the stream misses at least the transmission before this one
+            self._links.received(remote_id, lost=1)
+            self._request_resync(remote_id)
+            return None
+
+        if header.flags & Header.FLAG_RESET:
+            self._resync_requested.pop(remote_id, None)
+        return packed
+
+    @property
+    def _max_transmission(self) -> int:
+        # largest encoded transmission accepted by the send methods
+        if self._fec_redundancy is None:
+            return self._radio.MAXSIZE
+        return self._radio.MAXSIZE * self.MAX_FRAGMENTS
+
+    def _fragment(self, encoded: bytes, size: int):
+        """
+        Split a transmission into fragments with parity, see nexedge.fec.
+        Every fragment is a transmission of its own with the header of the
+        original transmission, the fragment flag and field and a base64
+        encoded piece of the body.
+        :param encoded: bytes transmission
+        :param size: int maximum size of a fragment transmission
+        :return: (int, list of bytes) number of data fragments and the
+        fragment transmissions, the parity fragments come last
+        """
+        header, offset = Header.locate(encoded)
+        body = self._encoder.decode(enc=encoded[offset:])
+        fields = dict(header.fields)
+        # the widest fragment field possible
+        fields["f"] = f"ff:ff:ff:{len(body):x}"
+        widest = len(Header(header.flags, header.counter, header.session,
+                            fields).encode())
+        capacity = (size - widest) // 4 * 3
+        if capacity <= 0 or -(-len(body) // capacity) > self.MAX_FRAGMENTS:
+            # a poor link gets fewer but larger fragments rather than none
+            capacity = (self._radio.MAXSIZE - widest) // 4 * 3
+        k = -(-len(body) // max(capacity, 1))
+        if capacity <= 0 or k > self.MAX_FRAGMENTS:
+            raise PayloadTooLarge(f"payload length {len(encoded)} needs more "
+                                  f"than {self.MAX_FRAGMENTS} fragments")
+        m = min(math.ceil(k * self._fec_redundancy), 256 - k)
+
+        data = split(body, k)
+        fragments = []
+        for index, fragment in enumerate(
+                data + erasure_code(k, m).encode(data)):
+            fields["f"] = f"{index:x}:{k:x}:{m:x}:{len(body):x}"
+            fragment_header = Header(header.flags | Header.FLAG_FRAGMENT,
+                                     header.counter, header.session,
+                                     dict(fields))
+            fragments.append(fragment_header.encode() +
+                             self._encoder.encode(data=fragment))
+        return k, fragments
+
+    async def _transmit_fragments(self, counter: int, sdm_send, ldm_send,
+                                  **kwargs):
+        """
+        Like _transmit, but transmissions larger than the recommended
+        payload size of the link are split into fragments if forward error
+        correction is enabled. All fragments are sent, lost ones are not
+        repeated.
+        :param counter: int transmission counter, only for logging
+        :param sdm_send: coroutine function of Radio sending a SDM
+        :param ldm_send: coroutine function of Radio sending a LDM
+        :param kwargs: passed to the send function, contains the payload
+        :return: bool True if at least as many fragments as needed to
+        rebuild the transmission were confirmed
+        """
+        encoded = kwargs["payload"]
+        size = self.recommended_payload_size(kwargs.get("target_id"))
+        if self._fec_redundancy is None or len(encoded) <= size:
+            return await self._transmit(counter, sdm_send, ldm_send, **kwargs)
+
+        k, fragments = self._fragment(encoded, size)
+        logger.info(f"sending transmission {counter} as {k} fragments and "
+                    f"{len(fragments) - k} parity fragments")
+        confirmed = 0
+        # no other transmission may come in between, a compressed stream
+        # continuing this one would be received before its end
+        async with self.COM_LOCK:
+            for fragment in fragments:
+                kwargs["payload"] = fragment
+                self._stats["fragments_sent"] += 1
+                if await self._transmit(counter, sdm_send, ldm_send,
+                                        locked=True, **kwargs):
+                    confirmed += 1
+        return confirmed >= k
+
+    def _reassemble(self, remote_id: bytes, header: Header, body):
+        """
+        Collect a received fragment.
+        :param remote_id: bytes
+        :param header: Header of the fragment
+        :param body: bytes base64 encoded fragment
+        :return: (Header, bytes) header and encoded body of the rebuilt
+        transmission or (None, None) if fragments are still missing
+        """
+        self._stats["fragments_received"] += 1
+        try:
+            index, k, m, length = header.fragment
+            rebuilt = self._fragments.add(
+                (remote_id, header.session, header.counter), index, k, m,
+                length, self._encoder.decode(enc=body))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"dropping broken fragment of {header.counter} "
+                           f"from {remote_id}: {e!r}")
+            self._stats["undecodable"] += 1
+            return None, None
+        if rebuilt is None:
+            return None, None
+
+        logger.info(f"rebuilt transmission {header.counter} of {remote_id} "
+                    f"from its fragments")
+        fields = dict(header.fields)
+        del fields["f"]
+        return (Header(header.flags & ~Header.FLAG_FRAGMENT, header.counter,
+                       header.session, fields),
+                self._encoder.encode(data=rebuilt))
+
+    async def _transmit(self, counter: int, sdm_send, ldm_send,
+                        locked: bool = False, **kwargs):
+        """
+        Hand an encoded transmission to one of the radio send methods.
+        Payloads fitting into a short data message are sent as SDM which
+        saves the setup overhead of a LDM.
+        :param counter: int transmission counter, only for logging
+        :param sdm_send: coroutine function of Radio sending a SDM
+        :param ldm_send: coroutine function of Radio sending a LDM
+        :param locked: bool the caller already holds COM_LOCK
+        :param kwargs: passed to the send function, contains the payload
+        :return: bool
+        """
+        if len(kwargs["payload"]) <= self._radio.SDM_MAXSIZE:
+            path, radio_send = "sdm", sdm_send
+        else:
+            path, radio_send = "ldm", ldm_send
+        logger.info(f"transmitting {counter} as {path.upper()}")
+        if hooks.active:
+            hooks.emit(hooks.SEND_QUEUED, self, counter=counter, path=path,
+                       payload=kwargs["payload"])
+
         # actually sending something
         # actual sending is done in a lock
-        async with RadioCommunicator.COM_LOCK:
-            # if True:
-            try:
-                t_result = await self._radio.send_LDM(target_id=target_id,
-                                                      payload=encoded)
-            except ConfirmationTimeout:
-                t_result = False
+        if locked:
+            t_result = await self._send_locked(counter, path, radio_send,
+                                               **kwargs)
+        else:
+            async with self.COM_LOCK:
+                t_result = await self._send_locked(counter, path, radio_send,
+                                                   **kwargs)
 
+        self._stats["sent"] += 1
+        if hooks.active:
+            hooks.emit(hooks.SEND_CONFIRMED, self, counter=counter, path=path,
+                       result=t_result)
         if t_result:
-            logger.info(f"transmission {self._counter} succeed")
+            logger.info(f"transmission {counter} succeed")
         else:
-            logger.info(f"transmission {self._counter} failed")
+            logger.info(f"transmission {counter} failed")
         return t_result
 
         """
@@ -201,7 +1036,7 @@ class RadioCommunicator:
             )
 
             await asyncio.sleep(dt)
-            with (await RadioCommunicator.COM_LOCK):
+            with (await self.COM_LOCK):
                 t_result = await self._radio.send_LDM(target_id=target_id,
                                                       payload=encoded)
             if t_result:
@@ -211,6 +1046,35 @@ class RadioCommunicator:
         raise SendMaxRetries
         """
 
+    async def _send_locked(self, counter: int, path: str, radio_send,
+                           **kwargs):
+        """
+        Send a transmission while holding COM_LOCK and track its latency
+        and the quality of the link.
+        :param counter: int transmission counter, only for logging
+        :param path: str "sdm" or "ldm"
+        :param radio_send: coroutine function of Radio
+        :param kwargs: passed to the send function, contains the payload
+        :return: bool
+        """
+        if self._tracer is not None:
+            kwargs["payload"] = self._tracer.stamp_enqueued(kwargs["payload"])
+        if hooks.active:
+            hooks.emit(hooks.SEND_STARTED, self, counter=counter, path=path,
+                       payload=kwargs["payload"])
+        started = time.monotonic()
+        self._radio.last_confirmation_delay = None
+        try:
+            t_result = await radio_send(**kwargs)
+        except ConfirmationTimeout:
+            t_result = False
+        self._latency[path].add(time.monotonic() - started)
+        target_id = kwargs.get("target_id")
+        if target_id is not None:
+            self._links.sent(target_id, bool(t_result),
+                             self._radio.last_confirmation_delay)
+        return t_result
+
     def get_target_queue(self, target: bytes = None) -> asyncio.Queue:
         """
         Getter method to retrieve a incoming data queue for a certain receiver.
@@ -244,6 +1108,61 @@ class RadioCommunicator:
         # return said queue
         return self._listener_queues[trigger]
 
+    def subscribe_status(self, states=None) -> asyncio.Queue:
+        """
+        Subscribe to received status messages.
+        Every subscription gets its own queue of Inbound records which
+        unpack to remote_id, state.
+        :param states: iterable of registered states to receive, None for
+        all of them
+        :return: asyncio.Queue
+        """
+        if states is not None:
+            states = frozenset(states)
+            for state in states:
+                assert state in self._status_registry,\
+                    f"state {state} is not registered"
+
+        queue = asyncio.Queue()
+        self._status_subscriptions.append((queue, states))
+        return queue
+
+    def unsubscribe_status(self, queue: asyncio.Queue):
+        """
+        Cancel a subscription of subscribe_status.
+        :param queue: asyncio.Queue
+        :return:
+        """
+        self._status_subscriptions = [
+            subscription for subscription in self._status_subscriptions
+            if subscription[0] is not queue]
+
+    async def status_handler(self):
+        """
+        Decode the received status messages and hand them to the
+        subscriptions. Statuses nobody subscribed to are dropped.
+        """
+        logger.info("starting status_handler in communicator")
+        while True:
+            record = await self._radio.status_queue.get()
+            if type(record) is not Inbound:
+                record = Inbound(*record, kind=Inbound.STATUS)
+            self._stats["statuses_received"] += 1
+
+            state = self._status_registry.decode(record.body)
+            if state is None:
+                logger.warning(f"unknown status {record.body} from "
+                               f"{record.sender}")
+                self._stats["unknown_statuses"] += 1
+                continue
+
+            # all subscriptions share the record
+            record.data = state
+            record.release()
+            for queue, states in self._status_subscriptions:
+                if states is None or state in states:
+                    queue.put_nowait(record)
+
     def start_data_handler(self):
         """
         Returns data_handler or starts it.
@@ -266,31 +1185,325 @@ class RadioCommunicator:
         listener queue
         """
         logger.info("starting data_handler in communicator")
+        data_queue = self._radio.data_queue
         while True:
-            remote_id, encoded = await self._radio.data_queue.get()
-            data = self.unpickle(encoded=encoded)
+            batch = [await data_queue.get()]
+            # after a reconnect or a burst drain everything that is pending
+            while len(batch) < self.DRAIN_BATCH and not data_queue.empty():
+                batch.append(data_queue.get_nowait())
+            self._stats["received"] += len(batch)
 
-            # get the meta information
-            meta = data["meta"]
+            for record, header, body, offset in await self._decode_batch(
+                    batch):
+                self._route(record, header, body, offset)
 
-            # look for trigger in data meta informations
-            if "trigger" in meta:
-                logger.debug("found meta key trigger")
-                trigger = meta["trigger"]
-                try:
-                    logger.debug(f"adding data to listener queue {trigger}")
-                    self._listener_queues[trigger].put_nowait([remote_id,
-                                                               data])
+    async def _decode_batch(self, batch):
+        """
+        Split the headers off a batch of received transmissions.
+        Transmissions without header are decoded as a whole, all of them at
+        once, the result is stored in the data of their record.
+        :param batch: list of Inbound or (remote_id, encoded) pairs
+        :return: list of (Inbound, header, body, offset) where the body
+        starts at offset, the body of compressed streams is already
+        decompressed
+        """
+        results = []
+        legacy = []
+        for record in batch:
+            if type(record) is not Inbound:
+                record = Inbound(*record)
+
+            # only the header is needed for routing
+            try:
+                header, offset = Header.locate(record.frame, record.offset)
+            except ValueError as e:
+                logger.warning(f"dropping transmission with broken header "
+                               f"from {record.sender}: {e!r}")
+                self._stats["undecodable"] += 1
+                continue
+            body = record.frame
+            if header is not None and header.flags & Header.FLAG_FRAGMENT:
+                header, body = self._reassemble(
+                    record.sender, header, memoryview(body)[offset:])
+                if header is None:
                     continue
-                except KeyError:
-                    logger.warning(
-                        f"encountered unknown trigger for listener {trigger}"
-                    )
+                offset = 0
+            if header is not None and header.flags & Header.FLAG_STREAM:
+                # streams can not wait for the consumer
+                body = self._inflate(record.sender, header,
+                                     memoryview(body)[offset:])
+                if body is None:
                     continue
+                offset = 0
+            results.append((record, header, body, offset))
+            if header is None:
+                legacy.append(record)
+
+        if not legacy:
+            return results
 
+        encoded = [record.body for record in legacy]
+        try:
+            if self._executor is not None and len(encoded) > 1:
+                decoded = await asyncio.get_event_loop().run_in_executor(
+                    self._executor, self.unpickle_many, encoded)
+            else:
+                decoded = self.unpickle_many(encoded)
+        except Exception:
+            # decode one by one to drop only the broken ones
+            decoded = []
+            for record in legacy:
+                try:
+                    decoded.append(self.unpickle(encoded=record.body))
+                except Exception:
+                    logger.exception(f"could not decode transmission from "
+                                     f"{record.sender}")
+                    self._stats["undecodable"] += 1
+                    decoded.append(None)
+
+        for record, data in zip(legacy, decoded):
+            record.data = data
+        return [result for result in results
+                if result[1] is not None or result[0].data is not None]
+
+    def _route(self, record: Inbound, header: Header, body: bytes,
+               offset: int = 0):
+        """
+        Put a received transmission into its target or listener queue.
+        :param record: Inbound, its data is set for transmissions without
+        header
+        :param header: Header or None for transmissions without header
+        :param body: bytes
+        :param offset: int start of the body
+        :return:
+        """
+        remote_id = record.sender
+        if header is None:
+            data = record.data
+            counter = data["counter"]
+            session = data.get("session")
+            trigger = data["meta"].get("trigger")
+        elif header.flags & Header.FLAG_CONTROL:
+            self._handle_control(remote_id, header)
+            return
+        else:
+            counter = header.counter
+            session = header.session
+            trigger = header.trigger
+            if header.flags & Header.FLAG_META_TRIGGER:
+                try:
+                    record.data = self._message(header, body, offset)
+                    trigger = record.data["meta"].get("trigger")
+                except Exception:
+                    logger.exception(f"could not decode transmission from "
+                                     f"{remote_id}")
+                    self._stats["undecodable"] += 1
+                    return
+
+        # drop transmissions we already got
+        if self._dedupe is not None and self._dedupe.is_duplicate(
+                remote_id, counter, session):
+            logger.info(f"dropping duplicate {counter} from {remote_id}")
+            self._stats["duplicates"] += 1
+            return
+
+        # requests and replies bypass the queues
+        if header is not None and "i" in header.fields:
+            self._handle_request(record, header, body, offset)
+            return
+
+        # deliver the transmissions of a link in the order they were sent
+        if self._reorder is not None and header is not None and\
+                "n" in header.fields:
+            released = self._reorder.push(
+                (remote_id, header.fields.get("g")),
+                int(header.fields["n"], 16),
+                (record, header, body, offset, trigger),
+                session=session)
+            self._deliver_released(released)
+            self._schedule_reorder()
+            return
+
+        self._deliver(record, header, body, offset, trigger)
+
+    def _deliver(self, record: Inbound, header: Header, body: bytes,
+                 offset: int, trigger, loss: Loss = None):
+        """
+        Put a received transmission into the queue of its trigger or sender.
+        :param record: Inbound
+        :param header: Header or None for transmissions without header
+        :param body: bytes
+        :param offset: int start of the body
+        :param trigger: trigger of the transmission or None
+        :param loss: Loss of the transmissions of the link right before this
+        one, put into the queue in front of it
+        :return:
+        """
+        remote_id = record.sender
+        # look for trigger in data meta informations
+        if trigger is not None:
+            logger.debug("found meta key trigger")
+            queue = self._listener_queues.get(trigger)
+            if queue is None:
+                logger.warning(
+                    f"encountered unknown trigger for listener {trigger}"
+                )
+                self._stats["unknown_triggers"] += 1
+                return
+            logger.debug("adding data to listener queue %s", trigger)
+        else:
             # well there was no trigger, lets continue
             queue = self.get_target_queue(target=remote_id)
+            logger.debug("putting data into %s queue", remote_id)
+
+        if self._tracer is not None and header is not None:
+            record.trace = self._tracer.observe(remote_id, header.fields,
+                                                record.received)
+
+        # the body is decoded when the consumer accesses it
+        if header is not None and record.data is None:
+            record.data = self._message(header, body, offset)
+        # the data holds everything still needed
+        record.release()
+
+        self._links.received(remote_id, 0 if loss is None else loss.count)
+
+        # put it into the data queue
+        if loss is not None:
+            queue.put_nowait(Inbound(remote_id, None, Inbound.LOSS,
+                                     received=record.received, data=loss))
+        queue.put_nowait(record)
+        if hooks.active:
+            hooks.emit(hooks.MESSAGE_ROUTED, self, record=record,
+                       header=header, queue=queue)
+
+    def _message(self, header: Header, body: bytes, offset: int = 0):
+        """
+        Wrap a received transmission into a lazily decoded Message.
+        :param header: Header
+        :param body: bytes
+        :param offset: int start of the body
+        :return: Message
+        """
+        if header.flags & Header.FLAG_STREAM:
+            return Message(header, body, self._packer.unpack)
+        return Message(header, body, self.unpickle, offset)
+
+    def _handle_request(self, record: Inbound, header: Header, body: bytes,
+                        offset: int):
+        """
+        Resolve the pending request a reply answers or answer a received
+        request with its handler.
+        :param record: Inbound
+        :param header: Header with the correlation id
+        :param body: bytes
+        :param offset: int start of the body
+        :return:
+        """
+        remote_id = record.sender
+        message = self._message(header, body, offset)
+        record.release()
+        self._links.received(remote_id)
+
+        if header.flags & Header.FLAG_REPLY:
+            future = self._pending.get((remote_id, header.request))
+            if future is None or future.done():
+                logger.info(f"dropping late reply to request "
+                            f"{header.request} from {remote_id}")
+                self._stats["late_replies"] += 1
+                return
+            future.set_result(message)
+            return
+
+        self._stats["requests_received"] += 1
+        if len(self._handler_tasks) >= self._max_requests:
+            # no reply either, answering a flood would occupy the channel
+            logger.warning(f"too many requests, dropping {header.request} "
+                           f"from {remote_id}")
+            self._stats["unhandled_requests"] += 1
+            return
+
+        handler = self._handlers.get(header.trigger)
+        if handler is None:
+            logger.warning(f"no handler for request {header.request} from "
+                           f"{remote_id} with trigger {header.trigger}")
+            self._stats["unhandled_requests"] += 1
+            error = f"no handler for trigger {header.trigger}"
+        else:
+            error = None
+
+        task = asyncio.get_event_loop().create_task(
+            self._answer(remote_id, header.request, handler, message, error))
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+
+    async def _answer(self, remote_id: bytes, request_id: int, handler,
+                      message: Message, error: str = None):
+        """
+        Call the handler of a request and send its result back.
+        :param remote_id: bytes
+        :param request_id: int correlation id
+        :param handler: callable, see register_handler
+        :param message: Message of the request
+        :param error: str reason to reject the request without calling the
+        handler
+        :return:
+        """
+        reply = None
+        if error is None:
+            try:
+                data = message.data
+                reply = handler(remote_id, data["payload"], data["meta"])
+                if asyncio.iscoroutine(reply):
+                    reply = await reply
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"handler of request {request_id} from "
+                                 f"{remote_id} failed")
+                reply = None
+                error = repr(e)
+
+        try:
+            await self._send(remote_id, reply,
+                             {} if error is None else {"error": error},
+                             flags=Header.FLAG_REPLY,
+                             fields={"i": f"{request_id:x}"})
+        except RadioException as e:
+            logger.warning(f"reply to request {request_id} of {remote_id} "
+                           f"failed {repr(e)}")
+
+    def _deliver_released(self, released: list):
+        """
+        Deliver the entries released by the reorder buffer.
+        :param released: list of transmissions and Loss entries
+        :return:
+        """
+        loss = None
+        for entry in released:
+            if type(entry) is Loss:
+                loss = entry
+                continue
+            self._deliver(*entry, loss=loss)
+            loss = None
+
+    def _schedule_reorder(self):
+        """
+        Make sure the reorder buffer is checked once the oldest held
+        transmission has waited long enough.
+        :return:
+        """
+        if self._reorder_timer is not None:
+            return
+        deadline = self._reorder.next_deadline()
+        if deadline is None:
+            return
+        self._reorder_timer = asyncio.get_event_loop().call_later(
+            max(deadline - time.monotonic(), 0), self._expire_reorder)
 
-            # put it into the data queue
-            logger.debug(f"putting data into {remote_id} queue")
-            queue.put_nowait([remote_id, data])
+    def _expire_reorder(self):
+        self._reorder_timer = None
+        for link, released in self._reorder.expire():
+            logger.info(f"giving up waiting for transmissions of {link}")
+            self._deliver_released(released)
+        self._schedule_reorder()
@@ -1,5 +1,9 @@
 import logging
 import zlib
+from collections import OrderedDict
+
+# local imports
+from .exceptions import StreamOutOfSync, PayloadTooLarge
 
 # setup logging
 logger = logging.getLogger(__name__)
@@ -25,6 +29,42 @@ class Compressor:
     def decompress(self, enc: bytes=None) -> bytes:
         raise NotImplementedError
 
+    def compress_within(self, data: bytes, limit: int, size=None) -> bytes:
+        """
+        Compress the data, but fail if the result exceeds a size limit.
+        Implementations may give up before all data is compressed.
+        :param data: bytes
+        :param limit: int maximum size of the result
+        :param size: function mapping the compressed length to the length
+        the limit applies to, e.g. after encoding, defaults to identity
+        :return: bytes
+        :raises PayloadTooLarge: with the (estimated) excess
+        """
+        compressed = self.compress(data)
+        final = len(compressed) if size is None else size(len(compressed))
+        if final > limit:
+            raise PayloadTooLarge(f"payload too large by {final - limit} "
+                                  f"bytes", excess=final - limit)
+        return compressed
+
+    def compress_many(self, items) -> list:
+        """
+        Compress a sequence of byte strings, each one on its own.
+        :param items: iterable of bytes
+        :return: list of bytes
+        """
+        compress = self.compress
+        return [compress(data) for data in items]
+
+    def decompress_many(self, items) -> list:
+        """
+        Reverse compress_many.
+        :param items: iterable of bytes
+        :return: list of bytes
+        """
+        decompress = self.decompress
+        return [decompress(comp) for comp in items]
+
 
 class ZCompressor(Compressor):
     """
@@ -38,3 +78,236 @@ class ZCompressor(Compressor):
     def decompress(self, comp: bytes=None):
         assert type(comp) is bytes, "compressed data has to be given as bytes"
         return zlib.decompress(comp)
+
+    # input fed to the compressor at once while watching a size limit
+    BUDGET_CHUNK = 4096
+
+    @staticmethod
+    def bound(length: int) -> int:
+        """
+        Upper bound of the compressed size of `length` bytes, like
+        compressBound() of zlib.
+        :param length: int
+        :return: int
+        """
+        return length + (length >> 12) + (length >> 14) + (length >> 25) + 13
+
+    def compress_within(self, data: bytes, limit: int, size=None) -> bytes:
+        """
+        See Compressor.compress_within.
+        Data which fits even uncompressible is compressed in one go. Anything
+        else is streamed through a compressor and given up on as soon as the
+        output emitted so far exceeds the limit, the excess is then projected
+        from the ratio reached so far. The output of a compressor lags behind
+        its input by up to one deflate block, so the estimate is rather too
+        small than too large.
+        """
+        assert type(data) is bytes, "data has to be given as bytes"
+        if size is None:
+            def size(length):
+                return length
+        if size(self.bound(len(data))) <= limit:
+            return zlib.compress(data, 9)
+
+        compressor = zlib.compressobj(9)
+        view = memoryview(data)
+        parts = []
+        emitted = 0
+        for start in range(0, len(data), self.BUDGET_CHUNK):
+            part = compressor.compress(view[start:start + self.BUDGET_CHUNK])
+            if not part:
+                continue
+            parts.append(part)
+            emitted += len(part)
+            if size(emitted) > limit:
+                consumed = min(start + self.BUDGET_CHUNK, len(data))
+                excess = size(emitted * len(data) // consumed) - limit
+                raise PayloadTooLarge(
+                    f"payload too large by roughly {excess} bytes, gave up "
+                    f"after {consumed} of {len(data)} bytes", excess=excess)
+        parts.append(compressor.flush())
+
+        compressed = b"".join(parts)
+        if size(len(compressed)) > limit:
+            excess = size(len(compressed)) - limit
+            raise PayloadTooLarge(f"payload too large by {excess} bytes",
+                                  excess=excess)
+        return compressed
+
+
+class StreamCompressor:
+    """
+    Compresses the transmissions to each link (e.g. a target id) as one
+    continuous deflate stream, so repetitive traffic profits from the
+    transmissions sent before.
+
+    Every transmission is terminated with a sync flush, the receiver
+    (StreamDecompressor) can inflate it as soon as it arrives as long as it
+    got all earlier transmissions of the link. The transmissions of a link
+    are numbered for the receiver to detect losses. The first transmission
+    after a (re)start or a reset of the link starts a new stream and is
+    flagged as such.
+
+    Every live context costs about 256KiB with the default settings, the
+    number of contexts is bounded by `max_links`, the least recently used
+    link is reset first.
+    """
+    # every sync flush ends with an empty stored block, it is cut off and
+    # added again by the receiver
+    SYNC_TAIL = b"\x00\x00\xff\xff"
+
+    def __init__(self,
+                 max_links: int = 16,
+                 level: int = 9,
+                 wbits: int = 15,
+                 modulo: int = 2 ** 16):
+        """
+        :param max_links: int number of live compression contexts
+        :param level: int zlib compression level
+        :param wbits: int base two logarithm of the window size, 9 to 15
+        :param modulo: int the sequence numbers wrap at this value
+        """
+        assert max_links > 0, "max_links has to be positive"
+        assert 9 <= wbits <= 15, "wbits has to be between 9 and 15"
+        self.max_links = max_links
+        self.level = level
+        self.wbits = wbits
+        self.modulo = modulo
+
+        # link -> [compressobj, next sequence number]
+        self._links = OrderedDict()
+
+    def __len__(self):
+        return len(self._links)
+
+    def reset(self, link=None):
+        """
+        Start a new stream with the next transmission to one or all links.
+        :param link: link or None for all
+        :return:
+        """
+        if link is None:
+            self._links.clear()
+        else:
+            self._links.pop(link, None)
+
+    def compress(self, link, data: bytes):
+        """
+        Compress the next transmission to a link.
+        :param link: hashable e.g. the target id
+        :param data: bytes
+        :return: (int, bool, bytes) sequence number, whether a new stream
+        starts and the compressed data
+        """
+        assert type(data) is bytes, "data has to be given as bytes"
+        state = self._links.get(link)
+        reset = state is None
+        if reset:
+            # raw deflate, the stream is never finished so there is no use
+            # for the zlib header and checksum
+            state = [zlib.compressobj(self.level, zlib.DEFLATED, -self.wbits),
+                     0]
+            self._links[link] = state
+            if len(self._links) > self.max_links:
+                self._links.popitem(last=False)
+        else:
+            self._links.move_to_end(link)
+
+        compressor, sequence = state
+        compressed = (compressor.compress(data) +
+                      compressor.flush(zlib.Z_SYNC_FLUSH))
+        state[1] = (sequence + 1) % self.modulo
+
+        if compressed.endswith(self.SYNC_TAIL):
+            compressed = compressed[:-len(self.SYNC_TAIL)]
+        return sequence, reset, compressed
+
+
+class StreamDecompressor:
+    """
+    Receiving side of StreamCompressor, keeps one context per sender.
+
+    Transmissions have to be inflated in the order they were sent.
+    A transmission which does not start a new stream and does not follow
+    the previous one of its sender raises StreamOutOfSync, the sender has
+    to be asked to start a new stream.
+    """
+
+    def __init__(self, max_links: int = 16, modulo: int = 2 ** 16):
+        """
+        :param max_links: int number of live decompression contexts
+        :param modulo: int the sequence numbers wrap at this value
+        """
+        assert max_links > 0, "max_links has to be positive"
+        self.max_links = max_links
+        self.modulo = modulo
+
+        # link -> [decompressobj, expected sequence number, session,
+        # counter of the transmission starting the stream]
+        self._links = OrderedDict()
+
+    def __len__(self):
+        return len(self._links)
+
+    def reset(self, link=None):
+        """
+        Forget the context of one or all links.
+        :param link: link or None for all
+        :return:
+        """
+        if link is None:
+            self._links.clear()
+        else:
+            self._links.pop(link, None)
+
+    def decompress(self, link, data: bytes, sequence: int,
+                   reset: bool = False, session=None, counter=None):
+        """
+        Inflate the next transmission of a link.
+        Returns None for a transmission which was already inflated.
+        :param link: hashable e.g. the sender id
+        :param data: bytes
+        :param sequence: int sequence number of the transmission
+        :param reset: bool the transmission starts a new stream
+        :param session: session id of the sender
+        :param counter: transmission counter, tells a repetition of the
+        transmission starting the current stream from a new stream
+        :return: bytes or None
+        """
+        assert type(data) is bytes, "data has to be given as bytes"
+        state = self._links.get(link)
+
+        if reset and state is not None and counter is not None and\
+                state[2:] == [session, counter]:
+            # a late repetition, the stream it started goes on
+            reset = False
+
+        if reset:
+            state = [zlib.decompressobj(-15), sequence, session, counter]
+            self._links[link] = state
+            if len(self._links) > self.max_links:
+                self._links.popitem(last=False)
+        elif state is None:
+            raise StreamOutOfSync(f"no stream context for {link}")
+        elif state[2] != session:
+            self._links.pop(link)
+            raise StreamOutOfSync(f"{link} restarted")
+        else:
+            self._links.move_to_end(link)
+
+        decompressor, expected = state[:2]
+        delta = (sequence - expected) % self.modulo
+        if delta >= self.modulo // 2:
+            # an old transmission, e.g. a retransmission
+            return None
+        if delta:
+            self._links.pop(link)
+            raise StreamOutOfSync(f"lost {delta} transmissions of {link}")
+
+        try:
+            data = decompressor.decompress(data + StreamCompressor.SYNC_TAIL)
+        except zlib.error as e:
+            self._links.pop(link)
+            raise StreamOutOfSync(f"corrupt stream from {link}: {e}")
+        state[1] = (sequence + 1) % self.modulo
+        return data
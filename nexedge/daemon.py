@@ -0,0 +1,258 @@
+import os
+import sys
+import asyncio
+import logging
+import argparse
+
+# local imports
+from .communicator import RadioCommunicator
+from .reorder import Loss
+from .protocol import read_frame, write_frame, pack_body, unpack_body,\
+    SEND, SEND_GROUP, BROADCAST, SUBSCRIBE_TARGET, SUBSCRIBE_LISTENER, STATS,\
+    RESULT, ERROR, MESSAGE
+from .exceptions import *
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+# asyncio.current_task is new in python 3.7
+_current_task = getattr(asyncio, "current_task", None) or\
+    asyncio.Task.current_task
+
+
+class RadioDaemon:
+    """
+    Shares one RadioCommunicator between several processes via a unix domain
+    socket, see nexedge.protocol for the wire format and nexedge.client for
+    the client side.
+
+    All transmissions of all clients go through the one communicator and
+    are scheduled there. Received data of a target or listener queue is
+    delivered to every client which subscribed to it. A client which does
+    not read its data within DRAIN_TIMEOUT seconds is disconnected.
+    """
+    DRAIN_TIMEOUT = 30.
+
+    def __init__(self, com: RadioCommunicator, path: str):
+        """
+        :param com: RadioCommunicator
+        :param path: str path of the unix domain socket
+        """
+        self._com = com
+        self.path = path
+        self._server = None
+
+        # (kind, key) -> set of (writer, request id)
+        self._subscriptions = {}
+        # (kind, key) -> task pumping the communicator queue
+        self._pumps = {}
+        # tasks handling the connected clients
+        self._clients = set()
+        # writer -> lock serializing its drain calls
+        self._drain_locks = {}
+
+    async def start(self):
+        """
+        Start listening on the socket.
+        :return:
+        """
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle_client,
+                                                       path=self.path)
+        logger.info(f"radio daemon listening on {self.path}")
+
+    def close(self):
+        """
+        Stop listening, disconnect all clients and cancel all queue pumps.
+        :return:
+        """
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for task in list(self._pumps.values()) + list(self._clients):
+            task.cancel()
+        self._pumps.clear()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter):
+        logger.info("client connected")
+        client = _current_task()
+        self._clients.add(client)
+        tasks = set()
+        try:
+            while True:
+                try:
+                    opcode, request_id, body = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except ValueError as e:
+                    # the stream can not be resynchronized
+                    logger.warning(f"closing connection, bad frame: {e}")
+                    break
+
+                # requests are handled concurrently, answers may be out of
+                # order
+                task = asyncio.get_event_loop().create_task(
+                    self._handle_request(writer, opcode, request_id, body))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            logger.info("client disconnected")
+            self._clients.discard(client)
+            for task in tasks:
+                task.cancel()
+            for subscribers in self._subscriptions.values():
+                for subscriber in list(subscribers):
+                    if subscriber[0] is writer:
+                        subscribers.discard(subscriber)
+            self._drain_locks.pop(writer, None)
+            writer.close()
+
+    async def _handle_request(self, writer, opcode, request_id, body):
+        try:
+            result = await self._dispatch(writer, opcode, request_id, body)
+        except Exception as e:
+            logger.exception(f"request {opcode:#x} failed")
+            write_frame(writer, ERROR, request_id,
+                        pack_body(data=[type(e).__name__, str(e)]))
+        else:
+            write_frame(writer, RESULT, request_id, pack_body(data=result))
+
+        try:
+            await self._drain(writer)
+        except ConnectionError:
+            pass
+
+    async def _drain(self, writer: asyncio.StreamWriter):
+        """
+        Wait until the write buffer of a client is flushed, concurrent calls
+        for the same writer are serialized.
+        :param writer: asyncio.StreamWriter
+        :return:
+        """
+        lock = self._drain_locks.setdefault(writer, asyncio.Lock())
+        async with lock:
+            await writer.drain()
+
+    async def _dispatch(self, writer, opcode, request_id, body):
+        address, args = unpack_body(body)
+
+        if opcode == SEND:
+            return await self._com.send(target_id=address, data=args["data"],
+                                        meta=args.get("meta", {}))
+
+        if opcode == SEND_GROUP:
+            return await self._com.send_group(group_id=address,
+                                              data=args["data"],
+                                              meta=args.get("meta", {}))
+
+        if opcode == BROADCAST:
+            return await self._com.broadcast(data=args["data"],
+                                             meta=args.get("meta", {}))
+
+        if opcode == SUBSCRIBE_TARGET:
+            self._subscribe(writer, request_id, "target", address)
+            return True
+
+        if opcode == SUBSCRIBE_LISTENER:
+            self._subscribe(writer, request_id, "listener", args)
+            return True
+
+        if opcode == STATS:
+            return self._com.stats
+
+        raise ReceiverException(f"unknown opcode {opcode:#x}")
+
+    def _subscribe(self, writer, request_id, kind, key):
+        if kind == "target":
+            queue = self._com.get_target_queue(target=key)
+        else:
+            queue = self._com.get_listener_queue(key)
+
+        self._subscriptions.setdefault((kind, key), set()).add(
+            (writer, request_id))
+        if (kind, key) not in self._pumps:
+            self._pumps[(kind, key)] = asyncio.get_event_loop().create_task(
+                self._pump(kind, key, queue))
+
+    async def _pump(self, kind, key, queue: asyncio.Queue):
+        """
+        Deliver everything from a communicator queue to the subscribers.
+        Data received while nobody is subscribed is dropped, as well as data
+        which can not be decoded. The next entry is taken from the queue once
+        all subscribers read the current one.
+        """
+        while True:
+            remote_id, data = await queue.get()
+            subscribers = self._subscriptions.get((kind, key))
+            if not subscribers:
+                continue
+
+            if type(data) is Loss:
+                data = {"loss": {"first": data.first, "count": data.count}}
+            try:
+                body = pack_body(remote_id, dict(data))
+            except Exception:
+                logger.exception(f"dropping undecodable transmission from "
+                                 f"{remote_id}")
+                continue
+
+            for subscriber in list(subscribers):
+                writer, request_id = subscriber
+                write_frame(writer, MESSAGE, request_id, body)
+                try:
+                    await asyncio.wait_for(self._drain(writer),
+                                           self.DRAIN_TIMEOUT)
+                except (asyncio.TimeoutError, ConnectionError):
+                    logger.warning(f"disconnecting client which does not "
+                                   f"read its {kind} {key} data")
+                    subscribers.discard(subscriber)
+                    writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="nexedge-daemon",
+        description="Share one nexedge radio between several processes.")
+    parser.add_argument("--url", default="/dev/ttyUSB0",
+                        help="serial port of the radio")
+    parser.add_argument("--baudrate", type=int, default=9600)
+    parser.add_argument("--socket", default="/tmp/nexedge.sock",
+                        help="path of the unix domain socket")
+    parser.add_argument("--listener", action="append", default=[],
+                        help="trigger to set up a listener queue for, "
+                             "can be given several times")
+    parser.add_argument("--timeout", type=int, default=60)
+    parser.add_argument("--capture", default=None,
+                        help="record the serial traffic to this file")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+
+    loop = asyncio.get_event_loop()
+    com = RadioCommunicator(serial_kwargs={"url": args.url,
+                                           "baudrate": args.baudrate},
+                            listeners=args.listener,
+                            timeout=args.timeout,
+                            capture=args.capture)
+    com.start_data_handler()
+
+    daemon = RadioDaemon(com, args.socket)
+    loop.run_until_complete(daemon.start())
+    try:
+        loop.run_until_complete(com.is_destroyed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+        com.destroy()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import logging
+from collections import OrderedDict
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+class DuplicateFilter:
+    """
+    Sliding window duplicate detection for received transmissions.
+
+    Every sender tags its transmissions with a counter (see
+    RadioCommunicator.send). For each sender the highest counter seen so far
+    and a bitmask of the last `window` counters below it is kept, similar to
+    the anti-replay window of IPsec.
+    Counters are compared with serial number arithmetic, so the counter is
+    allowed to wrap at `modulo`.
+
+    A sender restart is detected by a changed session id or, for senders not
+    transmitting a session id, by a counter which lies further behind the
+    highest one than the window reaches. In both cases the state of this
+    sender is reset.
+
+    Memory is bounded by `max_senders`, the least recently seen sender is
+    dropped first.
+    """
+
+    def __init__(self,
+                 window: int = 64,
+                 max_senders: int = 256,
+                 modulo: int = 2 ** 16):
+        """
+        :param window: int number of counters remembered per sender
+        :param max_senders: int number of senders remembered
+        :param modulo: int the counter wraps at this value
+        """
+        assert 0 < window < modulo // 2, "window has to be below modulo/2"
+        self.window = window
+        self.max_senders = max_senders
+        self.modulo = modulo
+
+        # sender -> [session, highest counter, bitmask]
+        self._senders = OrderedDict()
+
+    def __len__(self):
+        return len(self._senders)
+
+    def reset(self, sender=None):
+        """
+        Forget the state of one or all senders.
+        :param sender: bytes or None for all
+        :return:
+        """
+        if sender is None:
+            self._senders.clear()
+        else:
+            self._senders.pop(sender, None)
+
+    def is_duplicate(self, sender: bytes, counter: int, session=None) -> bool:
+        """
+        Register the counter of a received transmission.
+        Returns True if the transmission was already seen before.
+        :param sender: bytes
+        :param counter: int
+        :param session: session id of the sender or None
+        :return: bool
+        """
+        counter %= self.modulo
+        state = self._senders.get(sender)
+
+        if state is None or state[0] != session:
+            # unknown sender or the sender was restarted
+            self._remember(sender, [session, counter, 1])
+            return False
+
+        self._senders.move_to_end(sender)
+        _session, highest, mask = state
+        delta = (counter - highest) % self.modulo
+
+        # same counter as the highest one
+        if delta == 0:
+            return True
+
+        # newer transmission, slide the window
+        if delta < self.modulo // 2:
+            mask = ((mask << delta) | 1) & ((1 << self.window) - 1)
+            state[1] = counter
+            state[2] = mask
+            return False
+
+        # older transmission
+        behind = self.modulo - delta
+        if behind >= self.window:
+            # too old to be known, most likely the sender was restarted
+            logger.debug(f"counter of {sender} jumped back by {behind}, "
+                         f"resetting window")
+            state[1] = counter
+            state[2] = 1
+            return False
+
+        bit = 1 << behind
+        if mask & bit:
+            return True
+
+        state[2] = mask | bit
+        return False
+
+    def _remember(self, sender, state):
+        self._senders[sender] = state
+        self._senders.move_to_end(sender)
+        while len(self._senders) > self.max_senders:
+            self._senders.popitem(last=False)
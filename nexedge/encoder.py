@@ -1,5 +1,6 @@
 import logging
 import base64
+import binascii
 
 # setup logging
 logger = logging.getLogger(__name__)
@@ -27,6 +28,32 @@ class Encoder:
     def decode(self, enc: bytes=None) -> bytes:
         raise NotImplementedError
 
+    def encoded_size(self, length: int) -> int:
+        """
+        Size of the encoding of `length` bytes.
+        :param length: int
+        :return: int
+        """
+        raise NotImplementedError
+
+    def encode_many(self, items) -> list:
+        """
+        Encode a sequence of byte strings.
+        :param items: iterable of bytes
+        :return: list of bytes
+        """
+        encode = self.encode
+        return [encode(data) for data in items]
+
+    def decode_many(self, items) -> list:
+        """
+        Reverse encode_many.
+        :param items: iterable of bytes
+        :return: list of bytes
+        """
+        decode = self.decode
+        return [decode(enc) for enc in items]
+
 
 class B64Encoder(Encoder):
     """
@@ -38,5 +65,18 @@ class B64Encoder(Encoder):
         return base64.b64encode(data)
 
     def decode(self, enc: bytes=None) -> bytes:
-        assert type(enc) is bytes, "encoded data has to be given as bytes"
+        assert isinstance(enc, (bytes, memoryview)),\
+            "encoded data has to be given as bytes"
         return base64.b64decode(enc)
+
+    def encoded_size(self, length: int) -> int:
+        # four characters for every started group of three bytes
+        return (length + 2) // 3 * 4
+
+    def encode_many(self, items) -> list:
+        encode = binascii.b2a_base64
+        return [encode(data, newline=False) for data in items]
+
+    def decode_many(self, items) -> list:
+        decode = binascii.a2b_base64
+        return [decode(enc) for enc in items]
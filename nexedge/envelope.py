@@ -0,0 +1,334 @@
+import re
+import time
+import logging
+from urllib.parse import unquote
+from collections.abc import Mapping
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+# local imports
+from .exceptions import SenderException
+
+
+class Header:
+    """
+    Small uncompressed routing header in front of the encoded body of a
+    transmission.
+
+    The header is plain ascii and looks like
+        #<flags>.<counter>.<session>[.<key>=<value>...]~<body>
+    flags, counter and session are hex encoded integers, the optional fields
+    carry e.g. the trigger ("t"), the group id ("g"), the hex encoded
+    sequence number of a compressed stream ("s"), the kind of a control
+    transmission ("c"), the position of a fragment ("f") and the
+    correlation id of a request or reply ("i").
+    Field values are percent encoded where they contain anything but
+    printable ascii, a separator or "%".
+    Everything needed for routing and duplicate suppression can be read
+    from the header without touching the body.
+
+    Transmissions of older versions start directly with the base64 encoded
+    body, they never contain the header mark.
+    """
+    __slots__ = ("flags", "counter", "session", "fields")
+
+    MARK = b"#"
+    END = b"~"
+    SEP = b"."
+    ASSIGN = b"="
+
+    # the body only contains the payload, there is no further meta data
+    FLAG_BARE = 0x01
+    # the body is part of a compressed stream, see StreamCompressor
+    FLAG_STREAM = 0x02
+    # the body starts a new compressed stream
+    FLAG_RESET = 0x04
+    # a control transmission between communicators without body
+    FLAG_CONTROL = 0x08
+    # the body is a base64 encoded fragment of a transmission, see
+    # nexedge.fec
+    FLAG_FRAGMENT = 0x10
+    # the transmission answers the request with the same correlation id
+    FLAG_REPLY = 0x20
+    # the trigger is not a string, it is kept in the meta data of the body
+    FLAG_META_TRIGGER = 0x40
+
+    # the end mark is searched within this many bytes
+    MAX_LENGTH = 256
+    # characters of field values which are percent encoded, control
+    # characters would break the framing of the radio
+    ESCAPE = re.compile(r"[^\x21-\x7e]|[.~%]")
+
+    def __init__(self,
+                 flags: int = 0,
+                 counter: int = 0,
+                 session: int = 0,
+                 fields: dict = None):
+        self.flags = flags
+        self.counter = counter
+        self.session = session
+        self.fields = {} if fields is None else fields
+
+    def __repr__(self):
+        return (f"Header(flags={self.flags:#x}, counter={self.counter}, "
+                f"session={self.session}, fields={self.fields})")
+
+    @property
+    def trigger(self):
+        return self.fields.get("t")
+
+    @property
+    def group(self):
+        return self.fields.get("g")
+
+    @property
+    def sequence(self):
+        sequence = self.fields.get("s")
+        return None if sequence is None else int(sequence, 16)
+
+    @property
+    def control(self):
+        return self.fields.get("c")
+
+    @property
+    def request(self):
+        request = self.fields.get("i")
+        return None if request is None else int(request, 16)
+
+    @property
+    def fragment(self):
+        """
+        (index, k, m, length) of a fragment, see nexedge.fec.
+        :return: tuple of int or None
+        """
+        fragment = self.fields.get("f")
+        if fragment is None:
+            return None
+        return tuple(int(value, 16) for value in fragment.split(":"))
+
+    def encode(self) -> bytes:
+        """
+        Return the header as bytes including the start and end marks.
+        Raises SenderException if the header exceeds MAX_LENGTH.
+        :return: bytes
+        """
+        parts = [f"{self.flags:x}", f"{self.counter:x}", f"{self.session:x}"]
+        for key, value in self.fields.items():
+            value = self.ESCAPE.sub(self._escape, str(value))
+            parts.append(f"{key}={value}")
+
+        encoded = self.MARK + ".".join(parts).encode() + self.END
+        if len(encoded) > self.MAX_LENGTH:
+            raise SenderException(f"header length {len(encoded)}>"
+                                  f"{self.MAX_LENGTH}")
+        return encoded
+
+    @staticmethod
+    def _escape(match) -> str:
+        return "".join(f"%{byte:02X}" for byte in match.group().encode())
+
+    @classmethod
+    def split(cls, encoded: bytes):
+        """
+        Split a transmission into header and body.
+        If the transmission does not carry a header, None is returned
+        instead of the header.
+        :param encoded: bytes
+        :return: (Header, bytes)
+        """
+        header, offset = cls.locate(encoded)
+        return header, encoded[offset:]
+
+    @classmethod
+    def locate(cls, frame: bytes, start: int = 0):
+        """
+        Parse the header of a transmission starting at `start` within a
+        frame without copying the body.
+        If the transmission does not carry a header, None is returned
+        instead of the header.
+        :param frame: bytes
+        :param start: int offset of the transmission
+        :return: (Header, int) header and offset of the body
+        """
+        if frame[start:start + 1] != cls.MARK:
+            return None, start
+
+        end = frame.find(cls.END, start, start + cls.MAX_LENGTH)
+        if end < 0:
+            raise ValueError("header is not terminated")
+
+        flags, counter, session, *extra = frame[start + 1:end].split(cls.SEP)
+        fields = {}
+        for field in extra:
+            key, _, value = field.partition(cls.ASSIGN)
+            value = value.decode()
+            if "%" in value:
+                value = unquote(value, errors="strict")
+            fields[key.decode()] = value
+
+        header = cls(flags=int(flags, 16),
+                     counter=int(counter, 16),
+                     session=int(session, 16),
+                     fields=fields)
+        return header, end + 1
+
+
+class Message(Mapping):
+    """
+    A received transmission whose body is decoded on first access.
+
+    It behaves like the dictionary of former versions with the keys
+    "counter", "session", "meta", "payload" and "group" (group transmissions
+    only), but the body is only decoded when one of these keys is accessed.
+    """
+    __slots__ = ("header", "_body", "_offset", "_decode", "_data")
+
+    def __init__(self, header: Header, body: bytes, decode, offset: int = 0):
+        """
+        :param header: Header
+        :param body: bytes encoded body
+        :param decode: callable turning the encoded body into an object
+        :param offset: int start of the body within `body`, e.g. to keep the
+        received frame instead of a copy of its body
+        """
+        self.header = header
+        self._body = body
+        self._offset = offset
+        self._decode = decode
+        self._data = None
+
+    def __repr__(self):
+        state = "decoded" if self._data is not None else "encoded"
+        return f"Message({self.header!r}, {state})"
+
+    @property
+    def decoded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def data(self) -> dict:
+        """
+        The decoded transmission.
+        :return: dict
+        """
+        if self._data is None:
+            self._data = self._assemble()
+            # release the encoded body
+            self._body = None
+            self._decode = None
+        return self._data
+
+    def _assemble(self) -> dict:
+        header = self.header
+        body = self._body
+        if self._offset:
+            body = memoryview(body)[self._offset:]
+        unpacked = self._decode(body)
+
+        if header.flags & Header.FLAG_BARE:
+            meta = {}
+            payload = unpacked
+        else:
+            meta = unpacked["meta"]
+            payload = unpacked["payload"]
+
+        if header.trigger is not None:
+            meta["trigger"] = header.trigger
+
+        data = {
+            "counter":  header.counter,
+            "session":  header.session,
+            "meta":     meta,
+            "payload":  payload,
+        }
+        if header.group is not None:
+            data["group"] = header.group
+        return data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class Inbound:
+    """
+    Record of a frame received by the radio.
+
+    The same record travels from the Radio queues through the
+    RadioCommunicator to the target, listener and status queues. It unpacks
+    like the former [remote_id, data] lists:
+        remote_id, data = await queue.get()
+    data is the body as received by the Radio and the decoded object
+    (e.g. a Message) once the communicator has handled the record.
+
+    The record keeps the received frame and the offset of the body instead
+    of a copy of the body, `body` is a memoryview into the frame. The frame
+    is released when the communicator hands over the decoded object.
+    """
+    __slots__ = ("sender", "frame", "offset", "kind", "received", "data",
+                 "trace")
+
+    SDM = "sdm"
+    LDM = "ldm"
+    STATUS = "status"
+    # the data is a Loss, see ReorderBuffer
+    LOSS = "loss"
+
+    def __init__(self, sender: bytes, frame: bytes, kind: str = None,
+                 offset: int = 0, received: float = None, data=None):
+        """
+        :param sender: bytes id of the sending unit
+        :param frame: bytes
+        :param kind: str SDM, LDM, STATUS or LOSS
+        :param offset: int start of the body within the frame
+        :param received: float timestamp, defaults to now
+        :param data: decoded object
+        """
+        self.sender = sender
+        self.frame = frame
+        self.offset = offset
+        self.kind = kind
+        self.received = time.time() if received is None else received
+        self.data = data
+        # latencies of a traced transmission, see Tracer.observe
+        self.trace = None
+
+    def __repr__(self):
+        return (f"Inbound({self.sender!r}, kind={self.kind}, "
+                f"received={self.received:.3f}, "
+                f"{'decoded' if self.data is not None else 'encoded'})")
+
+    @property
+    def body(self):
+        """
+        The received body without copying it.
+        :return: memoryview or None once the frame was released
+        """
+        if self.frame is None:
+            return None
+        if not self.offset:
+            return self.frame
+        return memoryview(self.frame)[self.offset:]
+
+    def release(self):
+        """
+        Drop the frame, e.g. once the decoded object holds everything needed.
+        :return:
+        """
+        self.frame = None
+
+    def __iter__(self):
+        yield self.sender
+        yield self.body if self.data is None else self.data
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __len__(self):
+        return 2
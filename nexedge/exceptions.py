@@ -31,8 +31,13 @@ class SenderException(RadioException):
 class PayloadTooLarge(SenderException):
     """
     The payload size exceeded the maximum send size.
+    `excess` is the number of bytes the payload is (roughly) too large by,
+    if known.
     """
-    pass
+
+    def __init__(self, *args, excess: int = None):
+        super().__init__(*args)
+        self.excess = excess
 
 
 class ChannelTimeout(SenderException):
@@ -57,3 +62,26 @@ class SendMaxRetries(SenderException):
     The number of failed send attempts exceeded the maximum number.
     """
     pass
+
+
+class StreamOutOfSync(ReceiverException):
+    """
+    A transmission of a compressed stream can not be decompressed because
+    an earlier transmission of the stream was lost or the sender restarted.
+    """
+    pass
+
+
+class RequestFailed(SenderException):
+    """
+    A request was not confirmed by the radio or the target could not answer
+    it, see RadioCommunicator.request.
+    """
+    pass
+
+
+class RequestTimeout(RequestFailed):
+    """
+    The reply to a request did not arrive in time.
+    """
+    pass
@@ -0,0 +1,283 @@
+import time
+import logging
+from collections import OrderedDict
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+# arithmetic in GF(2^8) with the polynomial x^8 + x^4 + x^3 + x^2 + 1
+_EXP = [0] * 512
+_LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    _EXP[_i] = _x
+    _LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11d
+for _i in range(255, 512):
+    _EXP[_i] = _EXP[_i - 255]
+del _x, _i
+
+# constant -> translation table multiplying every byte by the constant
+_TABLES = {}
+
+
+def gf_mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+def gf_inv(a: int) -> int:
+    assert a != 0, "zero has no inverse"
+    return _EXP[255 - _LOG[a]]
+
+
+def _mul(constant: int, data: bytes) -> bytes:
+    # multiply every byte of data by a constant with one translate call
+    if constant == 1:
+        return data
+    table = _TABLES.get(constant)
+    if table is None:
+        table = _TABLES[constant] = bytes(gf_mul(constant, byte)
+                                          for byte in range(256))
+    return data.translate(table)
+
+
+def _combine(coefficients, fragments) -> bytes:
+    # sum of the fragments multiplied by their coefficients
+    result = 0
+    for coefficient, fragment in zip(coefficients, fragments):
+        if coefficient:
+            result ^= int.from_bytes(_mul(coefficient, fragment), "little")
+    return result.to_bytes(len(fragments[0]), "little")
+
+
+def _invert(matrix):
+    # Gauss-Jordan elimination over GF(2^8)
+    size = len(matrix)
+    rows = [list(row) + [int(i == j) for j in range(size)]
+            for i, row in enumerate(matrix)]
+    for column in range(size):
+        pivot = next(row for row in range(column, size)
+                     if rows[row][column])
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        inverse = gf_inv(rows[column][column])
+        rows[column] = [gf_mul(inverse, value) for value in rows[column]]
+        for row in range(size):
+            factor = rows[row][column]
+            if row != column and factor:
+                rows[row] = [value ^ gf_mul(factor, pivot_value)
+                             for value, pivot_value in
+                             zip(rows[row], rows[column])]
+    return [row[size:] for row in rows]
+
+
+class ErasureCode:
+    """
+    Systematic erasure code over GF(2^8): `k` data fragments are sent as
+    they are together with `m` parity fragments, any `k` of the `k + m`
+    fragments rebuild the data.
+
+    The parity fragments are the data fragments multiplied with a Cauchy
+    matrix, every square submatrix of it is invertible, which makes the code
+    maximum distance separable like Reed-Solomon. Its columns are scaled to
+    make the first row all ones, so with one parity fragment the code is
+    plain XOR parity.
+
+    Multiplying a fragment by a constant is one bytes.translate call and
+    adding fragments is an XOR of big integers, so the code runs at tens of
+    MB/s in pure python, fast enough to run inline.
+    """
+
+    def __init__(self, k: int, m: int):
+        """
+        :param k: int number of data fragments
+        :param m: int number of parity fragments
+        """
+        assert k > 0 and m >= 0 and k + m <= 256,\
+            "k has to be positive and k + m at most 256"
+        self.k = k
+        self.m = m
+        # parity rows x_j = j and data columns y_i = m + i are distinct
+        matrix = [[gf_inv(j ^ (m + i)) for i in range(k)] for j in range(m)]
+        if m:
+            scale = [gf_inv(value) for value in matrix[0]]
+            matrix = [[gf_mul(value, factor)
+                       for value, factor in zip(row, scale)]
+                      for row in matrix]
+        self.matrix = matrix
+
+    def encode(self, fragments) -> list:
+        """
+        Compute the parity fragments.
+        :param fragments: list of k bytes of equal length
+        :return: list of m bytes
+        """
+        assert len(fragments) == self.k, f"{self.k} fragments expected"
+        parity = []
+        for row in self.matrix:
+            if all(value == 1 for value in row):
+                result = 0
+                for fragment in fragments:
+                    result ^= int.from_bytes(fragment, "little")
+                parity.append(result.to_bytes(len(fragments[0]), "little"))
+            else:
+                parity.append(_combine(row, fragments))
+        return parity
+
+    def decode(self, fragments: dict) -> list:
+        """
+        Rebuild the data fragments.
+        :param fragments: dict index -> bytes of at least k received
+        fragments, indices below k are data fragments
+        :return: list of k bytes
+        """
+        missing = [i for i in range(self.k) if i not in fragments]
+        if not missing:
+            return [fragments[i] for i in range(self.k)]
+
+        parity = [i for i in sorted(fragments) if i >= self.k]
+        if len(parity) < len(missing):
+            raise ValueError(f"{self.k} fragments needed, got "
+                             f"{len(fragments)}")
+
+        # rows of the received fragments used, the data fragments we have
+        # and as many parity fragments as data fragments are missing
+        indices = [i for i in range(self.k) if i in fragments] +\
+            parity[:len(missing)]
+        rows = [[int(i == column) for column in range(self.k)]
+                if i < self.k else self.matrix[i - self.k]
+                for i in indices]
+        inverse = _invert(rows)
+        received = [fragments[i] for i in indices]
+
+        data = [fragments.get(i) for i in range(self.k)]
+        for i in missing:
+            data[i] = _combine(inverse[i], received)
+        return data
+
+
+_CODES = OrderedDict()
+
+
+def erasure_code(k: int, m: int) -> ErasureCode:
+    """
+    Return a cached ErasureCode.
+    :param k: int
+    :param m: int
+    :return: ErasureCode
+    """
+    code = _CODES.get((k, m))
+    if code is None:
+        code = _CODES[(k, m)] = ErasureCode(k, m)
+        while len(_CODES) > 64:
+            _CODES.popitem(last=False)
+    return code
+
+
+def split(data: bytes, k: int) -> list:
+    """
+    Split data into k fragments of equal length, the last one is padded
+    with zeros.
+    :param data: bytes
+    :param k: int
+    :return: list of bytes
+    """
+    size = -(-len(data) // k)
+    data = data.ljust(size * k, b"\x00")
+    return [data[i * size:(i + 1) * size] for i in range(k)]
+
+
+class FragmentBuffer:
+    """
+    Collects the fragments of the transmissions of every sender until
+    enough of them arrived to rebuild the transmission.
+
+    At most `max_objects` incomplete transmissions are kept, each for at
+    most `max_age` seconds. Fragments of a transmission which was already
+    rebuilt are dropped. Fragments which do not fit the code (k, m) or the
+    size of the fragments received first raise ValueError.
+    """
+
+    def __init__(self, max_objects: int = 32, max_age: float = 300.,
+                 remember: int = 256):
+        """
+        :param max_objects: int number of incomplete transmissions kept
+        :param max_age: float seconds an incomplete transmission is kept
+        :param remember: int number of rebuilt transmissions remembered to
+        drop their remaining fragments
+        """
+        self.max_objects = max_objects
+        self.max_age = max_age
+        self.remember = remember
+
+        # key -> [k, m, length, {index: fragment}, first arrival]
+        self._objects = OrderedDict()
+        self._done = OrderedDict()
+        self.rebuilt = 0
+        self.recovered = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._objects)
+
+    def add(self, key, index: int, k: int, m: int, length: int,
+            fragment: bytes, now: float = None):
+        """
+        Add a received fragment.
+        :param key: hashable identifying the transmission
+        :param index: int index of the fragment, parity fragments follow the
+        k data fragments
+        :param k: int number of data fragments
+        :param m: int number of parity fragments
+        :param length: int length of the transmission
+        :param fragment: bytes
+        :param now: float time.monotonic()
+        :return: bytes rebuilt transmission or None if fragments are missing
+        """
+        if not (0 < k and 0 <= m and k + m <= 256 and 0 <= index < k + m and
+                0 <= length <= k * len(fragment)):
+            raise ValueError(f"invalid fragment {index} of ({k}, {m}) with "
+                             f"length {length}")
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if key in self._done:
+            return None
+
+        entry = self._objects.get(key)
+        if entry is None:
+            entry = self._objects[key] = [k, m, length, {}, now]
+            while len(self._objects) > self.max_objects:
+                self._objects.popitem(last=False)
+                self.expired += 1
+        fragments = entry[3]
+        if entry[:3] != [k, m, length] or any(
+                len(other) != len(fragment) for other in fragments.values()):
+            raise ValueError(f"fragment {index} of {key} does not match the "
+                             f"fragments received before")
+        fragments[index] = fragment
+        if len(fragments) < k:
+            return None
+
+        del self._objects[key]
+        self._done[key] = True
+        while len(self._done) > self.remember:
+            self._done.popitem(last=False)
+
+        if any(i not in fragments for i in range(k)):
+            self.recovered += 1
+        self.rebuilt += 1
+        data = erasure_code(k, m).decode(fragments)
+        return b"".join(data)[:length]
+
+    def _expire(self, now: float):
+        while self._objects:
+            key, entry = next(iter(self._objects.items()))
+            if entry[4] + self.max_age > now:
+                break
+            logger.info(f"giving up incomplete transmission {key}")
+            del self._objects[key]
+            self.expired += 1
@@ -0,0 +1,101 @@
+"""
+Hooks attach tracing (spans, structured logs, metrics) to internal events
+without patching the library:
+
+    from nexedge import hooks
+
+    def on_confirmed(source, counter, result, **fields):
+        span.end(status=result)
+
+    hooks.register(hooks.SEND_CONFIRMED, on_confirmed)
+
+Hooks are called synchronously in the event loop with the emitting object
+as `source` and the fields of the event as keyword arguments, they should
+return quickly and accept further keyword arguments added later on.
+Exceptions raised by a hook are logged and swallowed.
+
+The emitting code checks `hooks.active` before building the fields of an
+event, so an event costs a single truth test while no hook is registered.
+"""
+
+import logging
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+# a frame was read from the serial port, fields: frame
+FRAME_RECEIVED = "frame_received"
+# a command is written to the serial port, fields: command
+WRITE_STARTED = "write_started"
+# the serial port sent the command, fields: command, result (None if no
+# confirmation was awaited, False on a timeout)
+WRITE_FINISHED = "write_finished"
+# the radio reported another led state, fields: status, previous
+CHANNEL_CHANGED = "channel_changed"
+# a transmission waits for the communicator, fields: counter, path, payload
+SEND_QUEUED = "send_queued"
+# a transmission is handed to the radio, fields: counter, path, payload
+SEND_STARTED = "send_started"
+# the radio returned, fields: counter, path, result
+SEND_CONFIRMED = "send_confirmed"
+# a received transmission was put into its queue, fields: record, header,
+# queue
+MESSAGE_ROUTED = "message_routed"
+
+EVENTS = (FRAME_RECEIVED, WRITE_STARTED, WRITE_FINISHED, CHANNEL_CHANGED,
+          SEND_QUEUED, SEND_STARTED, SEND_CONFIRMED, MESSAGE_ROUTED)
+
+# event -> tuple of hooks, events without hooks have no entry
+active = {}
+
+
+def register(event: str, hook):
+    """
+    Call hook(source, **fields) on every event of the given kind.
+    :param event: str one of EVENTS
+    :param hook: callable
+    :return: the hook
+    """
+    assert event in EVENTS, f"unknown event {event}"
+    assert callable(hook), "hook has to be callable"
+    active[event] = active.get(event, ()) + (hook,)
+    return hook
+
+
+def unregister(event: str, hook):
+    """
+    Remove a hook, unknown hooks are ignored.
+    :param event: str one of EVENTS
+    :param hook: callable
+    :return:
+    """
+    hooks = tuple(h for h in active.get(event, ()) if h is not hook)
+    if hooks:
+        active[event] = hooks
+    else:
+        active.pop(event, None)
+
+
+def clear():
+    """
+    Remove all hooks.
+    :return:
+    """
+    active.clear()
+
+
+def emit(event: str, source, **fields):
+    """
+    Call the hooks of an event. Callers on hot paths check
+    `if hooks.active` first to skip building the fields.
+    :param event: str
+    :param source: the emitting object
+    :param fields: fields of the event
+    :return:
+    """
+    for hook in active.get(event, ()):
+        try:
+            hook(source, **fields)
+        except Exception:
+            logger.exception("hook %r for %s failed", hook, event)
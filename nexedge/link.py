@@ -0,0 +1,192 @@
+import time
+import logging
+from collections import OrderedDict
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+class LinkQuality:
+    """
+    Health of the link to one unit, all ratios are exponentially weighted
+    moving averages starting at a perfect link.
+        delivery    fraction of the transmissions to the unit the radio
+                    confirmed
+        reception   fraction of the transmissions of the unit received, from
+                    the gaps in their sequence
+        rtt         time from the end of a write to its confirmation
+        failures    consecutive unconfirmed transmissions
+    """
+    __slots__ = ("delivery", "reception", "rtt", "failures", "last_failure",
+                 "sent", "received", "lost")
+
+    def __init__(self):
+        self.delivery = 1.
+        self.reception = 1.
+        self.rtt = None
+        self.failures = 0
+        self.last_failure = None
+        self.sent = 0
+        self.received = 0
+        self.lost = 0
+
+    @property
+    def score(self) -> float:
+        """
+        Quality between 0 (nothing gets through) and 1 (perfect).
+        :return: float
+        """
+        return self.delivery * self.reception
+
+    def as_dict(self) -> dict:
+        return {
+            "score":        self.score,
+            "delivery":     self.delivery,
+            "reception":    self.reception,
+            "rtt":          self.rtt,
+            "failures":     self.failures,
+            "sent":         self.sent,
+            "received":     self.received,
+            "lost":         self.lost,
+        }
+
+
+class LinkEstimator:
+    """
+    Estimates the quality of the link to every unit from the outcome of the
+    transmissions to it and the losses among the transmissions from it, and
+    derives how to treat the link:
+    - payload_size shrinks the recommended payload on poor links, long
+      transmissions are more likely to be hit by an error
+    - pacing spaces the transmissions to a unit which failed repeatedly
+      (exponential backoff, stretched by the channel load), instead of
+      running every further attempt into a timeout
+    Unknown units are assumed to be perfect. Memory is bounded by
+    `max_links`, the least recently used link is dropped first.
+    """
+
+    def __init__(self,
+                 alpha: float = .2,
+                 max_links: int = 256,
+                 pace_slot: float = 2.,
+                 max_pace: float = 30.):
+        """
+        :param alpha: float weight of a new observation in the averages
+        :param max_links: int number of links remembered
+        :param pace_slot: float seconds the transmissions to a unit are
+        spaced after its first failure, doubled with every further failure
+        :param max_pace: float upper limit of the spacing in seconds
+        """
+        assert 0 < alpha <= 1, "alpha has to be in (0, 1]"
+        self.alpha = alpha
+        self.max_links = max_links
+        self.pace_slot = pace_slot
+        self.max_pace = max_pace
+
+        # link -> LinkQuality
+        self._links = OrderedDict()
+
+    def __len__(self):
+        return len(self._links)
+
+    def get(self, link: bytes) -> LinkQuality:
+        """
+        Quality of a link, a perfect one for unknown links.
+        :param link: bytes unit id
+        :return: LinkQuality
+        """
+        quality = self._links.get(link)
+        return LinkQuality() if quality is None else quality
+
+    def _link(self, link: bytes) -> LinkQuality:
+        quality = self._links.get(link)
+        if quality is None:
+            quality = self._links[link] = LinkQuality()
+            while len(self._links) > self.max_links:
+                self._links.popitem(last=False)
+        else:
+            self._links.move_to_end(link)
+        return quality
+
+    def sent(self, link: bytes, confirmed: bool, rtt: float = None,
+             now: float = None):
+        """
+        Record the outcome of a transmission to a unit.
+        :param link: bytes unit id
+        :param confirmed: bool the radio confirmed the transmission
+        :param rtt: float seconds until the confirmation
+        :param now: float time.monotonic()
+        :return:
+        """
+        quality = self._link(link)
+        quality.sent += 1
+        quality.delivery += self.alpha * (float(confirmed) - quality.delivery)
+        if confirmed:
+            quality.failures = 0
+            if rtt is not None:
+                quality.rtt = rtt if quality.rtt is None else\
+                    quality.rtt + self.alpha * (rtt - quality.rtt)
+        else:
+            quality.failures += 1
+            quality.last_failure = time.monotonic() if now is None else now
+
+    def received(self, link: bytes, lost: int = 0):
+        """
+        Record a transmission received from a unit and the number of its
+        transmissions lost right before it.
+        :param link: bytes unit id
+        :param lost: int
+        :return:
+        """
+        quality = self._link(link)
+        quality.received += 1
+        quality.lost += lost
+        # every lost transmission counts as an observation of its own
+        for _ in range(min(lost, 16)):
+            quality.reception -= self.alpha * quality.reception
+        quality.reception += self.alpha * (1. - quality.reception)
+
+    def score(self, link: bytes) -> float:
+        """
+        Quality of a link between 0 and 1, see LinkQuality.score.
+        :param link: bytes unit id
+        :return: float
+        """
+        return self.get(link).score
+
+    def payload_size(self, link: bytes, maximum: int, minimum: int) -> int:
+        """
+        Recommended payload size for a link, the maximum for a perfect link
+        and shrinking with the square of the quality.
+        :param link: bytes unit id
+        :param maximum: int
+        :param minimum: int
+        :return: int
+        """
+        score = self.score(link)
+        return int(minimum + (maximum - minimum) * score * score)
+
+    def pacing(self, link: bytes, busy: float = 0., now: float = None):
+        """
+        Seconds to wait before the next transmission to a unit.
+        :param link: bytes unit id
+        :param busy: float fraction of the time the channel is busy, see
+        ChannelStatus.duty_cycle
+        :param now: float time.monotonic()
+        :return: float
+        """
+        quality = self._links.get(link)
+        if quality is None or not quality.failures:
+            return 0.
+        spacing = min(self.pace_slot * 2 ** (quality.failures - 1),
+                      self.max_pace) * (1. + busy)
+        now = time.monotonic() if now is None else now
+        return max(quality.last_failure + spacing - now, 0.)
+
+    def stats(self) -> dict:
+        """
+        Quality of every known link.
+        :return: dict
+        """
+        return {link.decode(): quality.as_dict()
+                for link, quality in self._links.items()}
@@ -0,0 +1,493 @@
+import os
+import sys
+import json
+import time
+import base64
+import random
+import asyncio
+import logging
+import argparse
+
+# local imports
+from .radio import Radio
+from .channel import ChannelStatus
+from .communicator import RadioCommunicator
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+class SimulatedMedium:
+    """
+    In-process radio channel shared by SimulatedRadio instances.
+
+    The medium plays the part of the radio devices behind the serial ports:
+    it answers the PCIP commands of the Radio instances, occupies the
+    channel for the air time of every transmission, reports the channel
+    state with the led status frames and delivers the transmissions to the
+    receivers. Transmissions overlapping in time collide, both fail.
+    The other units learn about a busy channel only after `sense_delay`,
+    transmissions started within that window collide.
+
+    All times are given in simulated seconds, the simulation runs `speed`
+    times faster than real time.
+    """
+    LED_FREE = 0x80
+    LED_SENDING = 0x81
+    LED_RECEIVING = 0x82
+
+    def __init__(self,
+                 speed: float = 1.,
+                 rate: float = 100.,
+                 setup: float = 1.,
+                 sdm_setup: float = .5,
+                 sense_delay: float = .2):
+        """
+        :param speed: float speed up of the simulation
+        :param rate: float bytes per second on air
+        :param setup: float seconds to set up a LDM
+        :param sdm_setup: float seconds to set up a SDM or status message
+        :param sense_delay: float seconds until the other units see a busy
+        channel
+        """
+        self.speed = speed
+        self.rate = rate
+        self.setup = setup
+        self.sdm_setup = sdm_setup
+        self.sense_delay = sense_delay
+
+        # unit id -> reader of the Radio
+        self._units = {}
+        # transmissions on air, [sender, collided]
+        self._active = []
+        self._tasks = set()
+
+        self.started = time.monotonic()
+        self._busy_since = None
+        self.busy_time = 0.
+        self.transmissions = 0
+        self.collisions = 0
+        self.delivered = 0
+
+    def radio_class(self) -> type:
+        """
+        Return a Radio class attached to this medium with all timing
+        constants scaled to the speed of the simulation.
+        :return: type
+        """
+        speed = self.speed
+        return type("SimulatedRadio", (SimulatedRadio,), {
+            "MEDIUM":           self,
+            "SETTLE_TIME":      Radio.SETTLE_TIME / speed,
+            "POLL_FAST":        Radio.POLL_FAST / speed,
+            "POLL_SLOW":        Radio.POLL_SLOW / speed,
+            "POLL_BUSY_PERIOD": Radio.POLL_BUSY_PERIOD / speed,
+            "POLL_GUARD":       Radio.POLL_GUARD / speed,
+        })
+
+    def attach(self, unit_id: bytes, reader: asyncio.StreamReader):
+        self._units[unit_id] = reader
+
+    def detach(self, unit_id: bytes):
+        self._units.pop(unit_id, None)
+
+    def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._units.clear()
+
+    def utilisation(self) -> float:
+        """
+        Fraction of the time the channel was occupied.
+        :return: float
+        """
+        now = time.monotonic()
+        busy = self.busy_time
+        if self._busy_since is not None:
+            busy += now - self._busy_since
+        return busy / max(now - self.started, 1e-9)
+
+    def _reply(self, unit_id: bytes, frame: bytes):
+        reader = self._units.get(unit_id)
+        if reader is not None:
+            reader.feed_data(b"\x02" + frame + b"\x03")
+
+    def _led(self, unit_id: bytes) -> int:
+        if not self._active:
+            return self.LED_FREE
+        if any(sender == unit_id for sender, _collided in self._active):
+            return self.LED_SENDING
+        return self.LED_RECEIVING
+
+    def _report_led(self, unit_id: bytes):
+        self._reply(unit_id, b"JA" + bytes([self._led(unit_id)]))
+
+    def _report_led_others(self, sender: bytes):
+        for unit_id in list(self._units):
+            if unit_id != sender:
+                self._report_led(unit_id)
+
+    def write(self, unit_id: bytes, data: bytes):
+        """
+        Handle the commands a Radio wrote to its serial port.
+        :param unit_id: bytes
+        :param data: bytes
+        :return:
+        """
+        for frame in data.split(b"\x03"):
+            frame = frame.lstrip(b"\x02")
+            if not frame:
+                continue
+
+            if frame == b"JCA":
+                self._report_led(unit_id)
+            elif frame[:1] == b"g" and frame[1:2] in (b"F", b"G", b"E"):
+                task = asyncio.get_event_loop().create_task(
+                    self._transmit(unit_id, frame))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                # settings and calls are just confirmed
+                self._reply(unit_id, b"0")
+
+    async def _transmit(self, sender: bytes, frame: bytes):
+        kind, scope, target, text = frame[1:2], frame[2:3], frame[3:8],\
+            frame[8:]
+        setup = self.setup if kind == b"G" else self.sdm_setup
+        airtime = (setup + len(text) / self.rate) / self.speed
+
+        transmission = [sender, False]
+        if self._active:
+            for other in self._active:
+                other[1] = True
+            transmission[1] = True
+        else:
+            self._busy_since = time.monotonic()
+        self._active.append(transmission)
+        self.transmissions += 1
+
+        loop = asyncio.get_event_loop()
+        self._report_led(sender)
+        loop.call_later(self.sense_delay / self.speed,
+                        self._report_led_others, sender)
+
+        await asyncio.sleep(airtime)
+
+        self._active.remove(transmission)
+        if not self._active:
+            self.busy_time += time.monotonic() - self._busy_since
+            self._busy_since = None
+            self._report_led(sender)
+            loop.call_later(self.sense_delay / self.speed,
+                            self._report_led_others, sender)
+
+        if transmission[1]:
+            self.collisions += 1
+            self._reply(sender, b"1")
+            return
+
+        if scope == b"U":
+            receivers = [target]
+        else:
+            receivers = [unit_id for unit_id in self._units
+                         if unit_id != sender]
+        for unit_id in receivers:
+            self._reply(unit_id,
+                        b"g" + kind + b"U" + sender + target + b"0" + text)
+            self.delivered += 1
+        self._reply(sender, b"0")
+
+
+class _SimulatedWriter:
+    """
+    Stands in for the StreamWriter of the serial port.
+    """
+
+    def __init__(self, medium: SimulatedMedium, unit_id: bytes):
+        self._medium = medium
+        self._unit_id = unit_id
+
+    def write(self, data: bytes):
+        self._medium.write(self._unit_id, data)
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SimulatedRadio(Radio):
+    """
+    Radio talking to a SimulatedMedium instead of a serial port, created by
+    SimulatedMedium.radio_class. The unit id is the last part of the url in
+    serial_kwargs, e.g. "sim://00001".
+    """
+    MEDIUM = None
+
+    def __init__(self, serial_kwargs: dict, **kwargs):
+        super().__init__(serial_kwargs=serial_kwargs, **kwargs)
+        self.unit_id = serial_kwargs["url"].rpartition("/")[2].encode()
+
+        # everything happens `speed` times faster
+        speed = self.MEDIUM.speed
+        self.confirmation_timeout /= speed
+        self.channel_timeout /= speed
+        self.backoff_slot /= speed
+        self._baudrate = int(self.baudrate * speed)
+        self.channel = ChannelStatus(free_threshold=4 / speed,
+                                     force_threshold=10 / speed,
+                                     min_hold=ChannelStatus.MIN_HOLD / speed)
+
+    async def _connect(self):
+        self._reader = asyncio.StreamReader()
+        self._writer = _SimulatedWriter(self.MEDIUM, self.unit_id)
+        self.MEDIUM.attach(self.unit_id, self._reader)
+        self._connected.set()
+
+    def destroy(self):
+        self.MEDIUM.detach(self.unit_id)
+        return super().destroy()
+
+
+class TrafficClass:
+    """
+    One kind of traffic of the load generator.
+    Parsed from "name:size:weight[:priority]", e.g. "event:1200:0.3:1".
+    """
+
+    def __init__(self, name: str, size: int, weight: float,
+                 priority: int = 0):
+        assert size >= 0 and weight > 0, "size and weight have to be positive"
+        self.name = name
+        self.size = size
+        self.weight = weight
+        self.priority = priority
+
+    @classmethod
+    def parse(cls, spec: str):
+        name, size, weight, *priority = spec.split(":")
+        return cls(name, int(size), float(weight),
+                   int(priority[0]) if priority else 0)
+
+    def payload(self) -> dict:
+        # random text, compression must not make the payload vanish
+        pad = base64.b64encode(os.urandom(self.size))[:self.size].decode()
+        return {"t": time.time(), "c": self.name, "x": pad}
+
+
+def percentile(values, q: float):
+    """
+    Nearest rank percentile.
+    :param values: list of float
+    :param q: float between 0 and 100
+    :return: float or None
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(q / 100 * len(values))) - 1))
+    return values[index]
+
+
+async def run_load(units: int, rate: float, mix, targets: str = "uniform",
+                   duration: float = 600., speed: float = 20.,
+                   timeout: int = 60, medium_kwargs: dict = None) -> dict:
+    """
+    Run N communicators against a simulated medium at one offered load.
+    :param units: int number of units
+    :param rate: float transmissions per unit and minute
+    :param mix: list of TrafficClass
+    :param targets: str "uniform", "gateway" (all units send to the first
+    one) or "broadcast"
+    :param duration: float simulated seconds
+    :param speed: float speed up of the simulation
+    :param timeout: int confirmation and channel timeout of the
+    communicators in simulated seconds
+    :param medium_kwargs: dict passed to SimulatedMedium
+    :return: dict results, times in simulated seconds
+    """
+    medium = SimulatedMedium(speed=speed, **(medium_kwargs or {}))
+    radio_class = medium.radio_class()
+    ids = [f"{unit + 1:05d}".encode() for unit in range(units)]
+    coms = [RadioCommunicator(serial_kwargs={"url": f"sim://{unit.decode()}",
+                                             "baudrate": 9600},
+                              listeners=["load"],
+                              timeout=timeout,
+                              link_pace_slot=2. / speed,
+                              link_max_pace=30. / speed,
+                              radio_class=radio_class)
+            for unit in ids]
+
+    latencies = {}
+    results = {"sent": 0, "succeeded": 0, "failed": 0, "errors": 0,
+               "received": 0}
+    pending = set()
+    queue_samples = []
+
+    async def consume(com):
+        queue = com.get_listener_queue("load")
+        while True:
+            _remote_id, data = await queue.get()
+            payload = data["payload"]
+            latencies.setdefault(payload["c"], []).append(
+                (time.time() - payload["t"]) * speed)
+            results["received"] += 1
+
+    def sent(task: asyncio.Task):
+        pending.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            results["errors"] += 1
+        elif task.result():
+            results["succeeded"] += 1
+        else:
+            results["failed"] += 1
+
+    weights = [traffic.weight for traffic in mix]
+
+    async def generate(com, unit_id):
+        while True:
+            await asyncio.sleep(random.expovariate(rate / 60 * speed))
+            traffic = random.choices(mix, weights)[0]
+            meta = {"trigger": "load"}
+            if targets == "broadcast":
+                send = com.broadcast(data=traffic.payload(), meta=meta)
+            else:
+                if targets == "gateway" and unit_id != ids[0]:
+                    target = ids[0]
+                else:
+                    target = random.choice([other for other in ids
+                                            if other != unit_id])
+                send = com.send(target_id=target, data=traffic.payload(),
+                                meta=meta)
+            task = asyncio.get_event_loop().create_task(send)
+            pending.add(task)
+            task.add_done_callback(sent)
+            results["sent"] += 1
+
+    loop = asyncio.get_event_loop()
+    tasks = [loop.create_task(consume(com)) for com in coms]
+    for com in coms:
+        com.start_data_handler()
+    # let the radios connect
+    await asyncio.sleep(0)
+
+    started = time.monotonic()
+    tasks += [loop.create_task(generate(com, unit_id))
+              for com, unit_id in zip(coms, ids)]
+    medium.started = time.monotonic()
+    while time.monotonic() - started < duration / speed:
+        await asyncio.sleep(min(1., duration / speed / 20))
+        queue_samples.append(((time.monotonic() - started) * speed,
+                              len(pending)))
+    elapsed = (time.monotonic() - started) * speed
+
+    utilisation = medium.utilisation()
+    for task in tasks + list(pending):
+        task.cancel()
+    for com in coms:
+        com.destroy()
+    medium.close()
+    await asyncio.sleep(0)
+
+    everything = [value for values in latencies.values() for value in values]
+    priorities = {traffic.name: traffic.priority for traffic in mix}
+    growth = 0.
+    if len(queue_samples) > 1:
+        (t0, q0), (t1, q1) = queue_samples[0], queue_samples[-1]
+        growth = (q1 - q0) / (t1 - t0) * 60
+    return {
+        "units":            units,
+        "rate":             rate,
+        "offered":          results["sent"] / elapsed,
+        "throughput":       results["received"] / elapsed,
+        "sent":             results["sent"],
+        "succeeded":        results["succeeded"],
+        "failed":           results["failed"],
+        "errors":           results["errors"],
+        "received":         results["received"],
+        "latency":          {q: percentile(everything, q)
+                             for q in (50, 90, 99)},
+        "latency_by_class": {name: {"priority": priorities.get(name),
+                                    "p50": percentile(values, 50),
+                                    "p99": percentile(values, 99)}
+                             for name, values in latencies.items()},
+        "utilisation":      utilisation,
+        "transmissions":    medium.transmissions,
+        "collision_rate":   (medium.collisions / medium.transmissions
+                             if medium.transmissions else 0.),
+        "queue":            queue_samples[-1][1] if queue_samples else 0,
+        "queue_max":        max((q for _t, q in queue_samples), default=0),
+        "queue_growth":     growth,
+    }
+
+
+def _format(value, digits: int = 2) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="nexedge-loadgen",
+        description="Drive simulated RadioCommunicator instances sharing "
+                    "one channel and report their behaviour over the "
+                    "offered load.")
+    parser.add_argument("--units", type=int, default=50)
+    parser.add_argument("--rates", default="0.25,0.5,1,2",
+                        help="comma separated transmissions per unit and "
+                             "minute, one run per rate")
+    parser.add_argument("--mix", default="status:40:0.7:1,event:1200:0.3:0",
+                        help="comma separated traffic classes "
+                             "name:payload size:weight[:priority]")
+    parser.add_argument("--targets", default="uniform",
+                        choices=["uniform", "gateway", "broadcast"])
+    parser.add_argument("--duration", type=float, default=600.,
+                        help="simulated seconds per run")
+    parser.add_argument("--speed", type=float, default=20.,
+                        help="speed up of the simulation")
+    parser.add_argument("--air-rate", type=float, default=100.,
+                        help="bytes per second on air")
+    parser.add_argument("--sense-delay", type=float, default=.2,
+                        help="seconds until a busy channel is reported")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", default=None,
+                        help="write the results to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+    random.seed(args.seed)
+
+    mix = [TrafficClass.parse(spec) for spec in args.mix.split(",")]
+    medium_kwargs = {"rate": args.air_rate, "sense_delay": args.sense_delay}
+
+    loop = asyncio.get_event_loop()
+    runs = []
+    print(f"{'rate/min':>8} {'offered/s':>9} {'thruput/s':>9} {'p50':>7} "
+          f"{'p90':>7} {'p99':>7} {'util':>5} {'coll':>5} {'queue':>5} "
+          f"{'growth/min':>10}")
+    for rate in (float(rate) for rate in args.rates.split(",")):
+        result = loop.run_until_complete(
+            run_load(args.units, rate, mix, targets=args.targets,
+                     duration=args.duration, speed=args.speed,
+                     medium_kwargs=medium_kwargs))
+        runs.append(result)
+        latency = result["latency"]
+        print(f"{rate:>8.2f} {result['offered']:>9.3f} "
+              f"{result['throughput']:>9.3f} {_format(latency[50]):>7} "
+              f"{_format(latency[90]):>7} {_format(latency[99]):>7} "
+              f"{result['utilisation']:>5.2f} "
+              f"{result['collision_rate']:>5.2f} {result['queue']:>5} "
+              f"{result['queue_growth']:>10.2f}")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(runs, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,7 @@
 import logging
 import json
+import struct
+import datetime
 
 # setup logging
 logger = logging.getLogger(__name__)
@@ -25,6 +27,24 @@ class Packer:
     def unpack(self, message: bytes = None):
         raise NotImplementedError
 
+    def pack_many(self, items) -> list:
+        """
+        Pack a sequence of objects.
+        :param items: iterable of objects
+        :return: list of bytes
+        """
+        pack = self.pack
+        return [pack(data) for data in items]
+
+    def unpack_many(self, messages) -> list:
+        """
+        Reverse pack_many.
+        :param messages: iterable of bytes
+        :return: list of objects
+        """
+        unpack = self.unpack
+        return [unpack(message) for message in messages]
+
 
 class JSONPacker(Packer):
     """
@@ -39,3 +59,270 @@ class JSONPacker(Packer):
     def unpack(self, message: bytes = None):
         assert type(message) is bytes, "message has to be given as bytes"
         return json.loads(message)
+
+
+# codecs for the positional packing of SchemaPacker
+# every codec is a pair of
+#   encode(value, out: bytearray)
+#   decode(buffer: bytes, position: int) -> (value, position)
+# encode raises ValueError or TypeError if a value does not fit the type
+def _encode_uint(value, out: bytearray):
+    if type(value) is not int or value < 0:
+        raise ValueError(f"{value!r} is not an unsigned integer")
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_uint(buffer: bytes, position: int):
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, position
+        shift += 7
+
+
+def _encode_int(value, out: bytearray):
+    if type(value) is not int:
+        raise ValueError(f"{value!r} is not an integer")
+    # zigzag encoding keeps small negative numbers small
+    _encode_uint(value * 2 if value >= 0 else -value * 2 - 1, out)
+
+
+def _decode_int(buffer: bytes, position: int):
+    value, position = _decode_uint(buffer, position)
+    return (value >> 1) ^ -(value & 1), position
+
+
+def _encode_bool(value, out: bytearray):
+    if type(value) is not bool:
+        raise ValueError(f"{value!r} is not a boolean")
+    out.append(value)
+
+
+def _decode_bool(buffer: bytes, position: int):
+    return buffer[position] == 1, position + 1
+
+
+_DOUBLE = struct.Struct("<d")
+
+
+def _encode_float(value, out: bytearray):
+    # an int would come back as float
+    if type(value) is not float:
+        raise ValueError(f"{value!r} is not a float")
+    out += _DOUBLE.pack(value)
+
+
+def _decode_float(buffer: bytes, position: int):
+    return _DOUBLE.unpack_from(buffer, position)[0], position + _DOUBLE.size
+
+
+def _encode_bytes(value: bytes, out: bytearray):
+    _encode_uint(len(value), out)
+    out += value
+
+
+def _encode_str(value, out: bytearray):
+    if type(value) is not str:
+        raise ValueError(f"{value!r} is not a string")
+    _encode_bytes(value.encode(), out)
+
+
+def _decode_str(buffer: bytes, position: int):
+    length, position = _decode_uint(buffer, position)
+    end = position + length
+    return buffer[position:end].decode(), end
+
+
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _encode_timestamp(value, out: bytearray):
+    # only timestamps which survive the round trip are packed, anything else
+    # (fractions of seconds, other time zones) is left to the JSON packer
+    if type(value) is not str:
+        raise ValueError(f"{value!r} is not a timestamp")
+    timestamp = datetime.datetime.strptime(value, _TIMESTAMP_FORMAT)
+    # strptime accepts fields without leading zeros
+    if timestamp.strftime(_TIMESTAMP_FORMAT) != value:
+        raise ValueError(f"{value!r} is not a canonical timestamp")
+    seconds = int(timestamp.replace(tzinfo=datetime.timezone.utc).timestamp())
+    _encode_int(seconds, out)
+
+
+def _decode_timestamp(buffer: bytes, position: int):
+    seconds, position = _decode_int(buffer, position)
+    timestamp = datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc)
+    return timestamp.strftime(_TIMESTAMP_FORMAT), position
+
+
+def _encode_json(value, out: bytearray):
+    _encode_bytes(json.dumps(value, separators=(',', ':')).encode(), out)
+
+
+def _decode_json(buffer: bytes, position: int):
+    value, position = _decode_str(buffer, position)
+    return json.loads(value), position
+
+
+def _enum_codec(values):
+    """
+    Create the codec for an enumeration of values which are packed as their
+    index.
+    :param values: sequence of the possible values
+    :return: (encode, decode)
+    """
+    values = tuple(values)
+    # keyed by type as well, True == 1 would be packed as 1 otherwise
+    codes = {(type(value), value): code for code, value in enumerate(values)}
+
+    def encode(value, out: bytearray):
+        try:
+            code = codes[(type(value), value)]
+        except (KeyError, TypeError):
+            raise ValueError(f"{value!r} is not in {values}")
+        _encode_uint(code, out)
+
+    def decode(buffer: bytes, position: int):
+        code, position = _decode_uint(buffer, position)
+        return values[code], position
+
+    return encode, decode
+
+
+class SchemaPacker(JSONPacker):
+    """
+    Implements a packer for registered message types.
+
+    A message type is registered with a numeric id and its ordered fields.
+    Dictionaries with exactly the keys of a registered type are packed as
+    a marker byte, the type id and the values in field order, no key is
+    repeated in the packed data.
+    Everything else, including registered types with values not fitting
+    their field types, is packed as JSON.
+
+    Field types are
+        "uint"      unsigned integer, varint encoded
+        "int"       signed integer, zigzag varint encoded
+        "bool"      boolean
+        "float"     double precision float, ints are not floats
+        "str"       unicode string
+        "timestamp" ISO 8601 string like "2017-03-03T16:11:00Z", packed as
+                    epoch seconds
+        "json"      anything JSON can handle
+        ("enum", values) one of the given values, packed as its index
+    Every field may be None. Values which would not come back unchanged,
+    e.g. timestamps without leading zeros, are packed as JSON.
+
+    Both sides of a link have to register the same types.
+    """
+
+    # JSON never starts with a zero byte
+    MARK = b"\x00"
+
+    CODECS = {
+        "uint":         (_encode_uint, _decode_uint),
+        "int":          (_encode_int, _decode_int),
+        "bool":         (_encode_bool, _decode_bool),
+        "float":        (_encode_float, _decode_float),
+        "str":          (_encode_str, _decode_str),
+        "timestamp":    (_encode_timestamp, _decode_timestamp),
+        "json":         (_encode_json, _decode_json),
+    }
+
+    def __init__(self):
+        super().__init__()
+        # type id -> (names, decoders)
+        self._decoders = {}
+        # key set -> (prefix, names, encoders)
+        self._encoders = {}
+
+    def register(self, type_id: int, fields):
+        """
+        Register a message type.
+        :param type_id: int unique id of the type
+        :param fields: sequence of (name, type) pairs
+        :return:
+        """
+        assert type(type_id) is int and type_id >= 0,\
+            "type_id has to be an unsigned integer"
+        assert type_id not in self._decoders,\
+            f"type id {type_id} is already registered"
+
+        names = []
+        encoders = []
+        decoders = []
+        for name, kind in fields:
+            if isinstance(kind, tuple) and kind[0] == "enum":
+                encode, decode = _enum_codec(kind[1])
+            else:
+                assert kind in self.CODECS, f"unknown field type {kind}"
+                encode, decode = self.CODECS[kind]
+            names.append(name)
+            encoders.append(encode)
+            decoders.append(decode)
+
+        keys = frozenset(names)
+        assert len(keys) == len(names), "field names have to be unique"
+        assert keys not in self._encoders,\
+            "a type with the same fields is already registered"
+
+        prefix = bytearray(self.MARK)
+        _encode_uint(type_id, prefix)
+
+        self._encoders[keys] = (bytes(prefix), tuple(names), tuple(encoders))
+        self._decoders[type_id] = (tuple(names), tuple(decoders))
+        logger.debug(f"registered message type {type_id} with {names}")
+
+    def pack(self, data: dict=None) -> bytes:
+        assert type(data) is dict, "data has to be giving as a dictionary"
+        schema = self._encoders.get(frozenset(data))
+        if schema is not None:
+            try:
+                return self._pack_positional(data, *schema)
+            except (ValueError, TypeError) as e:
+                logger.debug("falling back to JSON, %s", e)
+        return super().pack(data=data)
+
+    @staticmethod
+    def _pack_positional(data: dict, prefix: bytes, names, encoders) -> bytes:
+        # bitmap of the fields set to None
+        nulls = 0
+        values = bytearray()
+        for index, name in enumerate(names):
+            value = data[name]
+            if value is None:
+                nulls |= 1 << index
+            else:
+                encoders[index](value, values)
+
+        out = bytearray(prefix)
+        _encode_uint(nulls, out)
+        out += values
+        return bytes(out)
+
+    def unpack(self, message: bytes = None):
+        assert type(message) is bytes, "message has to be given as bytes"
+        if message[:1] != self.MARK:
+            return super().unpack(message=message)
+
+        type_id, position = _decode_uint(message, 1)
+        try:
+            names, decoders = self._decoders[type_id]
+        except KeyError:
+            raise ValueError(f"unknown message type {type_id}")
+
+        nulls, position = _decode_uint(message, position)
+        data = {}
+        for index, name in enumerate(names):
+            if nulls & (1 << index):
+                data[name] = None
+            else:
+                data[name], position = decoders[index](message, position)
+        return data
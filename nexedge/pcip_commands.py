@@ -1,4 +1,8 @@
 
+# unit/group id which addresses all units
+ALL_UNITS = b"00000"
+
+
 # base method to wrap the command into start and end bytes
 def wrap(command: bytes):
     """
@@ -88,7 +92,7 @@ def shortMessage2all(message: bytes):
     :param message:
     :return:
     """
-    return wrap(b"g" + b"F" + b"G" + b"00000" + message)
+    return wrap(b"g" + b"F" + b"G" + ALL_UNITS + message)
 
 
 def shortMessage2Unit(unitID: bytes, message: bytes) -> bytes:
@@ -117,7 +121,7 @@ def longMessage2all(message: bytes) -> bytes:
     :param message:
     :return:
     """
-    return wrap(b"g" + b"G" + b"G" + b"00000" + message)
+    return wrap(b"g" + b"G" + b"G" + ALL_UNITS + message)
 
 
 def longMessage2Unit(unitID: bytes, message: bytes) -> bytes:
@@ -151,6 +155,15 @@ def setUnitStatus(unitID: bytes, status: bytes) -> bytes:
     return wrap(b"g" + b"E" + b"U" + unitID + status)
 
 
+def setStatus2all(status: bytes) -> bytes:
+    """
+    Sets the status for all units
+    :param status:
+    :return:
+    """
+    return wrap(b"g" + b"E" + b"G" + ALL_UNITS + status)
+
+
 # get status information
 # does not work
 def getChannelStatus() -> bytes:
@@ -0,0 +1,88 @@
+import json
+import struct
+import asyncio
+import logging
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+# Length prefixed binary protocol between the radio daemon and its clients.
+#
+# Every frame consists of
+#     length (uint32), opcode (uint8), request id (uint32), body
+# where length counts opcode, request id and body.
+# Requests are answered with RESULT or ERROR carrying the same request id,
+# several requests may be in flight on one connection (pipelining).
+# Received transmissions are pushed with MESSAGE, the request id is the one
+# of the SUBSCRIBE request.
+#
+# Bodies start with a length prefixed address (uint8 length, may be empty)
+# followed by JSON.
+
+FRAME = struct.Struct("<IBI")
+MAX_FRAME = 2 ** 20
+
+# client -> daemon
+SEND = 0x01
+SEND_GROUP = 0x02
+BROADCAST = 0x03
+SUBSCRIBE_TARGET = 0x04
+SUBSCRIBE_LISTENER = 0x05
+STATS = 0x06
+
+# daemon -> client
+RESULT = 0x80
+ERROR = 0x81
+MESSAGE = 0x82
+
+
+def pack_body(address: bytes = b"", data=None) -> bytes:
+    """
+    Pack an address and a JSON serializable object into a body.
+    :param address: bytes
+    :param data:
+    :return: bytes
+    """
+    return (bytes([len(address)]) + address +
+            json.dumps(data, separators=(',', ':')).encode())
+
+
+def unpack_body(body: bytes):
+    """
+    Reverse pack_body.
+    :param body: bytes
+    :return: (bytes, object)
+    """
+    length = body[0]
+    return body[1:length + 1], json.loads(body[length + 1:])
+
+
+def write_frame(writer: asyncio.StreamWriter, opcode: int, request_id: int,
+                body: bytes = b""):
+    """
+    Write a frame to the stream, the caller is responsible for draining.
+    :param writer: asyncio.StreamWriter
+    :param opcode: int
+    :param request_id: int
+    :param body: bytes
+    :return:
+    """
+    writer.write(FRAME.pack(FRAME.size - 4 + len(body), opcode, request_id) +
+                 body)
+
+
+async def read_frame(reader: asyncio.StreamReader):
+    """
+    Read the next frame from the stream.
+    :param reader: asyncio.StreamReader
+    :return: (int, int, bytes) opcode, request id and body
+    """
+    head = await reader.readexactly(FRAME.size)
+    length, opcode, request_id = FRAME.unpack(head)
+    if length > MAX_FRAME:
+        raise ValueError(f"frame of {length} bytes exceeds the limit")
+    if length < FRAME.size - 4:
+        raise ValueError(f"frame of {length} bytes is shorter than its header")
+    body = await reader.readexactly(length - (FRAME.size - 4))
+    return opcode, request_id, body
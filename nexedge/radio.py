@@ -1,12 +1,20 @@
+import time
+import random
 import asyncio
 import serial
 import logging
 
 # local
 from .channel import ChannelStatus
+from .capture import TrafficCapture
+from .stats import RunningStats
+from .envelope import Inbound
+from . import hooks
 from .pcip_commands import set_baudrate, set_repeat,\
     channel_status_request, getChannelStatus, longMessage2Unit,\
-    startcall, endcall
+    longGroupMessage, longMessage2all, shortMessage2Unit, shortGroupMessage,\
+    shortMessage2all, startcall, endcall, setUnitStatus, setGroupStatus,\
+    setStatus2all, ALL_UNITS
 from .utils import open_serial_connection
 from .exceptions import *
 
@@ -19,6 +27,36 @@ class Radio:
     STOP = b'\x03'
 
     MAXSIZE = 4000
+    # short data messages are limited to 100 characters
+    SDM_MAXSIZE = 100
+
+    # group id addressing every unit
+    BROADCAST_ID = ALL_UNITS
+
+    # upper limit of the backoff window is backoff_slot * 2**6
+    MAX_BACKOFF_EXPONENT = 6
+
+    # channel status polling intervals in seconds
+    POLL_FAST = 1.
+    POLL_SLOW = 15.
+    # poll fast for this many seconds after the channel was busy
+    POLL_BUSY_PERIOD = 30.
+    # commands awaiting a confirmation are not written earlier than this
+    # after a status request
+    POLL_GUARD = .5
+
+    # seconds the display of the radio needs before the next command
+    SETTLE_TIME = 5.
+
+    # number of shared sender ids
+    MAX_SENDERS = 1024
+
+    # one start bit, eight data bits and two stop bits
+    BITS_PER_BYTE = 11
+
+    # delays between reconnection attempts in seconds
+    RECONNECT_DELAY = 1.
+    RECONNECT_MAX_DELAY = 60.
 
     def __init__(self,
                  serial_kwargs: dict,
@@ -26,7 +64,31 @@ class Radio:
                  retry_sending: bool = True,
                  confirmation_timeout: float = 60,
                  channel_timeout: float = 60,
+                 max_attempts: int = 10,
+                 backoff_slot: float = 1.,
+                 channel_probe: bool = False,
+                 capture: TrafficCapture = None,
+                 reconnect: bool = False,
                  ):
+        """
+        The channel is sensed before every transmission. If it is busy,
+        the radio backs off for a random time growing exponentially with the
+        number of attempts (listen before talk).
+        :param serial_kwargs: dict passed to the serial connection
+        :param change_baudrate: bool try to switch to 57600 baud
+        :param retry_sending: bool retry transmissions which were not
+        confirmed by the radio
+        :param confirmation_timeout: float seconds to wait for the
+        confirmation of a command
+        :param channel_timeout: float seconds to wait for the channel
+        :param max_attempts: int number of channel accesses per transmission
+        :param backoff_slot: float seconds of one backoff slot
+        :param channel_probe: bool start and end a call if the channel is
+        busy to provoke a status update of the radio
+        :param capture: TrafficCapture records the raw serial traffic
+        :param reconnect: bool reopen the serial port if it fails instead of
+        destroying the radio
+        """
         # get a logger
         logger.info("initialized Radio instance")
 
@@ -37,11 +99,42 @@ class Radio:
         self._serial_kwargs = serial_kwargs
         self._retry_sending = retry_sending
         self._change_baudrate = change_baudrate
+        # baud rate negotiated with the radio
+        self._baudrate = None
+
+        # connection supervision
+        self._reconnect = reconnect
+        self._reconnector = None
+        self._connected = asyncio.Event()
+        self._time_lost = None
 
         # setting timeouts
         self.confirmation_timeout = confirmation_timeout
         self.channel_timeout = channel_timeout
 
+        # channel access
+        self.max_attempts = max_attempts
+        self.backoff_slot = backoff_slot
+        self.channel_probe = channel_probe
+
+        # raw traffic capture
+        self._capture = capture
+
+        # statistics
+        self._stats = {
+            "frames": 0,
+            "channel_busy": 0,
+            "backoffs": 0,
+            "nacks": 0,
+            "probes": 0,
+            "status_polls": 0,
+            "reconnects": 0,
+            "downtime": 0.,
+        }
+
+        # sender id -> the same sender id, shared by the received records
+        self._senders = {}
+
         # queue setup
         # received data queue
         self.data_queue = asyncio.Queue()
@@ -54,12 +147,30 @@ class Radio:
         # initialize command return
         self._command_return = None
 
+        # when will the serial port have sent everything written so far
+        self._tx_free_at = 0
+        # when did the last byte of the last command leave the host
+        self.last_tx_done = None
+        # delay between sending a command and its confirmation
+        self._confirmation_delay = RunningStats()
+        self.last_confirmation_delay = None
+
+        # callable getting and returning every command right before it is
+        # written to the serial port, e.g. to timestamp it
+        self.before_write = None
+
+        # number of transmissions waiting in send
+        self._pending_sends = 0
+        # when was the channel status requested for the last time
+        self._last_poll = 0
+
         # only one writing is allowed at one
         self.RADIO_LOCK = asyncio.Lock()
 
-        # initialize receiver loop and connection handler as None
+        # initialize receiver loop, connection handler and poller as None
         self._receiver = None
         self._con_handler = None
+        self._poller = None
 
         # initialize reader/writer pair as None
         self._reader = None
@@ -74,11 +185,15 @@ class Radio:
         Cancel all ongoing loops.
         :return:
         """
-        for task in [self._con_handler, self._receiver]:
+        for task in [self._con_handler, self._receiver, self._poller,
+                     self._reconnector]:
             if task is not None:
                 logger.info(f"cancelling task {task}")
                 task.cancel()
-        self.is_destroyed.set_result(True)
+        if self._capture is not None:
+            self._capture.close()
+        if not self.is_destroyed.done():
+            self.is_destroyed.set_result(True)
 
         return None
 
@@ -98,9 +213,7 @@ class Radio:
         # open the serial connection as reader/writer pair
         logger.debug("setting up reader/writer pair")
         try:
-            loop = asyncio.get_event_loop()
-            transport, reader, writer = await open_serial_connection(
-                    loop=loop, **self._serial_kwargs)
+            await self._connect()
         except serial.SerialException as e:
             logger.exception(
                 f"opening serial port {self._serial_kwargs['url']}"
@@ -109,16 +222,6 @@ class Radio:
             raise DeviceNotFound(
                 f"could not open {self._serial_kwargs['url']}")
 
-        # manipulate Serial object via transport
-        transport.serial.parity = serial.PARITY_NONE
-        transport.serial.stopbits = serial.STOPBITS_TWO
-        transport.serial.bytesize = serial.EIGHTBITS
-
-        # now write everything to instance variables
-        self._reader = reader
-        self._writer = writer
-        self._transport = transport
-
         # change baud rate
         if self._change_baudrate:
             logger.info("try increasing baud rate to 57600")
@@ -126,6 +229,7 @@ class Radio:
             if success:
                 logger.info("baudrate set to 57600")
                 self._transport.serial.baudrate = 57600
+                self._baudrate = 57600
             else:
                 logger.info("incresing baudrate failed, staying at 9600")
 
@@ -139,6 +243,85 @@ class Radio:
         #     else:
         #         logger.info("retry still unchanged")
 
+    async def _connect(self):
+        """
+        Open the serial port with the negotiated baud rate and apply the
+        serial settings.
+        :return:
+        """
+        kwargs = dict(self._serial_kwargs)
+        if self._baudrate is not None:
+            kwargs["baudrate"] = self._baudrate
+
+        loop = asyncio.get_event_loop()
+        transport, reader, writer = await open_serial_connection(
+                loop=loop, **kwargs)
+
+        # manipulate Serial object via transport
+        transport.serial.parity = serial.PARITY_NONE
+        transport.serial.stopbits = serial.STOPBITS_TWO
+        transport.serial.bytesize = serial.EIGHTBITS
+
+        # now write everything to instance variables
+        self._reader = reader
+        self._writer = writer
+        self._transport = transport
+        self._connected.set()
+
+    def _connection_lost(self, error: Exception):
+        """
+        Handle a failing serial port.
+        Without reconnect the radio is destroyed and DeviceNotFound is
+        raised, otherwise the connection is reopened in the background.
+        Queues and waiting transmissions are kept.
+        :param error: Exception
+        :return:
+        """
+        if not self._reconnect:
+            self.destroy()
+            raise DeviceNotFound
+
+        if self._reconnector is not None and not self._reconnector.done():
+            return
+
+        logger.error(f"lost connection to the radio with {repr(error)}, "
+                     f"reconnecting")
+        self._connected.clear()
+        self._reader = None
+        self._writer = None
+        if self._transport is not None:
+            try:
+                self._transport.close()
+            except serial.SerialException:
+                pass
+            self._transport = None
+
+        self._time_lost = time.time()
+        self._reconnector = asyncio.get_event_loop().create_task(
+            self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        """
+        Reopen the serial port with exponential backoff until it succeeds.
+        :return:
+        """
+        delay = self.RECONNECT_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+            except (serial.SerialException, OSError) as e:
+                logger.warning(f"reconnecting failed with {repr(e)}, "
+                               f"retrying in {delay}s")
+                delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+                continue
+
+            downtime = time.time() - self._time_lost
+            self._stats["reconnects"] += 1
+            self._stats["downtime"] += downtime
+            logger.info(f"reconnected to the radio after {downtime:.1f}s")
+            return
+
     async def _increase_baudrate(self):
         """
         Increase the serial baudrate to maximum of 57600
@@ -151,6 +334,20 @@ class Radio:
         """
         return await self.write(set_repeat(True))
 
+    @property
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the received frames, the channel access and
+        the connection statistics. downtime is given in seconds, the
+        confirmation delay is measured from the moment the last byte of a
+        command left the host.
+        :return: dict
+        """
+        stats = dict(self._stats)
+        stats["connected"] = self._connected.is_set()
+        stats["confirmation_delay"] = self._confirmation_delay.as_dict()
+        return stats
+
     @property
     def maxsize(self):
         """
@@ -170,6 +367,68 @@ class Radio:
 
         return self._receiver
 
+    def start_channel_poller(self):
+        """
+        Return the channel status poller or start if not already started.
+        :return:
+        """
+        if self._poller is None:
+            loop = asyncio.get_event_loop()
+            self._poller = loop.create_task(self.channel_poller())
+
+        return self._poller
+
+    def _poll_interval(self) -> float:
+        """
+        Poll fast if a transmission is waiting for the channel or the channel
+        was busy recently, otherwise slow.
+        :return: float seconds
+        """
+        if self._pending_sends or not self.channel.free():
+            return self.POLL_FAST
+        if time.time() - self.channel.last_busy < self.POLL_BUSY_PERIOD:
+            return self.POLL_FAST
+        return self.POLL_SLOW
+
+    async def channel_poller(self):
+        """
+        Request the channel status from the radio at an adaptive rate, so the
+        ChannelStatus does not go stale.
+        The request is written directly, it neither waits for RADIO_LOCK nor
+        for a confirmation. No request is sent while a command waits for its
+        confirmation or if the radio reported its status on its own recently.
+        :return:
+        """
+        logger.info("starting channel status poller")
+        while True:
+            interval = self._poll_interval()
+            await asyncio.sleep(interval)
+
+            if self._writer is None:
+                continue
+
+            # the radio is talking anyway
+            if time.time() - self.channel.last_status < interval:
+                continue
+
+            # do not interfere with a pending confirmation
+            if self._command_return is not None:
+                continue
+
+            logger.debug("requesting channel status")
+            self._last_poll = time.time()
+            self._stats["status_polls"] += 1
+            command = channel_status_request()
+            if self._capture is not None:
+                self._capture.record_outbound(command)
+            self._schedule_tx(len(command))
+            try:
+                self._writer.write(command)
+            except (serial.serialutil.SerialException, ConnectionError) as e:
+                logger.exception("could not request channel status")
+                self._connection_lost(e)
+                await self._connected.wait()
+
     async def receiver(self):
         logger.info("starting receiver loop")
         while True:
@@ -184,10 +443,18 @@ class Radio:
             try:
                 buffer = await self._reader.readuntil(self.STOP)
                 # logger.debug(f"dumping buffer {buffer}")
-            except serial.serialutil.SerialException:
+            except (serial.serialutil.SerialException,
+                    asyncio.IncompleteReadError) as e:
                 logger.exception(f"could not access serial port during reading")
-                self.destroy()
-                raise DeviceNotFound
+                self._connection_lost(e)
+                await self._connected.wait()
+                continue
+
+            self._stats["frames"] += 1
+            if self._capture is not None:
+                self._capture.record_inbound(buffer)
+            if hooks.active:
+                hooks.emit(hooks.FRAME_RECEIVED, self, frame=buffer)
 
             # split buffer by stop byte bc it is still there
             # see docs for stream classes in asyncio
@@ -200,32 +467,32 @@ class Radio:
             try:
                 # SDM
                 if message[0] == b'g'[0] and message[1] == b'F'[0]:
-                    logger.debug(f"got SDM {message}")
+                    logger.debug("got SDM %s", message)
                     self.channel.update()
-                    self.process_message(message)
+                    self.process_message(message, kind=Inbound.SDM)
 
                 # LDM
                 elif message[0] == b'g'[0] and message[1] == b'G'[0]:
-                    logger.debug(f"got LDM {message}")
+                    logger.debug("got LDM %s", message)
                     self.channel.update()
-                    self.process_message(message)
+                    self.process_message(message, kind=Inbound.LDM)
 
                 # StatusMessage
                 elif message[0] == b'g'[0] and message[1] == b'E'[0]:
-                    logger.debug(f"got status {message}")
+                    logger.debug("got status %s", message)
                     self.channel.update()
                     self.process_status(message)
                     pass
 
                 # Device status
                 elif message[0] == b'J'[0] and message[1] == b'A'[0]:
-                    logger.debug(f"got device status {message}")
+                    logger.debug("got device status %s", message)
                     self.channel.update()
                     self.process_device(message)
 
                 # DisplayContent
                 elif message[0] == b'J'[0] and message[1] == b'E'[0]:
-                    logger.debug(f"got display content {message}")
+                    logger.debug("got display content %s", message)
                     pass
 
                 # transmission success
@@ -250,30 +517,42 @@ class Radio:
             except IndexError:
                 pass
 
-    def process_message(self, message: bytes):
+    def _sender(self, message: bytes) -> bytes:
+        """
+        Extract the sender id, all records of a sender share one bytes
+        object.
+        :param message: bytes
+        :return: bytes
+        """
+        sender = message[3:8]
+        if len(self._senders) >= self.MAX_SENDERS:
+            self._senders.clear()
+        return self._senders.setdefault(sender, sender)
+
+    def process_message(self, message: bytes, kind: str = Inbound.LDM):
         """
         Processes long and short messages send directly
         to the unit (SDM and LDM).
+        The text is not copied, the record keeps the frame.
         :param message: bytes
-        :return: test: bytes
+        :param kind: str Inbound.SDM or Inbound.LDM
+        :return:
         """
-        sender = message[3:8]  # extract sender ID
-        text = message[14:]  # extract message
-        logger.debug(f"Sender-ID: {sender}")
-        logger.debug(f"Message: {text}")
-        self.data_queue.put_nowait([sender, text])
+        sender = self._sender(message)  # extract sender ID
+        logger.debug("Sender-ID: %s", sender)
+        # the message starts at 14
+        self.data_queue.put_nowait(Inbound(sender, message, kind, offset=14))
 
     def process_status(self, message: bytes):
         """
         Processes status messages.
         :param message: bytes
-        :return: status: str
+        :return:
         """
-        sender = message[3:8]
+        sender = self._sender(message)
         status = message[14:]
-        logger.debug(f"Sender-ID: {sender}")
-        logger.debug(f"Status: {status}")
-        self.status_queue.put([sender, status])
+        logger.debug("Sender-ID: %s, Status: %s", sender, status)
+        self.status_queue.put_nowait(Inbound(sender, status, Inbound.STATUS))
 
     def process_device(self, message: bytes):
         """
@@ -305,20 +584,69 @@ class Radio:
         else:
             pass
 
+    @property
+    def baudrate(self) -> int:
+        """
+        The baud rate of the serial connection.
+        :return: int
+        """
+        if self._baudrate is not None:
+            return self._baudrate
+        return self._serial_kwargs.get("baudrate", 9600)
+
+    def _schedule_tx(self, length: int) -> float:
+        """
+        Account for length bytes written to the serial port.
+        Returns when the last of these bytes will have left the host.
+        :param length: int
+        :return: float time.monotonic timestamp
+        """
+        start = max(time.monotonic(), self._tx_free_at)
+        self._tx_free_at = start + length * self.BITS_PER_BYTE / self.baudrate
+        return self._tx_free_at
+
     async def write(self, command: bytes, await_response: bool = True):
         """
         low level write something to serial device
         :param command:
         :return:
         """
+        # the confirmation of a command must not be mixed up with an answer
+        # to a status request
+        if await_response:
+            guard = self._last_poll + self.POLL_GUARD - time.time()
+            if guard > 0:
+                await asyncio.sleep(guard)
+
         self._command_return = asyncio.Future() if await_response else None
-        try:
-            self._writer.write(command)
-        except serial.serialutil.SerialException as e:
-            logger.exception(f"could not access serial port during writing"
-                             f"{repr(e)}")
-            self.destroy()
-            raise DeviceNotFound
+        if self.before_write is not None:
+            command = self.before_write(command)
+        if self._capture is not None:
+            self._capture.record_outbound(command)
+        if hooks.active:
+            hooks.emit(hooks.WRITE_STARTED, self, command=command)
+        while True:
+            # wait while the connection is reopened
+            if self._writer is None and self._reconnect:
+                await self._connected.wait()
+            try:
+                self._writer.write(command)
+                # respect the flow control of the transport
+                await self._writer.drain()
+                break
+            except (serial.serialutil.SerialException, ConnectionError) as e:
+                logger.exception(f"could not access serial port during writing"
+                                 f"{repr(e)}")
+                self._connection_lost(e)
+
+        # the transport has handed the bytes over, now wait until the serial
+        # port actually sent them, so the confirmation timeout and the
+        # confirmation delay measure the radio and not the host buffers
+        done = self._schedule_tx(len(command))
+        delay = done - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.last_tx_done = time.time()
 
         logger.debug("actual writing to serial finished")
 
@@ -328,17 +656,26 @@ class Radio:
             try:
                 result = await asyncio.wait_for(self._command_return,
                                                 self.confirmation_timeout)
-                logger.debug(f"write result {result}")
+                logger.debug("write result %s", result)
+                self.last_confirmation_delay = time.time() - self.last_tx_done
+                self._confirmation_delay.add(self.last_confirmation_delay)
             except asyncio.TimeoutError:
                 logger.error("confirmation of write timed out")
+                if hooks.active:
+                    hooks.emit(hooks.WRITE_FINISHED, self, command=command,
+                               result=False)
                 raise ConfirmationTimeout
             finally:
                 self._command_return = None
-            return result
         # if only the channel status should be checked we cannot wait
         # for confirmations, just go on
         else:
-            return None
+            result = None
+
+        if hooks.active:
+            hooks.emit(hooks.WRITE_FINISHED, self, command=command,
+                       result=result)
+        return result
 
     async def send(self, command):
         """
@@ -346,9 +683,16 @@ class Radio:
         :param command:
         :return:
         """
+        self._pending_sends += 1
+        try:
+            return await self._send(command)
+        finally:
+            self._pending_sends -= 1
+
+    async def _send(self, command):
         # radio shows strange behaviour if next message is sent befor display
         # is updated, give it 5 seconds
-        await asyncio.sleep(5)
+        await asyncio.sleep(self.SETTLE_TIME)
 
         if self._command_return is not None:
             logger.debug("waiting for current command to end")
@@ -359,31 +703,71 @@ class Radio:
         async with self.RADIO_LOCK:
             # if True:
             logger.debug("lock acquired")
-            logger.debug("checking if channel is free")
-            if not self.channel.free():
-                # behaviour not predictable
-                # await self.write(command=channel_status_request(b"00002"),
-                #                  await_response=False)
-
-                # also not always working
-                # trying something dirty, just starting a call
-                logger.debug("starting call")
-                await self.write(command=startcall(), await_response=True)
-                await asyncio.sleep(1)
-                logger.debug("ending call")
-                await self.write(command=endcall(), await_response=True)
-
-                logger.debug("waiting for channel to become free")
-                try:
-                    # a force to set the channel free after a certain
-                    # inactivity is implemented
-                    await asyncio.wait_for(self.channel.wait_for_free(),
-                                           self.channel_timeout)
-                except asyncio.TimeoutError:
+            deadline = time.monotonic() + self.channel_timeout
+            attempt = 0
+            while True:
+                logger.debug("checking if channel is free")
+                if self.channel.free():
+                    logger.debug("channel is free")
+                    result = await self.write(command)
+                    if result:
+                        return result
+
+                    # the radio did not get the message through, e.g.
+                    # someone else was talking at the same time
+                    self._stats["nacks"] += 1
+                    if not self._retry_sending:
+                        return result
+                else:
+                    self._stats["channel_busy"] += 1
+                    if self.channel_probe and attempt == 0:
+                        await self._probe_channel()
+
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    if self.channel.free():
+                        raise SendMaxRetries
+                    raise ChannelTimeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     raise ChannelTimeout
 
-            logger.debug("channel is free")
-            return await self.write(command)
+                # randomized binary exponential backoff, but do not try
+                # before the channel is expected to be free
+                delay = self.backoff_slot * random.uniform(
+                    0, 2 ** min(attempt, self.MAX_BACKOFF_EXPONENT))
+                if not self.channel.free():
+                    free_at, _length = self.channel.next_free_window()
+                    delay = max(delay, free_at - time.time())
+
+                # do not wait past the deadline, the last attempt is made
+                # right at it
+                delay = min(delay, remaining)
+
+                logger.debug("backing off for %.2fs (attempt %d)", delay,
+                             attempt)
+                self._stats["backoffs"] += 1
+                await asyncio.sleep(delay)
+
+    async def _probe_channel(self):
+        """
+        Provoke a status update of the channel by starting and ending a call.
+        This occupies the channel for a second, it is only used if
+        channel_probe is set.
+        :return:
+        """
+        # behaviour not predictable
+        # await self.write(command=channel_status_request(b"00002"),
+        #                  await_response=False)
+
+        # also not always working
+        # trying something dirty, just starting a call
+        self._stats["probes"] += 1
+        logger.debug("starting call")
+        await self.write(command=startcall(), await_response=True)
+        await asyncio.sleep(1)
+        logger.debug("ending call")
+        await self.write(command=endcall(), await_response=True)
 
     async def send_LDM(self, target_id: bytes = None, payload: bytes = None):
         assert (target_id is not None) and (payload is not None),\
@@ -397,3 +781,95 @@ class Radio:
 
         cmd = longMessage2Unit(unitID=target_id, message=payload)
         return await self.send(cmd)
+
+    async def send_group_LDM(self, group_id: bytes = None,
+                             payload: bytes = None):
+        assert (group_id is not None) and (payload is not None),\
+            "group and payload have to be set!"
+
+        logger.info(
+            f"sending LDM with payload length {len(payload)} "
+            f"to group {group_id}"
+        )
+        if len(payload) > self.MAXSIZE:
+            raise PayloadTooLarge
+
+        cmd = longGroupMessage(groupID=group_id, message=payload)
+        return await self.send(cmd)
+
+    async def send_broadcast_LDM(self, payload: bytes = None):
+        assert payload is not None, "payload has to be set!"
+
+        logger.info(
+            f"broadcasting LDM with payload length {len(payload)}"
+        )
+        if len(payload) > self.MAXSIZE:
+            raise PayloadTooLarge
+
+        cmd = longMessage2all(message=payload)
+        return await self.send(cmd)
+
+    async def send_SDM(self, target_id: bytes = None, payload: bytes = None):
+        assert (target_id is not None) and (payload is not None),\
+            "target and payload have to be set!"
+
+        logger.info(
+            f"sending SDM with payload length {len(payload)} to {target_id}"
+        )
+        if len(payload) > self.SDM_MAXSIZE:
+            raise PayloadTooLarge
+
+        cmd = shortMessage2Unit(unitID=target_id, message=payload)
+        return await self.send(cmd)
+
+    async def send_group_SDM(self, group_id: bytes = None,
+                             payload: bytes = None):
+        assert (group_id is not None) and (payload is not None),\
+            "group and payload have to be set!"
+
+        logger.info(
+            f"sending SDM with payload length {len(payload)} "
+            f"to group {group_id}"
+        )
+        if len(payload) > self.SDM_MAXSIZE:
+            raise PayloadTooLarge
+
+        cmd = shortGroupMessage(groupID=group_id, message=payload)
+        return await self.send(cmd)
+
+    async def send_broadcast_SDM(self, payload: bytes = None):
+        assert payload is not None, "payload has to be set!"
+
+        logger.info(
+            f"broadcasting SDM with payload length {len(payload)}"
+        )
+        if len(payload) > self.SDM_MAXSIZE:
+            raise PayloadTooLarge
+
+        cmd = shortMessage2all(message=payload)
+        return await self.send(cmd)
+
+    async def send_status(self, target_id: bytes = None,
+                          status: bytes = None):
+        assert (target_id is not None) and (status is not None),\
+            "target and status have to be set!"
+
+        logger.info(f"sending status {status} to {target_id}")
+        cmd = setUnitStatus(unitID=target_id, status=status)
+        return await self.send(cmd)
+
+    async def send_group_status(self, group_id: bytes = None,
+                                status: bytes = None):
+        assert (group_id is not None) and (status is not None),\
+            "group and status have to be set!"
+
+        logger.info(f"sending status {status} to group {group_id}")
+        cmd = setGroupStatus(groupID=group_id, status=status)
+        return await self.send(cmd)
+
+    async def send_broadcast_status(self, status: bytes = None):
+        assert status is not None, "status has to be set!"
+
+        logger.info(f"broadcasting status {status}")
+        cmd = setStatus2all(status=status)
+        return await self.send(cmd)
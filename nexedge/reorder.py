@@ -0,0 +1,209 @@
+import time
+import logging
+from collections import OrderedDict
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+class Loss:
+    """
+    Gap in the sequence of a link, delivered in place of the transmissions
+    which never arrived.
+    """
+    __slots__ = ("first", "count")
+
+    def __init__(self, first: int, count: int):
+        """
+        :param first: int sequence number of the first missing transmission
+        :param count: int number of missing transmissions
+        """
+        self.first = first
+        self.count = count
+
+    def __repr__(self):
+        return f"Loss(first={self.first}, count={self.count})"
+
+    def __eq__(self, other):
+        return (type(other) is Loss and
+                (self.first, self.count) == (other.first, other.count))
+
+
+class ReorderBuffer:
+    """
+    Releases the transmissions of every link in the order of their sequence
+    numbers.
+
+    A transmission arriving ahead of the next expected one is held back
+    until the gap is filled. The gap is given up as lost, when
+    - a transmission `max_size` or more ahead of the expected one arrives or
+    - the oldest held transmission waited for `max_hold` seconds (see
+      expire).
+    The lost sequence numbers are reported with a Loss entry right before
+    the transmission following them. Transmissions arriving after their gap
+    was given up are dropped, so the entries of a link are always released
+    in order. A link is expected to start at sequence number 0, unless its
+    first transmission is `max_size` or more ahead, then the receiver joined
+    a running link and starts there.
+
+    Sequence numbers are compared with serial number arithmetic and wrap at
+    `modulo`. A changed session id restarts the link, like in
+    DuplicateFilter. Memory is bounded by `max_links` links of `max_size`
+    held transmissions each.
+    """
+
+    def __init__(self,
+                 max_size: int = 16,
+                 max_hold: float = 2.,
+                 max_links: int = 256,
+                 modulo: int = 2 ** 16):
+        """
+        :param max_size: int number of transmissions held per link
+        :param max_hold: float seconds a transmission is held at most
+        :param max_links: int number of links remembered
+        :param modulo: int the sequence numbers wrap at this value
+        """
+        assert 0 < max_size < modulo // 2, "max_size has to be below modulo/2"
+        self.max_size = max_size
+        self.max_hold = max_hold
+        self.max_links = max_links
+        self.modulo = modulo
+
+        # link -> [session, expected sequence, {sequence: (item, held since)}]
+        self._links = OrderedDict()
+        self.held = 0
+        self.lost = 0
+        self.late = 0
+
+    def __len__(self):
+        return len(self._links)
+
+    def reset(self, link=None):
+        """
+        Forget the state of one or all links, held transmissions are dropped.
+        :param link: hashable or None for all
+        :return:
+        """
+        if link is None:
+            self._links.clear()
+        else:
+            self._links.pop(link, None)
+
+    def push(self, link, sequence: int, item, session=None,
+             now: float = None) -> list:
+        """
+        Add a received transmission.
+        :param link: hashable, e.g. (sender, group)
+        :param sequence: int
+        :param item: the transmission
+        :param session: session id of the sender
+        :param now: float time.monotonic()
+        :return: list of items and Loss entries released in order
+        """
+        sequence %= self.modulo
+        now = time.monotonic() if now is None else now
+        state = self._links.get(link)
+
+        if state is None or state[0] != session:
+            # unknown link or the sender was restarted, whatever is still
+            # held belongs to the former session
+            released = [] if state is None else self._drain(state)
+            if sequence >= self.max_size:
+                # joined a running link, there is nothing to wait for
+                self._remember(link,
+                               [session, (sequence + 1) % self.modulo, {}])
+                return released + [item]
+            # the first transmissions of the link may still be on their way
+            self._remember(link, [session, 0, {}])
+            return released + self.push(link, sequence, item, session, now)
+
+        self._links.move_to_end(link)
+        _session, expected, held = state
+        delta = (sequence - expected) % self.modulo
+
+        if delta >= self.modulo // 2:
+            behind = self.modulo - delta
+            if behind > self.max_size:
+                # far behind, the sender restarted without a session id
+                released = self._drain(state)
+                state[1] = (sequence + 1) % self.modulo
+                return released + [item]
+            # its gap was already given up
+            logger.info(f"dropping late transmission {sequence} of {link}")
+            self.late += 1
+            return []
+
+        if sequence in held:
+            return []
+        held[sequence] = (item, now)
+        self.held += delta > 0
+
+        released = []
+        # make room for the new transmission
+        while sequence in held and\
+                (sequence - state[1]) % self.modulo >= self.max_size:
+            self._skip(state, released)
+        self._release(state, released)
+        return released
+
+    def expire(self, now: float = None) -> list:
+        """
+        Give up the gaps in front of transmissions held for longer than
+        max_hold.
+        :param now: float time.monotonic()
+        :return: list of (link, released entries)
+        """
+        now = time.monotonic() if now is None else now
+        result = []
+        for link, state in self._links.items():
+            held = state[2]
+            released = []
+            while held and min(since for _item, since in held.values()) +\
+                    self.max_hold <= now:
+                self._skip(state, released)
+            if released:
+                result.append((link, released))
+        return result
+
+    def next_deadline(self):
+        """
+        Time (time.monotonic()) at which expire has to be called next.
+        :return: float or None if nothing is held
+        """
+        oldest = [since for state in self._links.values()
+                  for _item, since in state[2].values()]
+        if not oldest:
+            return None
+        return min(oldest) + self.max_hold
+
+    def _release(self, state, released: list):
+        # release the consecutive transmissions starting at the expected one
+        held = state[2]
+        expected = state[1]
+        while expected in held:
+            released.append(held.pop(expected)[0])
+            expected = (expected + 1) % self.modulo
+        state[1] = expected
+
+    def _skip(self, state, released: list):
+        # give up the gap in front of the next held transmission
+        expected, held = state[1], state[2]
+        count = min((sequence - expected) % self.modulo for sequence in held)
+        if count:
+            released.append(Loss(expected, count))
+            self.lost += count
+            state[1] = (expected + count) % self.modulo
+        self._release(state, released)
+
+    def _drain(self, state) -> list:
+        # release everything held, the gaps are reported as losses
+        released = []
+        while state[2]:
+            self._skip(state, released)
+        return released
+
+    def _remember(self, link, state):
+        self._links[link] = state
+        self._links.move_to_end(link)
+        while len(self._links) > self.max_links:
+            self._links.popitem(last=False)
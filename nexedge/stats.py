@@ -0,0 +1,53 @@
+import logging
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+class RunningStats:
+    """
+    Count, mean, minimum and maximum of a series of measurements without
+    keeping the measurements themselves.
+    """
+    __slots__ = ("count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value: float):
+        """
+        Add a measurement.
+        :param value: float
+        :return:
+        """
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self):
+        """
+        Mean of all measurements or None if there are none.
+        :return: float
+        """
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def as_dict(self) -> dict:
+        """
+        Return the statistics as dictionary.
+        :return: dict
+        """
+        return {
+            "count":    self.count,
+            "mean":     self.mean,
+            "min":      self.minimum,
+            "max":      self.maximum,
+        }
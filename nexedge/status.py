@@ -0,0 +1,83 @@
+import logging
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+class StatusRegistry:
+    """
+    Maps the numeric status codes of the radio to application states.
+
+    A status message only carries a short code, but it is far cheaper on
+    air than a data message. Enumerated states (e.g. "OPN", "CLS") can be
+    registered with a code and sent as status instead.
+    All units have to register the same codes.
+
+    Codes are transmitted as zero padded decimal numbers of `width` digits.
+    """
+
+    def __init__(self, width: int = 3):
+        """
+        :param width: int number of digits of a status code
+        """
+        assert width > 0, "width has to be positive"
+        self.width = width
+
+        # code -> state and state -> code
+        self._states = {}
+        self._codes = {}
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, state):
+        return state in self._codes
+
+    def register(self, code: int, state):
+        """
+        Register a state with a status code.
+        :param code: int
+        :param state: hashable e.g. str or enum member
+        :return:
+        """
+        assert type(code) is int and 0 <= code < 10 ** self.width,\
+            f"code has to be an integer with at most {self.width} digits"
+        assert self._states.get(code, state) == state,\
+            f"code {code} is already registered for {self._states.get(code)}"
+        assert self._codes.get(state, code) == code,\
+            f"state {state} is already registered with {self._codes.get(state)}"
+        self._states[code] = state
+        self._codes[state] = code
+
+    def register_enum(self, enum):
+        """
+        Register all members of an enum with integer values as codes.
+        :param enum: enum.Enum subclass
+        :return:
+        """
+        for member in enum:
+            self.register(member.value, member)
+
+    def encode(self, state) -> bytes:
+        """
+        Return the status code of a state as sent to the radio.
+        :param state:
+        :return: bytes
+        """
+        code = self._codes.get(state)
+        if code is None:
+            raise ValueError(f"state {state} is not registered")
+        return f"{code:0{self.width}d}".encode()
+
+    def decode(self, status: bytes):
+        """
+        Return the state of a received status code or None if the code is
+        not registered.
+        :param status: bytes
+        :return:
+        """
+        try:
+            code = int(status)
+        except ValueError:
+            return None
+        return self._states.get(code)
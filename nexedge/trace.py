@@ -0,0 +1,253 @@
+import time
+import logging
+from collections import deque
+
+# local imports
+from .stats import RunningStats
+
+# setup logging
+logger = logging.getLogger(__name__)
+
+
+# Trace fields carried in the transmission header (see Header), all times
+# are milliseconds since the epoch in the clock of the unit which set them,
+# hex encoded with a fixed width.
+ORIGIN = "o"        # send() was called
+ENQUEUED = "q"      # the transmission was handed to the radio
+ON_AIR = "a"        # the transmission was written to the serial port
+HOPS = "h"          # number of relays the transmission passed
+# echo of the last on-air time received from the target and the local time
+# it was received at, used to estimate the clock offset between the units
+ECHO = "e"
+ECHO_RECEIVED = "r"
+
+WIDTH = 11
+# stamped later, has the same width as a real time
+PLACEHOLDER = "0" * WIDTH
+
+
+def encode_time(timestamp: float) -> str:
+    """
+    Encode a time.time() timestamp as trace field value.
+    :param timestamp: float
+    :return: str
+    """
+    return f"{int(timestamp * 1000):0{WIDTH}x}"
+
+
+def decode_time(value: str):
+    """
+    Reverse encode_time, placeholders which were never stamped give None.
+    :param value: str
+    :return: float or None
+    """
+    if value is None or value == PLACEHOLDER:
+        return None
+    return int(value, 16) / 1000
+
+
+class ClockOffset:
+    """
+    Estimates the clock offset to another unit from round trips like NTP.
+
+    A round trip consists of the time t1 a transmission left this unit, the
+    time t2 the other unit received it, the time t3 the other unit sent its
+    answer and the time t4 this unit received the answer. The offset of the
+    other clock is ((t2 - t1) + (t3 - t4)) / 2, the error is at most half
+    of the round trip delay (t4 - t1) - (t3 - t2). Of the last `samples`
+    round trips the one with the smallest delay is trusted.
+    """
+
+    def __init__(self, samples: int = 8):
+        """
+        :param samples: int number of round trips remembered
+        """
+        # (delay, offset)
+        self._samples = deque(maxlen=samples)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, t1: float, t2: float, t3: float, t4: float):
+        """
+        Add a round trip.
+        :param t1: float local send time
+        :param t2: float remote receive time
+        :param t3: float remote send time
+        :param t4: float local receive time
+        :return:
+        """
+        delay = (t4 - t1) - (t3 - t2)
+        if delay < 0:
+            # the timestamps do not fit together, e.g. a stale echo
+            return
+        self._samples.append((delay, ((t2 - t1) + (t3 - t4)) / 2))
+
+    @property
+    def offset(self):
+        """
+        Remote clock minus local clock in seconds or None without samples.
+        :return: float
+        """
+        if not self._samples:
+            return None
+        return min(self._samples)[1]
+
+    @property
+    def delay(self):
+        """
+        Round trip delay of the trusted sample.
+        :return: float
+        """
+        if not self._samples:
+            return None
+        return min(self._samples)[0]
+
+
+class LinkTrace:
+    """
+    Aggregated latencies of the transmissions received from one unit.
+    All values are in seconds:
+        latency     from send() on the sender to the data_handler
+        queued      waiting for the other transmissions of the sender
+        access      settle time, channel access and serial transfer
+        air         from the serial port of the sender to reception here
+        handling    from reception to the data_handler
+    """
+    PARTS = ("latency", "queued", "access", "air", "handling")
+
+    def __init__(self):
+        self.clock = ClockOffset()
+        self.hops = RunningStats()
+        for part in self.PARTS:
+            setattr(self, part, RunningStats())
+
+    def as_dict(self) -> dict:
+        stats = {part: getattr(self, part).as_dict() for part in self.PARTS}
+        stats["hops"] = self.hops.as_dict()
+        stats["offset"] = self.clock.offset
+        stats["offset_error"] = (None if self.clock.delay is None
+                                 else self.clock.delay / 2)
+        return stats
+
+
+class Tracer:
+    """
+    Adds the trace fields to outgoing transmissions and evaluates them for
+    received ones, see RadioCommunicator(trace=True).
+
+    Without a clock offset estimate the clocks of both units are assumed to
+    be in sync. An estimate is available once both units traced
+    transmissions to each other.
+    """
+
+    def __init__(self, max_links: int = 256):
+        """
+        :param max_links: int number of links aggregated
+        """
+        self.max_links = max_links
+        # link -> LinkTrace
+        self._links = {}
+        # link -> (their on-air time, our receive time)
+        self._echo = {}
+
+    def fields(self, link: bytes = None) -> dict:
+        """
+        Header fields of a new transmission.
+        :param link: bytes target id for direct transmissions
+        :return: dict
+        """
+        fields = {
+            ORIGIN:     encode_time(time.time()),
+            ENQUEUED:   PLACEHOLDER,
+            ON_AIR:     PLACEHOLDER,
+            HOPS:       "0",
+        }
+        echo = self._echo.get(link)
+        if echo is not None:
+            fields[ECHO] = encode_time(echo[0])
+            fields[ECHO_RECEIVED] = encode_time(echo[1])
+        return fields
+
+    @staticmethod
+    def stamp(data: bytes, field: str, timestamp: float = None) -> bytes:
+        """
+        Replace the placeholder of a trace field by the current time.
+        :param data: bytes transmission or radio command
+        :param field: str ENQUEUED or ON_AIR
+        :param timestamp: float defaults to now
+        :return: bytes
+        """
+        placeholder = f".{field}={PLACEHOLDER}".encode()
+        # the header is at the start of the data
+        position = data.find(placeholder, 0, 512)
+        if position < 0:
+            return data
+        value = encode_time(time.time() if timestamp is None else timestamp)
+        start = position + 3
+        return data[:start] + value.encode() + data[start + WIDTH:]
+
+    def stamp_enqueued(self, data: bytes) -> bytes:
+        return self.stamp(data, ENQUEUED)
+
+    def stamp_on_air(self, data: bytes) -> bytes:
+        return self.stamp(data, ON_AIR)
+
+    def observe(self, link: bytes, fields: dict, received: float) -> dict:
+        """
+        Evaluate the trace fields of a received transmission.
+        :param link: bytes sender id
+        :param fields: dict header fields
+        :param received: float time the radio received the transmission
+        :return: dict latencies of this transmission in seconds, see
+        LinkTrace, None if the transmission carries no trace
+        """
+        origin = decode_time(fields.get(ORIGIN))
+        if origin is None:
+            return None
+        enqueued = decode_time(fields.get(ENQUEUED))
+        on_air = decode_time(fields.get(ON_AIR))
+
+        trace = self._links.get(link)
+        if trace is None:
+            if len(self._links) >= self.max_links:
+                self._links.pop(next(iter(self._links)))
+            trace = self._links[link] = LinkTrace()
+
+        # round trip of our last transmission to the sender
+        echo = decode_time(fields.get(ECHO))
+        echo_received = decode_time(fields.get(ECHO_RECEIVED))
+        if None not in (echo, echo_received, on_air):
+            trace.clock.add(echo, echo_received, on_air, received)
+        if on_air is not None:
+            self._echo[link] = (on_air, received)
+            if len(self._echo) > self.max_links:
+                self._echo.pop(next(iter(self._echo)))
+
+        # convert the times of the sender into our clock
+        offset = trace.clock.offset or 0.
+        now = time.time()
+        result = {
+            "latency":  now - (origin - offset),
+            "queued":   None if enqueued is None else enqueued - origin,
+            "access":   (None if None in (enqueued, on_air)
+                         else on_air - enqueued),
+            "air":      None if on_air is None else received - (on_air -
+                                                                offset),
+            "handling": now - received,
+            "hops":     int(fields.get(HOPS, "0"), 16) + 1,
+            "offset":   trace.clock.offset,
+        }
+        for part in LinkTrace.PARTS:
+            if result[part] is not None:
+                getattr(trace, part).add(result[part])
+        trace.hops.add(result["hops"])
+        return result
+
+    def stats(self) -> dict:
+        """
+        Aggregated latencies per sender.
+        :return: dict
+        """
+        return {link.decode(): trace.as_dict()
+                for link, trace in self._links.items()}
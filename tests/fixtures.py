@@ -1,6 +1,7 @@
-from nexedge import Radio, ChannelStatus
+from nexedge import Radio, ChannelStatus, RadioCommunicator
 
 import pytest
+import pytest_asyncio
 import asyncio
 import logging
 logger = logging.getLogger(__name__)
@@ -33,3 +34,53 @@ def no_radio():
     :return:
     """
     return Radio(serial_kwargs=SERIAL_KWARGS_FAIL, **RADIO_KWARGS)
+
+
+@pytest_asyncio.fixture
+async def communicator():
+    """
+    Fixture creating RadioCommunicators on the loop device, all of them are
+    destroyed at the end of the test, even if it fails.
+    :return: function taking the keyword arguments of RadioCommunicator
+    """
+    coms = []
+
+    def create(**kwargs):
+        com = RadioCommunicator(serial_kwargs=SERIAL_KWARGS, **kwargs)
+        coms.append(com)
+        return com
+
+    yield create
+    for com in coms:
+        com.destroy()
+    await asyncio.sleep(0)
+
+
+def stub_send(com, send):
+    """
+    Replace the SDM and LDM send methods of the radio of a communicator.
+    :param com: RadioCommunicator
+    :param send: coroutine function taking target_id and payload
+    :return: send
+    """
+    com._radio.send_SDM = send
+    com._radio.send_LDM = send
+    return send
+
+
+def connect(com, other, sender: bytes):
+    """
+    Deliver every transmission of a communicator to another one, a
+    loopback without radio.
+    :param com: RadioCommunicator sending
+    :param other: RadioCommunicator receiving
+    :param sender: bytes unit id of com as seen by other
+    :return:
+    """
+    async def send(target_id, payload):
+        # give concurrent senders a chance to interleave
+        await asyncio.sleep(0)
+        other._radio.data_queue.put_nowait([sender, payload])
+        return True
+
+    stub_send(com, send)
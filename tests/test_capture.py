@@ -0,0 +1,31 @@
+from nexedge.capture import TrafficCapture, read_capture, INBOUND, OUTBOUND
+
+import pytest
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "radio.cap")
+
+
+def test_roundtrip(path):
+    with TrafficCapture(path, capacity=1024) as capture:
+        capture.record_inbound(b"\x02gGU00002000000abc\x03")
+        capture.record_outbound(b"\x02JCA\x03")
+
+    records = list(read_capture(path))
+    assert [(direction, data) for _ts, direction, data in records] == [
+        (INBOUND, b"\x02gGU00002000000abc\x03"),
+        (OUTBOUND, b"\x02JCA\x03"),
+    ]
+
+
+def test_ring_buffer_keeps_newest(path):
+    with TrafficCapture(path, capacity=100) as capture:
+        for n in range(20):
+            capture.record_inbound(b"%02d" % n)
+
+    records = [data for _ts, _direction, data in read_capture(path)]
+    assert records[-1] == b"19"
+    assert records == [b"%02d" % n for n in range(20 - len(records), 20)]
+    assert len(records) == 100 // (TrafficCapture.RECORD.size + 2)
@@ -0,0 +1,76 @@
+from nexedge import ChannelStatus
+
+import pytest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(mocker):
+    clock = Clock()
+    mocker.patch("nexedge.channel.time.time", clock)
+    return clock
+
+
+@pytest.fixture
+def channel(clock):
+    channel = ChannelStatus(free_threshold=4, force_threshold=10)
+    channel.update()
+    return channel
+
+
+def busy(channel, clock, duration, gap):
+    channel.set_green()
+    clock.now += duration
+    # the led is reported repeatedly while the channel is busy
+    channel.set_green()
+    channel.set_free()
+    clock.now += gap
+    channel.update()
+
+
+def test_duty_cycle(channel, clock):
+    busy(channel, clock, duration=6, gap=24)
+    busy(channel, clock, duration=6, gap=24)
+    assert channel.duty_cycle(window=60) == pytest.approx(.2)
+
+
+def test_hold_time_without_history(channel):
+    assert channel.hold_time() == channel.free_threshold
+
+
+def test_hold_time_on_quiet_channel(channel, clock):
+    for _ in range(ChannelStatus.MIN_GAP_SAMPLES + 1):
+        busy(channel, clock, duration=2, gap=60)
+    assert channel.hold_time() == channel.free_threshold
+
+
+def test_hold_time_limit(clock):
+    channel = ChannelStatus(free_threshold=4, force_threshold=10, min_hold=1)
+    channel.update()
+    for _ in range(ChannelStatus.MIN_GAP_SAMPLES + 1):
+        busy(channel, clock, duration=2, gap=.1)
+    assert channel.hold_time() == 1
+
+def test_hold_time_adapts_to_gaps(channel, clock):
+    for _ in range(ChannelStatus.MIN_GAP_SAMPLES + 1):
+        busy(channel, clock, duration=2, gap=1)
+    assert channel.hold_time() == pytest.approx(1.5)
+    assert not channel.free()
+    clock.now += 1
+    assert channel.free()
+
+
+def test_next_free_window_while_busy(channel, clock):
+    busy(channel, clock, duration=3, gap=10)
+    busy(channel, clock, duration=5, gap=10)
+    channel.set_red()
+    start, length = channel.next_free_window()
+    assert start == pytest.approx(clock.now + 4 + channel.hold_time())
+    assert length == pytest.approx(10)
@@ -0,0 +1,50 @@
+from nexedge.codec import Codec
+from nexedge.exceptions import PayloadTooLarge
+
+import sys
+import string
+import subprocess
+from random import Random
+import pytest
+
+
+def test_codec_roundtrip():
+    codec = Codec()
+    data = {"title": "DASA 2017", "id": 186, "current_state": "OPN"}
+    assert codec.unpickle(codec.pickle(data)) == data
+    assert codec.unpickle_many(codec.pickle_many([data, {}])) == [data, {}]
+
+
+def test_codec_import_without_serial():
+    output = subprocess.check_output(
+        [sys.executable, "-c",
+         "import sys\n"
+         "import nexedge.codec\n"
+         "print(sorted(name for name in sys.modules if 'serial' in name or "
+         "name in ('nexedge.radio', 'nexedge.communicator')))"])
+    assert output.strip() == b"[]"
+
+
+def test_pickle_within():
+    codec = Codec()
+    data = {"title": "DASA 2017", "id": 186, "current_state": "OPN"}
+    assert codec.pickle_within(data, 4000) == codec.pickle(data)
+
+    # too large to accept without compressing, but compresses well
+    repetitive = {"x": "abc" * 2000}
+    assert codec.pickle_within(repetitive, 4000) == codec.pickle(repetitive)
+
+    with pytest.raises(PayloadTooLarge) as info:
+        codec.pickle_within(repetitive, 20)
+    assert info.value.excess == len(codec.pickle(repetitive)) - 20
+
+
+def test_pickle_within_gives_up_early():
+    random = Random(1)
+    data = {"x": "".join(random.choice(string.printable)
+                         for _ in range(200000))}
+    with pytest.raises(PayloadTooLarge) as info:
+        Codec().pickle_within(data, 4000)
+    excess = len(Codec().pickle(data)) - 4000
+    assert "gave up" in str(info.value)
+    assert excess / 2 < info.value.excess <= excess
@@ -0,0 +1,213 @@
+from nexedge import RadioCommunicator
+from nexedge.envelope import Header, Message
+from nexedge.status import StatusRegistry
+from tests.fixtures import SERIAL_KWARGS
+import nexedge.exceptions
+
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import pytest
+import pytest_asyncio
+import mock
+
+
+@pytest_asyncio.fixture
+async def com():
+    com = RadioCommunicator(serial_kwargs=SERIAL_KWARGS)
+    yield com
+    com.destroy()
+    await asyncio.sleep(0)
+
+
+@pytest.fixture
+def statuses():
+    # the registry is shared by all communicators, do not leak the codes
+    with mock.patch.object(RadioCommunicator, "_status_registry",
+                           StatusRegistry()):
+        yield
+
+
+ITEMS = [{"counter": i, "meta": {}, "payload": {"name": "dog" * i}}
+         for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_pickle_many(com):
+    encoded = com.pickle_many(ITEMS)
+    assert encoded == [com.pickle(item) for item in ITEMS]
+    assert com.unpickle_many(encoded) == ITEMS
+
+    with ThreadPoolExecutor(2) as executor:
+        assert com.pickle_many(ITEMS, executor=executor) == encoded
+        assert com.unpickle_many(encoded, executor=executor) == ITEMS
+
+
+@pytest.mark.asyncio
+async def test_data_handler_drains_backlog(com):
+    _counter, encoded = com._encode_transmission(data={"a": 1}, meta={})
+    data_queue = com._radio.data_queue
+    data_queue.put_nowait([b"00002", encoded])
+    for item in ITEMS[1:4]:
+        data_queue.put_nowait([b"00003", com.pickle(item)])
+    data_queue.put_nowait([b"00003", b"broken"])
+
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+    assert data_queue.empty()
+
+    remote_id, data = com.get_target_queue(b"00002").get_nowait()
+    assert type(data) is Message and data["payload"] == {"a": 1}
+    queue = com.get_target_queue(b"00003")
+    assert [queue.get_nowait()[1] for _ in range(3)] == ITEMS[1:4]
+    assert queue.empty()
+    assert com.stats["received"] == 5
+    assert com.stats["undecodable"] == 1
+
+
+@pytest.mark.asyncio
+async def test_data_handler_survives_broken_header(com):
+    data_queue = com._radio.data_queue
+    data_queue.put_nowait([b"00002", b"#zz.1.2~abc"])
+    data_queue.put_nowait([b"00002", b"#1.2.3" + b"a" * 300])
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+
+    _counter, encoded = com._encode_transmission(data={"a": 1}, meta={})
+    data_queue.put_nowait([b"00002", encoded])
+    await asyncio.sleep(0.01)
+    remote_id, data = com.get_target_queue(b"00002").get_nowait()
+    assert data["payload"] == {"a": 1}
+    assert com.stats["undecodable"] == 2
+
+
+@pytest.mark.asyncio
+async def test_any_trigger():
+    triggers = ["sensor.update", "k\u00e4se", 7]
+    com = RadioCommunicator(serial_kwargs=SERIAL_KWARGS, listeners=triggers)
+    try:
+        for trigger in triggers:
+            frame = com._encode_transmission(data={"a": 1},
+                                             meta={"trigger": trigger})[1]
+            com._radio.data_queue.put_nowait([b"00002", frame])
+        with pytest.raises(nexedge.exceptions.SenderException):
+            com._encode_transmission(data={"a": 1},
+                                     meta={"trigger": "a" * 300})
+
+        com.start_data_handler()
+        await asyncio.sleep(0.01)
+        for trigger in triggers:
+            _remote_id, data = com.get_listener_queue(trigger).get_nowait()
+            assert data["meta"] == {"trigger": trigger}
+            assert data["payload"] == {"a": 1}
+    finally:
+        com.destroy()
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_stream_compression():
+    com = RadioCommunicator(serial_kwargs=SERIAL_KWARGS,
+                            stream_compression=True)
+    com._send_control = mock.AsyncMock(return_value=True)
+    data_queue = com._radio.data_queue
+
+    frames = [com._encode_transmission(data=item, meta={},
+                                       link=b"00002")[1] for item in ITEMS]
+    assert frames[1] != com.pickle(ITEMS[1])
+    # the second transmission gets lost
+    for frame in frames[:1] + frames[2:]:
+        data_queue.put_nowait([b"00002", frame])
+
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+    queue = com.get_target_queue(b"00002")
+    assert queue.get_nowait()[1]["payload"] == ITEMS[0]
+    assert queue.empty()
+    com._send_control.assert_called_once_with(b"00002",
+                                              com.CONTROL_RESYNC)
+
+    # the sender restarts the stream on request
+    control = Header(flags=Header.FLAG_CONTROL, fields={"c": "r"})
+    data_queue.put_nowait([b"00002", control.encode()])
+    await asyncio.sleep(0.01)
+    _counter, frame = com._encode_transmission(data=ITEMS[5], meta={},
+                                               link=b"00002")
+    data_queue.put_nowait([b"00002", frame])
+    await asyncio.sleep(0.01)
+    assert queue.get_nowait()[1]["payload"] == ITEMS[5]
+    assert com.stats["stream_resets"] == 1
+    assert com.stats["stream_resyncs"] == 1
+
+    com.destroy()
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_stream_late_repetition_of_reset():
+    com = RadioCommunicator(serial_kwargs=SERIAL_KWARGS,
+                            stream_compression=True)
+    com._send_control = mock.AsyncMock(return_value=True)
+    frames = [com._encode_transmission(data=item, meta={},
+                                       link=b"00002")[1] for item in ITEMS]
+    for frame in frames[:2] + frames[:1] + frames[2:4]:
+        com._radio.data_queue.put_nowait([b"00002", frame])
+
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+    queue = com.get_target_queue(b"00002")
+    assert [queue.get_nowait()[1]["payload"]
+            for _ in range(queue.qsize())] == ITEMS[:4]
+    com._send_control.assert_not_called()
+
+    com.destroy()
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_status(com, statuses):
+    RadioCommunicator.register_status(42, "OPN")
+    RadioCommunicator.register_status(43, "CLS")
+
+    com._radio.send_status = mock.AsyncMock(return_value=True)
+    assert await com.send_status(target_id=b"00002", state="OPN")
+    com._radio.send_status.assert_called_once_with(target_id=b"00002",
+                                                   status=b"042")
+    com._radio.send_status.side_effect = \
+        nexedge.exceptions.ConfirmationTimeout
+    assert not await com.send_status(target_id=b"00002", state="CLS")
+    assert com.stats["statuses_sent"] == 1
+    assert com.stats["statuses_failed"] == 1
+    with pytest.raises(nexedge.exceptions.SenderException):
+        await com.send_status(target_id=b"00002", state="unknown")
+
+    everything = com.subscribe_status()
+    closed = com.subscribe_status(["CLS"])
+    for status in (b"042", b"043", b"999"):
+        com._radio.status_queue.put_nowait([b"00003", status])
+    await asyncio.sleep(0.01)
+
+    assert list(everything.get_nowait()) == [b"00003", "OPN"]
+    assert list(everything.get_nowait()) == [b"00003", "CLS"]
+    assert everything.empty()
+    assert list(closed.get_nowait()) == [b"00003", "CLS"]
+    assert closed.empty()
+    assert com.stats["unknown_statuses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_trace():
+    com = RadioCommunicator(serial_kwargs=SERIAL_KWARGS, trace=True)
+    _counter, frame = com._encode_transmission(data={"a": 1}, meta={},
+                                               link=b"00002")
+    frame = com._radio.before_write(com._tracer.stamp_enqueued(frame))
+    com._radio.data_queue.put_nowait([b"00002", frame])
+
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+    record = com.get_target_queue(b"00002").get_nowait()
+    assert record.trace["latency"] >= 0
+    assert record.trace["hops"] == 1
+    assert com.stats["trace"]["00002"]["latency"]["count"] == 1
+
+    com.destroy()
+    await asyncio.sleep(0)
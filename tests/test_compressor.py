@@ -0,0 +1,72 @@
+from nexedge.compressor import StreamCompressor, StreamDecompressor
+from nexedge.exceptions import StreamOutOfSync
+
+import json
+import zlib
+import pytest
+
+
+MESSAGES = [json.dumps({"title": "DASA 2017", "id": 186 + i,
+                        "current_state": "OPN", "current_count": i}).encode()
+            for i in range(20)]
+
+
+def test_stream_roundtrip():
+    compressor = StreamCompressor()
+    decompressor = StreamDecompressor()
+
+    streamed = 0
+    for i, message in enumerate(MESSAGES):
+        sequence, reset, compressed = compressor.compress(b"00002", message)
+        assert sequence == i and reset == (i == 0)
+        assert decompressor.decompress(b"00002", compressed, sequence,
+                                       reset=reset) == message
+        streamed += len(compressed)
+
+    # repetitive traffic compresses far better than one by one
+    single = sum(len(zlib.compress(message, 9)) for message in MESSAGES)
+    assert streamed < single / 2
+
+
+def test_stream_lost_transmission():
+    compressor = StreamCompressor()
+    decompressor = StreamDecompressor()
+
+    sequence, reset, compressed = compressor.compress(b"00002", MESSAGES[0])
+    decompressor.decompress(b"00002", compressed, sequence, reset)
+    compressor.compress(b"00002", MESSAGES[1])
+    sequence, reset, compressed = compressor.compress(b"00002", MESSAGES[2])
+    with pytest.raises(StreamOutOfSync):
+        decompressor.decompress(b"00002", compressed, sequence, reset)
+    assert len(decompressor) == 0
+
+    # the sender starts over
+    compressor.reset(b"00002")
+    sequence, reset, compressed = compressor.compress(b"00002", MESSAGES[3])
+    assert reset
+    assert decompressor.decompress(b"00002", compressed, sequence,
+                                   reset) == MESSAGES[3]
+    # old transmissions are ignored
+    assert decompressor.decompress(b"00002", compressed, sequence - 1) is None
+
+
+def test_stream_late_repetition_of_reset():
+    compressor = StreamCompressor()
+    decompressor = StreamDecompressor()
+    frames = [compressor.compress(b"00002", message) + (counter,)
+              for counter, message in enumerate(MESSAGES[:4])]
+
+    received = []
+    for sequence, reset, compressed, counter in\
+            frames[:2] + frames[:1] + frames[2:]:
+        received.append(decompressor.decompress(
+            b"00002", compressed, sequence, reset, counter=counter))
+    assert received == MESSAGES[:2] + [None] + MESSAGES[2:4]
+
+
+def test_stream_contexts_are_bounded():
+    compressor = StreamCompressor(max_links=2)
+    for link in (b"1", b"2", b"3"):
+        compressor.compress(link, MESSAGES[0])
+    assert len(compressor) == 2
+    assert compressor.compress(b"1", MESSAGES[1])[1]
@@ -0,0 +1,113 @@
+from nexedge import RadioCommunicator
+from nexedge.daemon import RadioDaemon
+from nexedge.client import RadioClient
+from nexedge.envelope import Header, Message
+from nexedge.protocol import FRAME, MAX_FRAME, STATS
+from tests.fixtures import SERIAL_KWARGS
+import nexedge.exceptions
+
+import asyncio
+import pytest
+import pytest_asyncio
+import mock
+
+
+@pytest.fixture
+def com():
+    com = mock.Mock()
+    com.send = mock.AsyncMock(return_value=True)
+    com.stats = {"sent": 1}
+    com.get_listener_queue.side_effect = nexedge.exceptions.ReceiverException
+    return com
+
+
+@pytest_asyncio.fixture
+async def client(com, tmp_path):
+    queue = asyncio.Queue()
+    com.get_target_queue.return_value = queue
+
+    daemon = RadioDaemon(com, str(tmp_path / "nexedge.sock"))
+    await daemon.start()
+    client = RadioClient(daemon.path)
+    await client.connect()
+    yield client
+    client.close()
+    daemon.close()
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_send(client, com):
+    results = await asyncio.gather(
+        client.send(target_id=b"00002", data={"name": "dog"}),
+        client.send(target_id=b"00003", data=[1, 2], meta={"x": 1}))
+    assert results == [True, True]
+    com.send.assert_any_call(target_id=b"00002", data={"name": "dog"},
+                             meta={})
+    com.send.assert_any_call(target_id=b"00003", data=[1, 2], meta={"x": 1})
+
+
+@pytest.mark.asyncio
+async def test_stats(client):
+    assert await client.stats() == {"sent": 1}
+
+
+@pytest.mark.asyncio
+async def test_error(client, com):
+    com.send.side_effect = nexedge.exceptions.PayloadTooLarge("too large")
+    with pytest.raises(nexedge.exceptions.PayloadTooLarge):
+        await client.send(target_id=b"00002", data={})
+
+
+@pytest.mark.asyncio
+async def test_subscribe_target(client, com):
+    queue = client.get_target_queue(b"00002")
+    await asyncio.sleep(.1)
+    com.get_target_queue.return_value.put_nowait([b"00002", {"counter": 1}])
+    remote_id, data = await asyncio.wait_for(queue.get(), 1)
+    assert remote_id == b"00002"
+    assert data == {"counter": 1}
+
+
+@pytest.mark.asyncio
+async def test_subscription_survives_undecodable(client, com):
+    queue = client.get_target_queue(b"00002")
+    await asyncio.sleep(.1)
+    broken = Message(Header(counter=1), b"x",
+                     mock.Mock(side_effect=ValueError("broken")))
+    com.get_target_queue.return_value.put_nowait([b"00002", broken])
+    com.get_target_queue.return_value.put_nowait([b"00002", {"counter": 2}])
+    remote_id, data = await asyncio.wait_for(queue.get(), 1)
+    assert data == {"counter": 2}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("length", [MAX_FRAME + 1, 2])
+async def test_bad_frame_closes_connection(client, length, caplog):
+    reader, writer = await asyncio.open_unix_connection(client.path)
+    writer.write(FRAME.pack(length, STATS, 1))
+    assert await asyncio.wait_for(reader.read(), 1) == b""
+    writer.close()
+    assert "bad frame" in caplog.text
+    # other clients are not affected
+    assert await client.stats() == {"sent": 1}
+
+
+@pytest.mark.asyncio
+async def test_real_stats(tmp_path):
+    com = RadioCommunicator(serial_kwargs=SERIAL_KWARGS, trace=True,
+                            reorder_window=4)
+    com._links.sent(b"00002", True, rtt=.5)
+    daemon = RadioDaemon(com, str(tmp_path / "nexedge.sock"))
+    await daemon.start()
+    client = RadioClient(daemon.path)
+    await client.connect()
+
+    stats = await client.stats()
+    assert stats["links"]["00002"]["rtt"] == .5
+    assert stats["sent"] == 0 and "channel" in stats
+
+    client.close()
+    daemon.close()
+    com.destroy()
+    await asyncio.sleep(0)
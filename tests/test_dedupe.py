@@ -0,0 +1,50 @@
+from nexedge.dedupe import DuplicateFilter
+
+import pytest
+
+
+@pytest.fixture
+def dedupe():
+    return DuplicateFilter(window=8, max_senders=2, modulo=2 ** 8)
+
+
+def test_duplicate(dedupe):
+    assert not dedupe.is_duplicate(b"00001", 1)
+    assert dedupe.is_duplicate(b"00001", 1)
+
+
+def test_out_of_order(dedupe):
+    assert not dedupe.is_duplicate(b"00001", 3)
+    assert not dedupe.is_duplicate(b"00001", 1)
+    assert not dedupe.is_duplicate(b"00001", 2)
+    assert dedupe.is_duplicate(b"00001", 1)
+    assert dedupe.is_duplicate(b"00001", 3)
+
+
+def test_senders_are_separated(dedupe):
+    assert not dedupe.is_duplicate(b"00001", 1)
+    assert not dedupe.is_duplicate(b"00002", 1)
+
+
+def test_counter_wrap(dedupe):
+    assert not dedupe.is_duplicate(b"00001", 255)
+    assert not dedupe.is_duplicate(b"00001", 0)
+    assert dedupe.is_duplicate(b"00001", 255)
+    assert dedupe.is_duplicate(b"00001", 256)
+
+
+def test_restart_with_session(dedupe):
+    assert not dedupe.is_duplicate(b"00001", 1, session=1)
+    assert not dedupe.is_duplicate(b"00001", 1, session=2)
+
+
+def test_restart_without_session(dedupe):
+    assert not dedupe.is_duplicate(b"00001", 100)
+    assert not dedupe.is_duplicate(b"00001", 1)
+
+
+def test_bounded_senders(dedupe):
+    for sender in [b"00001", b"00002", b"00003"]:
+        dedupe.is_duplicate(sender, 1)
+    assert len(dedupe) == 2
+    assert not dedupe.is_duplicate(b"00001", 1)
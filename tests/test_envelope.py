@@ -0,0 +1,53 @@
+from nexedge.envelope import Header, Message
+from nexedge.exceptions import SenderException
+
+import pytest
+import mock
+
+
+def test_header_roundtrip():
+    header = Header(flags=Header.FLAG_BARE, counter=42, session=7,
+                    fields={"t": "about-me", "g": "00012"})
+    decoded, body = Header.split(header.encode() + b"eNoBody==")
+    assert body == b"eNoBody=="
+    assert decoded.flags == Header.FLAG_BARE
+    assert decoded.counter == 42
+    assert decoded.session == 7
+    assert decoded.trigger == "about-me"
+    assert decoded.group == "00012"
+
+
+def test_split_without_header():
+    header, body = Header.split(b"eNoBody==")
+    assert header is None
+    assert body == b"eNoBody=="
+
+
+def test_header_escapes_fields():
+    for trigger in ["sensor.update", "a\x03b~", "50%", "k\u00e4se", " x "]:
+        encoded = Header(fields={"t": trigger}).encode()
+        assert all(0x21 <= byte < 0x7f for byte in encoded)
+        assert Header.split(encoded + b"body")[0].trigger == trigger
+    with pytest.raises(SenderException):
+        Header(fields={"t": "a" * 300}).encode()
+
+
+def test_locate_rejects_malformed_header():
+    for frame in [b"#zz.1.2~abc", b"#1.2~abc", b"#1.2.3" + b"a" * 300]:
+        with pytest.raises(ValueError):
+            Header.locate(frame)
+
+
+def test_message_decodes_lazily():
+    decode = mock.Mock(return_value={"name": "dog"})
+    header = Header(flags=Header.FLAG_BARE, counter=1, session=2,
+                    fields={"t": "about-me"})
+    message = Message(header, b"body", decode)
+    assert not message.decoded
+    decode.assert_not_called()
+
+    assert message["payload"] == {"name": "dog"}
+    assert message["meta"] == {"trigger": "about-me"}
+    assert message["counter"] == 1
+    assert "group" not in message
+    decode.assert_called_once_with(b"body")
@@ -0,0 +1,133 @@
+from nexedge.envelope import Header
+from nexedge.exceptions import PayloadTooLarge
+from nexedge.fec import ErasureCode, FragmentBuffer, split
+from tests.fixtures import communicator, connect, stub_send
+
+import os
+import random
+import asyncio
+import pytest
+import mock
+
+
+def test_erasure_code():
+    rng = random.Random(1)
+    for k, m in [(1, 1), (4, 2), (8, 3), (16, 8)]:
+        code = ErasureCode(k, m)
+        data = split(os.urandom(1000), k)
+        fragments = dict(enumerate(data + code.encode(data)))
+        for _ in range(10):
+            kept = rng.sample(sorted(fragments), k)
+            assert code.decode({i: fragments[i] for i in kept}) == data
+
+    with pytest.raises(ValueError):
+        ErasureCode(4, 1).decode({0: b"a", 1: b"b"})
+
+
+def test_xor_parity():
+    data = [b"\x01\x02", b"\x04\x08", b"\x10\x20"]
+    assert ErasureCode(3, 1).encode(data) == [b"\x15\x2a"]
+
+
+def test_fragment_buffer():
+    fragments = FragmentBuffer(max_age=10.)
+    data = os.urandom(100)
+    pieces = split(data, 4)
+    pieces += ErasureCode(4, 2).encode(pieces)
+
+    assert fragments.add("a", 0, 4, 2, 100, pieces[0], now=0.) is None
+    assert fragments.add("a", 2, 4, 2, 100, pieces[2], now=0.) is None
+    assert fragments.add("a", 4, 4, 2, 100, pieces[4], now=0.) is None
+    assert fragments.add("a", 5, 4, 2, 100, pieces[5], now=0.) == data
+    assert fragments.recovered == 1
+    # late fragments of a rebuilt transmission are dropped
+    assert fragments.add("a", 1, 4, 2, 100, pieces[1], now=0.) is None
+
+    fragments.add("b", 0, 4, 2, 100, pieces[0], now=0.)
+    assert len(fragments) == 1
+    fragments.add("c", 0, 4, 2, 100, pieces[0], now=20.)
+    assert len(fragments) == 1
+    assert fragments.expired == 1
+
+
+def test_fragment_buffer_rejects_invalid():
+    fragments = FragmentBuffer()
+    for index, k, m in [(0, 0, 1), (0, 200, 57), (4, 2, 2), (-1, 2, 1)]:
+        with pytest.raises(ValueError):
+            fragments.add("a", index, k, m, 4, b"ab")
+    with pytest.raises(ValueError):
+        fragments.add("a", 0, 2, 1, 5, b"ab")
+
+    fragments.add("a", 0, 2, 1, 4, b"ab")
+    with pytest.raises(ValueError):
+        fragments.add("a", 1, 3, 1, 4, b"ab")
+    with pytest.raises(ValueError):
+        fragments.add("a", 1, 2, 1, 4, b"abc")
+    assert fragments.add("a", 2, 2, 1, 4, b"\x00\x00") == b"abab"
+
+
+@pytest.mark.asyncio
+async def test_communicator_recovers_lost_fragment(communicator):
+    com = communicator(fec_redundancy=.25)
+    sent = []
+
+    async def send(target_id, payload):
+        sent.append(payload)
+        return True
+
+    stub_send(com, send)
+    data = {"blob": os.urandom(3 * com._radio.MAXSIZE).hex()}
+    assert await com.send(target_id=b"00002", data=data)
+    assert len(sent) > 2
+    assert all(len(frame) <= com._radio.MAXSIZE for frame in sent)
+    assert all(Header.locate(frame)[0].flags & Header.FLAG_FRAGMENT
+               for frame in sent)
+
+    # the first fragment gets lost
+    for frame in sent[1:]:
+        com._radio.data_queue.put_nowait([b"00001", frame])
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+    queue = com.get_target_queue(b"00001")
+    assert queue.get_nowait()[1]["payload"] == data
+    assert queue.empty()
+    assert com.stats["fragments"]["recovered"] == 1
+
+    # hostile fragments are dropped
+    for fragment in ["0:0:1:4", "0:c8:39:4", "x"]:
+        header = Header(Header.FLAG_FRAGMENT, 7, 1, {"f": fragment})
+        com._radio.data_queue.put_nowait([b"00001",
+                                          header.encode() + b"YWI="])
+    com._radio.data_queue.put_nowait([b"00001", sent[0]])
+    await asyncio.sleep(0.01)
+    assert com.stats["undecodable"] == 3
+    assert not com._data_handler.done()
+
+
+@pytest.mark.asyncio
+async def test_fragments_are_not_interleaved(communicator):
+    com = communicator(fec_redundancy=.25, stream_compression=True)
+    other = communicator()
+    connect(com, other, b"00001")
+    other.start_data_handler()
+
+    # the small transmission continues the compressed stream of the large
+    # one, it must not be sent between its fragments
+    large = {"blob": os.urandom(3 * com._radio.MAXSIZE).hex()}
+    small = {"name": "dog"}
+    assert await asyncio.gather(com.send(target_id=b"00002", data=large),
+                                com.send(target_id=b"00002", data=small)) ==\
+        [True, True]
+    await asyncio.sleep(0.01)
+    queue = other.get_target_queue(b"00001")
+    assert [queue.get_nowait()[1]["payload"]
+            for _ in range(queue.qsize())] == [large, small]
+
+@pytest.mark.asyncio
+async def test_communicator_without_fec(communicator):
+    com = communicator()
+    send = stub_send(com, mock.AsyncMock(return_value=True))
+    data = {"blob": os.urandom(3 * com._radio.MAXSIZE).hex()}
+    with pytest.raises(PayloadTooLarge):
+        await com.send(target_id=b"00002", data=data)
+    send.assert_not_called()
@@ -0,0 +1,74 @@
+from nexedge import hooks
+from nexedge.channel import ChannelStatus
+from tests.fixtures import communicator, stub_send
+
+import asyncio
+import pytest
+import mock
+
+
+@pytest.fixture
+def events():
+    events = []
+
+    def record(event):
+        def hook(source, **fields):
+            events.append((event, fields))
+        return hook
+
+    for event in hooks.EVENTS:
+        hooks.register(event, record(event))
+    yield events
+    hooks.clear()
+
+
+def test_register_and_unregister():
+    calls = []
+
+    def hook(source, **fields):
+        calls.append(fields)
+
+    def broken(source, **fields):
+        raise RuntimeError
+
+    hooks.register(hooks.CHANNEL_CHANGED, broken)
+    hooks.register(hooks.CHANNEL_CHANGED, hook)
+    hooks.emit(hooks.CHANNEL_CHANGED, None, status="sending")
+    assert calls == [{"status": "sending"}]
+
+    hooks.unregister(hooks.CHANNEL_CHANGED, broken)
+    hooks.unregister(hooks.CHANNEL_CHANGED, hook)
+    assert not hooks.active
+    with pytest.raises(AssertionError):
+        hooks.register("unknown", hook)
+
+
+def test_channel_changed(events):
+    channel = ChannelStatus()
+    channel.set_red()
+    channel.set_red()
+    channel.set_free()
+    assert events == [
+        (hooks.CHANNEL_CHANGED, {"status": "sending", "previous": "unknown"}),
+        (hooks.CHANNEL_CHANGED, {"status": "off", "previous": "sending"})]
+
+
+@pytest.mark.asyncio
+async def test_send_events(events, communicator):
+    com = communicator()
+    send = stub_send(com, mock.AsyncMock(return_value=True))
+    assert await com.send(target_id=b"00002", data={"a": 1})
+
+    names = [event for event, _fields in events]
+    assert names == [hooks.SEND_QUEUED, hooks.SEND_STARTED,
+                     hooks.SEND_CONFIRMED]
+    assert events[2][1] == {"counter": 1, "path": "sdm", "result": True}
+
+    # and back in again
+    com._radio.data_queue.put_nowait(
+        [b"00002", send.call_args[1]["payload"]])
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+    event, fields = events[-1]
+    assert event == hooks.MESSAGE_ROUTED
+    assert fields["header"].counter == 1
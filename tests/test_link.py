@@ -0,0 +1,56 @@
+from nexedge.link import LinkEstimator
+from tests.fixtures import communicator, stub_send
+
+import asyncio
+import pytest
+import mock
+
+
+def test_quality():
+    links = LinkEstimator(alpha=.5)
+    assert links.score(b"00002") == 1.
+    assert links.payload_size(b"00002", 4000, 100) == 4000
+
+    links.sent(b"00002", True, rtt=.4)
+    links.sent(b"00002", False)
+    assert links.score(b"00002") == .5
+    assert links.payload_size(b"00002", 4000, 100) == 1075
+    assert links.get(b"00002").rtt == .4
+
+    links.received(b"00003", lost=1)
+    assert links.score(b"00003") == .75
+    assert links.stats()["00003"]["lost"] == 1
+
+
+def test_pacing():
+    links = LinkEstimator(pace_slot=2., max_pace=5.)
+    links.sent(b"00002", False, now=0.)
+    assert links.pacing(b"00002", now=1.) == 1.
+    assert links.pacing(b"00002", busy=.5, now=1.) == 2.
+    links.sent(b"00002", False, now=0.)
+    links.sent(b"00002", False, now=0.)
+    assert links.pacing(b"00002", now=0.) == 5.
+    links.sent(b"00002", True)
+    assert links.pacing(b"00002") == 0.
+    assert links.pacing(b"00003") == 0.
+
+
+@pytest.mark.asyncio
+async def test_communicator_paces_failing_link(communicator):
+    com = communicator(link_pace_slot=.05)
+    send = stub_send(com, mock.AsyncMock(return_value=False))
+
+    assert not await com.send(target_id=b"00002", data={"a": 1})
+    assert com.link_quality(b"00002") < 1.
+    assert com.recommended_payload_size(b"00002") < com._radio.MAXSIZE
+    assert com.recommended_payload_size() == com._radio.MAXSIZE
+
+    # the next transmission to the failing target waits
+    send.return_value = True
+    task = asyncio.get_event_loop().create_task(
+        com.send(target_id=b"00002", data={"a": 2}))
+    await asyncio.sleep(.01)
+    assert send.call_count == 1
+    assert await task
+    assert send.call_count == 2
+    assert com.stats["links"]["00002"]["failures"] == 0
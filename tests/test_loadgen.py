@@ -0,0 +1,22 @@
+from nexedge.loadgen import run_load, TrafficClass, SimulatedMedium
+
+import pytest
+
+
+def test_traffic_class():
+    traffic = TrafficClass.parse("event:100:0.5:2")
+    assert (traffic.name, traffic.size, traffic.weight, traffic.priority) ==\
+        ("event", 100, .5, 2)
+    assert len(traffic.payload()["x"]) == 100
+
+
+@pytest.mark.asyncio
+async def test_run_load():
+    # a light load, otherwise a run may end before anything got through
+    result = await run_load(units=3, rate=6.,
+                            mix=[TrafficClass("status", 20, 1.)],
+                            duration=120., speed=400.)
+    assert result["sent"] > 0
+    assert result["received"] > 0
+    assert result["latency"][50] > 0
+    assert 0 < result["utilisation"] <= 1
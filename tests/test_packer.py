@@ -0,0 +1,71 @@
+from nexedge.packer import SchemaPacker
+
+import json
+import pytest
+
+
+EVENT = {
+    "title": "DASA 2017",
+    "id": 186,
+    "valid_from": "2017-03-03T16:11:00Z",
+    "is_valid_now": True,
+    "current_count": -8,
+    "current_state": "OPN",
+    "limit": None,
+}
+
+
+@pytest.fixture
+def packer():
+    packer = SchemaPacker()
+    packer.register(1, [("title", "str"),
+                        ("id", "uint"),
+                        ("valid_from", "timestamp"),
+                        ("is_valid_now", "bool"),
+                        ("current_count", "int"),
+                        ("current_state", ("enum", ["OPN", "CLS"])),
+                        ("limit", "uint")])
+    return packer
+
+
+def test_roundtrip(packer):
+    packed = packer.pack(EVENT)
+    assert packed[:1] == SchemaPacker.MARK
+    assert len(packed) < len(json.dumps(EVENT)) / 2
+    assert packer.unpack(packed) == EVENT
+
+
+def test_unregistered_falls_back_to_json(packer):
+    data = {"name": "dog"}
+    assert packer.pack(data) == b'{"name":"dog"}'
+    assert packer.unpack(packer.pack(data)) == data
+
+
+def test_unfitting_value_falls_back_to_json(packer):
+    data = dict(EVENT, current_state="UNKNOWN")
+    assert packer.pack(data)[:1] == b"{"
+    assert packer.unpack(packer.pack(data)) == data
+
+
+def test_values_survive_the_round_trip():
+    packer = SchemaPacker()
+    packer.register(2, [("at", "timestamp"), ("ratio", "float"),
+                        ("mode", ("enum", [1, "on"]))])
+    for data in [{"at": "2017-3-3T1:1:0Z", "ratio": .5, "mode": 1},
+                 {"at": "2017-03-03T01:01:00Z", "ratio": 1, "mode": 1},
+                 {"at": "2017-03-03T01:01:00Z", "ratio": .5, "mode": True}]:
+        packed = packer.pack(data)
+        assert packed[:1] == b"{"
+        unpacked = packer.unpack(packed)
+        assert unpacked == data
+        assert [type(value) for value in unpacked.values()] ==\
+            [type(value) for value in data.values()]
+
+    data = {"at": "2017-03-03T01:01:00Z", "ratio": .5, "mode": 1}
+    assert packer.pack(data)[:1] == SchemaPacker.MARK
+    assert packer.unpack(packer.pack(data)) == data
+
+
+def test_register_twice(packer):
+    with pytest.raises(AssertionError):
+        packer.register(1, [("name", "str")])
@@ -1,8 +1,11 @@
-from tests.fixtures import radio, no_radio
+from tests.fixtures import radio, no_radio, RADIO_KWARGS, SERIAL_KWARGS
+from nexedge import Radio
+from nexedge.envelope import Inbound
 import nexedge.exceptions
 
 import pytest
 import mock
+import serial
 from pytest_mock import mocker
 import logging
 logger = logging.getLogger(__name__)
@@ -37,3 +40,155 @@ async def test_open_connection_destroy_on_no_device(no_radio, mocker):
 @pytest.mark.asyncio
 async def test_open_connection(radio):
     await radio.start_connection_handler()
+
+
+@pytest.mark.asyncio
+async def test_send_group_LDM(radio, mocker):
+    mocker.patch.object(radio, "send", mock.AsyncMock(return_value=True))
+    assert await radio.send_group_LDM(group_id=b"00012", payload=b"abc")
+    radio.send.assert_called_with(b"\x02gGG00012abc\x03")
+
+
+@pytest.mark.asyncio
+async def test_send_broadcast_LDM(radio, mocker):
+    mocker.patch.object(radio, "send", mock.AsyncMock(return_value=True))
+    assert await radio.send_broadcast_LDM(payload=b"abc")
+    radio.send.assert_called_with(b"\x02gGG00000abc\x03")
+
+
+@pytest.mark.asyncio
+async def test_send_SDM_too_large(radio):
+    with pytest.raises(nexedge.exceptions.PayloadTooLarge):
+        await radio.send_SDM(target_id=b"00002",
+                             payload=b"a" * (radio.SDM_MAXSIZE + 1))
+
+
+@pytest.mark.asyncio
+async def test_send_backs_off_while_channel_busy(radio, mocker):
+    mocker.patch("nexedge.radio.asyncio.sleep", mock.AsyncMock())
+    mocker.patch.object(radio.channel, "free", return_value=False)
+    mocker.patch.object(radio, "write", mock.AsyncMock(return_value=True))
+    radio.max_attempts = 3
+    with pytest.raises(nexedge.exceptions.ChannelTimeout):
+        await radio.send(b"\x02gGU00002abc\x03")
+    radio.write.assert_not_called()
+    assert radio.stats["backoffs"] == 2
+    assert radio.stats["probes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_send_tries_once_more_at_deadline(radio, mocker):
+    now = [0.]
+
+    async def sleep(delay):
+        now[0] += delay
+
+    mocker.patch("nexedge.radio.time.monotonic", side_effect=lambda: now[0])
+    mocker.patch("nexedge.radio.asyncio.sleep", sleep)
+    mocker.patch("nexedge.radio.random.uniform", return_value=100.)
+    # the channel becomes free right at the deadline
+    deadline = radio.SETTLE_TIME + 10.
+    mocker.patch.object(radio.channel, "free",
+                        side_effect=lambda: now[0] >= deadline)
+    mocker.patch.object(radio.channel, "next_free_window",
+                        return_value=(0., 0.))
+    mocker.patch.object(radio, "write", mock.AsyncMock(return_value=True))
+    radio.channel_timeout = 10.
+    assert await radio.send(b"\x02gGU00002abc\x03")
+    assert now[0] == deadline
+    radio.write.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_send_retries_after_collision(radio, mocker):
+    mocker.patch("nexedge.radio.asyncio.sleep", mock.AsyncMock())
+    mocker.patch.object(radio.channel, "free", return_value=True)
+    mocker.patch.object(radio, "write",
+                        mock.AsyncMock(side_effect=[False, True]))
+    radio._retry_sending = True
+    assert await radio.send(b"\x02gGU00002abc\x03")
+    assert radio.stats["nacks"] == 1
+    assert radio.stats["backoffs"] == 1
+
+
+def test_poll_interval(radio, mocker):
+    mocker.patch.object(radio.channel, "free", return_value=True)
+    radio.channel._time_unfree = 0
+    assert radio._poll_interval() == radio.POLL_SLOW
+    radio._pending_sends = 1
+    assert radio._poll_interval() == radio.POLL_FAST
+
+
+@pytest.mark.asyncio
+async def test_write_reconnects(mocker):
+    # asyncio objects of the radio have to belong to the running loop
+    radio = Radio(serial_kwargs=SERIAL_KWARGS, reconnect=True, **RADIO_KWARGS)
+    radio.RECONNECT_DELAY = 0
+    await radio.start_connection_handler()
+    radio._writer = mock.Mock(
+        write=mock.Mock(side_effect=serial.SerialException))
+
+    writer = mock.Mock(drain=mock.AsyncMock())
+    mocker.patch("nexedge.radio.open_serial_connection",
+                 mock.AsyncMock(return_value=(mock.Mock(), mock.Mock(),
+                                              writer)))
+    await radio.write(b"\x02JCA\x03", await_response=False)
+    writer.write.assert_called_with(b"\x02JCA\x03")
+    assert radio.stats["reconnects"] == 1
+    assert radio.stats["connected"]
+    assert not radio.is_destroyed.done()
+
+
+@pytest.mark.asyncio
+async def test_write_destroys_without_reconnect(radio):
+    await radio.start_connection_handler()
+    radio._writer = mock.Mock(
+        write=mock.Mock(side_effect=serial.SerialException))
+    with pytest.raises(nexedge.exceptions.DeviceNotFound):
+        await radio.write(b"\x02JCA\x03", await_response=False)
+    assert radio.is_destroyed.done()
+
+
+@pytest.mark.asyncio
+async def test_write_waits_for_serial_port(radio, mocker):
+    mocker.patch.object(radio, "_writer",
+                        mock.Mock(drain=mock.AsyncMock()))
+    sleep = mocker.patch("nexedge.radio.asyncio.sleep", mock.AsyncMock())
+    await radio.write(b"a" * 960, await_response=False)
+    radio._writer.drain.assert_called_with()
+    # 960 bytes with 11 bits each at 9600 baud
+    assert sleep.call_args[0][0] == pytest.approx(1.1, abs=.05)
+    assert radio.last_tx_done is not None
+
+
+def test_process_status(radio):
+    radio.process_status(b"gEU00002000000042")
+    record = radio.status_queue.get_nowait()
+    assert record.kind == Inbound.STATUS
+    assert list(record) == [b"00002", b"042"]
+
+
+def test_process_message(radio):
+    radio.process_message(b"gFU00002000000hello", kind=Inbound.SDM)
+    radio.process_message(b"gGU00002000000world")
+    first = radio.data_queue.get_nowait()
+    second = radio.data_queue.get_nowait()
+
+    sender, body = first
+    assert sender == b"00002" and first.kind == Inbound.SDM
+    assert type(body) is memoryview and body == b"hello"
+    assert second.kind == Inbound.LDM
+    # records of one sender share the sender id
+    assert second.sender is sender
+
+
+@pytest.mark.asyncio
+async def test_poller_loses_connection(radio, mocker):
+    await radio.start_connection_handler()
+    mocker.patch.object(radio, "_poll_interval", return_value=0)
+    radio.channel._time_last_status = 0
+    radio._writer = mock.Mock(
+        write=mock.Mock(side_effect=serial.SerialException))
+    with pytest.raises(nexedge.exceptions.DeviceNotFound):
+        await radio.channel_poller()
+    assert radio.is_destroyed.done()
@@ -0,0 +1,95 @@
+from nexedge.reorder import ReorderBuffer, Loss
+from nexedge.exceptions import PayloadTooLarge
+from tests.fixtures import communicator
+
+import os
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def buffer():
+    return ReorderBuffer(max_size=4, max_hold=1., modulo=2 ** 8)
+
+
+def test_in_order(buffer):
+    assert buffer.push(b"00001", 5, "a", now=0) == ["a"]
+    assert buffer.push(b"00001", 7, "c", now=0) == []
+    assert buffer.push(b"00001", 8, "d", now=0) == []
+    assert buffer.push(b"00001", 6, "b", now=0) == ["b", "c", "d"]
+    assert buffer.push(b"00002", 1, "y", now=0) == []
+    assert buffer.push(b"00002", 0, "x", now=0) == ["x", "y"]
+
+
+def test_first_transmission_late(buffer):
+    assert buffer.push(b"00001", 1, "b", now=0) == []
+    assert buffer.expire(now=1.) == [(b"00001", [Loss(0, 1), "b"])]
+    assert buffer.push(b"00001", 0, "a", now=1) == []
+
+
+def test_gap_given_up(buffer):
+    buffer.push(b"00001", 254, "a", now=0)
+    assert buffer.push(b"00001", 0, "c", now=0) == []
+    assert buffer.next_deadline() == 1.
+    assert buffer.expire(now=.5) == []
+    assert buffer.expire(now=1.) == [(b"00001", [Loss(255, 1), "c"])]
+
+    # too late, the gap was already reported
+    assert buffer.push(b"00001", 255, "b", now=2) == []
+    # too far ahead to wait for the gap
+    assert buffer.push(b"00001", 6, "g", now=2) == [Loss(1, 5), "g"]
+    assert (buffer.lost, buffer.late) == (6, 1)
+
+
+def test_restart(buffer):
+    buffer.push(b"00001", 10, "a", session=1, now=0)
+    buffer.push(b"00001", 12, "c", session=1, now=0)
+    assert buffer.push(b"00001", 0, "x", session=2, now=0) ==\
+        [Loss(11, 1), "c", "x"]
+
+
+@pytest.mark.asyncio
+async def test_communicator_reorders(communicator):
+    com = communicator(reorder_window=8, reorder_hold=.05)
+    frames = [com._encode_transmission(data={"i": i}, meta={},
+                                       link=b"00002")[1] for i in range(5)]
+    data_queue = com._radio.data_queue
+    # the second transmission gets lost, the last two are swapped
+    for frame in frames[:1] + frames[2:3] + frames[4:] + frames[3:4]:
+        data_queue.put_nowait([b"00002", frame])
+
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+    queue = com.get_target_queue(b"00002")
+    assert queue.get_nowait()[1]["payload"] == {"i": 0}
+    assert queue.empty()
+
+    await asyncio.sleep(0.1)
+    received = [queue.get_nowait()[1] for _ in range(queue.qsize())]
+    assert received[0] == Loss(1, 1)
+    assert [data["payload"] for data in received[1:]] == [{"i": 2}, {"i": 3},
+                                                           {"i": 4}]
+    assert com.stats["lost"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("rejected, error", [
+    ({"i": os.urandom(8000).hex()}, PayloadTooLarge),
+    ({"i": {1, 2}}, TypeError)])
+async def test_rejected_transmission_leaves_no_gap(communicator, rejected,
+                                                   error):
+    com = communicator(reorder_window=8, reorder_hold=10.)
+    first = com._encode_transmission(data={"i": 0}, meta={},
+                                     link=b"00002")[1]
+    with pytest.raises(error):
+        com._encode_transmission(data=rejected, meta={}, link=b"00002")
+    second = com._encode_transmission(data={"i": 1}, meta={},
+                                      link=b"00002")[1]
+    for frame in (first, second):
+        com._radio.data_queue.put_nowait([b"00002", frame])
+
+    com.start_data_handler()
+    await asyncio.sleep(0.01)
+    queue = com.get_target_queue(b"00002")
+    assert [queue.get_nowait()[1]["payload"]
+            for _ in range(queue.qsize())] == [{"i": 0}, {"i": 1}]
@@ -0,0 +1,93 @@
+from nexedge.exceptions import RequestFailed, RequestTimeout
+from tests.fixtures import communicator, connect, stub_send
+
+import asyncio
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_request_reply(communicator):
+    client = communicator()
+    server = communicator()
+    connect(client, server, b"00001")
+    connect(server, client, b"00002")
+    client.start_data_handler()
+    server.start_data_handler()
+
+    async def add(sender, data, meta):
+        await asyncio.sleep(0)
+        return {"sum": data["a"] + data["b"], "sender": sender.decode()}
+
+    server.register_handler(add, trigger="add")
+    server.register_handler(lambda sender, data, meta: 1 / 0)
+
+    assert await client.request(b"00002", {"a": 1, "b": 2},
+                                meta={"trigger": "add"},
+                                timeout=1.) == {"sum": 3, "sender": "00001"}
+    with pytest.raises(RequestFailed, match="ZeroDivisionError"):
+        await client.request(b"00002", {"a": 1}, timeout=1.)
+    with pytest.raises(RequestFailed, match="no handler"):
+        await client.request(b"00002", {"a": 1}, meta={"trigger": "x"},
+                             timeout=1.)
+
+    # neither requests nor replies show up in the queues
+    assert client.get_target_queue(b"00002").empty()
+    assert server.get_target_queue(b"00001").empty()
+    assert not client._pending
+    assert server.stats["requests_received"] == 3
+
+
+@pytest.mark.asyncio
+async def test_request_timeout(communicator):
+    client = communicator(max_requests=1)
+    sent = []
+
+    async def send(target_id, payload):
+        sent.append(payload)
+        return True
+
+    stub_send(client, send)
+    request = asyncio.get_event_loop().create_task(
+        client.request(b"00002", {"a": 1}, timeout=.05))
+    await asyncio.sleep(0.01)
+    # the pending table is full
+    with pytest.raises(RequestFailed):
+        await client.request(b"00002", {"a": 2})
+    with pytest.raises(RequestTimeout):
+        await request
+    assert not client._pending
+    assert client.stats["request_timeouts"] == 1
+    assert len(sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_request_flood_is_dropped(communicator):
+    server = communicator(max_requests=2)
+    replies = []
+
+    async def send(target_id, payload):
+        replies.append(payload)
+        return True
+
+    stub_send(server, send)
+    release = asyncio.Event()
+
+    async def slow(sender, data, meta):
+        await release.wait()
+        return data
+
+    server.register_handler(slow)
+    client = communicator()
+    for i in range(10):
+        frame = client._encode_transmission(
+            data={"i": i}, meta={}, link=b"00002", fields={"i": f"{i:x}"})[1]
+        server._radio.data_queue.put_nowait([b"00001", frame])
+    server.start_data_handler()
+    await asyncio.sleep(0.01)
+    assert len(server._handler_tasks) == 2
+    assert server.stats["unhandled_requests"] == 8
+
+    release.set()
+    await asyncio.sleep(0.01)
+    assert len(replies) == 2
+    assert not server._handler_tasks
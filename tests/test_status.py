@@ -0,0 +1,29 @@
+from nexedge.status import StatusRegistry
+
+import enum
+import pytest
+
+
+class State(enum.Enum):
+    OPEN = 1
+    CLOSED = 2
+
+
+def test_registry():
+    registry = StatusRegistry()
+    registry.register(10, "OPN")
+    registry.register_enum(State)
+
+    assert registry.encode("OPN") == b"010"
+    assert registry.encode(State.CLOSED) == b"002"
+    assert registry.decode(b"010") == "OPN"
+    assert registry.decode(b"001") is State.OPEN
+    assert registry.decode(b"099") is None
+    assert registry.decode(b"x") is None
+
+    with pytest.raises(ValueError):
+        registry.encode("CLS")
+    with pytest.raises(AssertionError):
+        registry.register(10, "CLS")
+    with pytest.raises(AssertionError):
+        registry.register(1000, "CLS")
@@ -0,0 +1,69 @@
+from nexedge.trace import Tracer, ClockOffset, encode_time, decode_time,\
+    ON_AIR, ENQUEUED, PLACEHOLDER
+from nexedge.envelope import Header
+
+import pytest
+
+
+def test_clock_offset():
+    clock = ClockOffset()
+    assert clock.offset is None
+    # the remote clock is 5s ahead, 1s each way, 2s hold
+    clock.add(100., 106., 108., 104.)
+    assert clock.offset == pytest.approx(5.)
+    assert clock.delay == pytest.approx(2.)
+    # a slower round trip is not trusted
+    clock.add(200., 208., 209., 206.)
+    assert clock.offset == pytest.approx(5.)
+
+
+def test_stamp():
+    header = Header(counter=1, fields=Tracer().fields())
+    data = b"\x02gGU00002" + header.encode() + b"body\x03"
+    stamped = Tracer.stamp(Tracer.stamp(data, ENQUEUED, 10.), ON_AIR, 12.5)
+    assert len(stamped) == len(data)
+
+    header, body = Header.split(stamped[9:])
+    assert decode_time(header.fields[ENQUEUED]) == 10.
+    assert decode_time(header.fields[ON_AIR]) == 12.5
+    assert body == b"body\x03"
+    # already stamped fields stay as they are
+    assert Tracer.stamp(stamped, ON_AIR) == stamped
+
+
+def test_observe_with_skew(mocker):
+    a, b = Tracer(), Tracer()
+    clock = mocker.patch("nexedge.trace.time.time")
+
+    # b's clock is 3s ahead of a's, every transmission takes 1s on air
+    def transmit(sender, receiver, sender_id, receiver_id, now):
+        clock.return_value = now
+        fields = sender.fields(receiver_id)
+        fields[ENQUEUED] = encode_time(now + .5)
+        fields[ON_AIR] = encode_time(now + 1.)
+        return fields
+
+    fields = transmit(a, b, b"00001", b"00002", 100.)
+    clock.return_value = 105.
+    first = b.observe(b"00001", fields, received=105.)
+    assert first["offset"] is None
+    assert first["latency"] == pytest.approx(5.)
+
+    fields = transmit(b, a, b"00002", b"00001", 110.)
+    clock.return_value = 109.
+    a.observe(b"00002", fields, received=109.)
+
+    fields = transmit(a, b, b"00001", b"00002", 120.)
+    clock.return_value = 125.5
+    traced = b.observe(b"00001", fields, received=125.)
+    assert traced["offset"] == pytest.approx(-3.)
+    assert traced["latency"] == pytest.approx(2.5)
+    assert traced["queued"] == pytest.approx(.5)
+    assert traced["access"] == pytest.approx(.5)
+    assert traced["air"] == pytest.approx(1.)
+    assert traced["handling"] == pytest.approx(.5)
+    assert traced["hops"] == 1
+
+    stats = b.stats()["00001"]
+    assert stats["latency"]["count"] == 2
+    assert stats["offset"] == pytest.approx(-3.)